@@ -23,9 +23,22 @@ import subprocess
 import tempfile
 import toml
 
-from src.util import constants
-from src.util.subp import subpv, ndenv
-from src.util.tx_fees import ensure_tx_fees
+from src.util import constants, xproc
+from src.util.account_pool import AccountPool
+from src.util.bootstrap import fund_special_accounts
+from src.util.buildcache import BuildCache
+from src.util.conf import load as load_repo_conf
+from src.util.api_client import ApiClient
+from src.util.chain_waiter import ChainWaiter
+from src.util.cmdstats import CommandStats
+from src.util.regime import RegimeManager, schedule
+from src.util.registry import AccountRegistry, compact, prune
+from src.util.snapshot import LocalnetSnapshot
+from src.util.standin import Ledger, StandinServer
+from src.util.tool import ToolSession, NDAU_MEMOIZE, NDAU_SIGNER_LOCKS
+
+# meta tests run the suite's own fixtures in a scratch session
+pytest_plugins = ["pytester"]
 
 
 def pytest_addoption(parser):
@@ -42,7 +55,196 @@ def pytest_addoption(parser):
         default=False,
         help="keep temporary files for debugging failures",
     )
+    parser.addoption(
+        "--prune-conf",
+        action="store_true",
+        default=False,
+        help="archive ndautool.toml and remove the accounts earlier test runs "
+        "generated from it",
+    )
     parser.addoption("--ip", default="localhost", help="ip of the localnet-0 node")
+    parser.addoption(
+        "--standin",
+        action="store_true",
+        default=False,
+        help="run API tests against an in-process ndauapi stand-in; skip the rest",
+    )
+    parser.addoption(
+        "--account-pool-size",
+        type=int,
+        default=8,
+        help="number of accounts the account pool sets up at a time",
+    )
+    parser.addoption(
+        "--snapshot",
+        choices=("none", "session", "module"),
+        default="none",
+        help="restore the localnet from a snapshot at the start of the session "
+        "or of every test module",
+    )
+    parser.addoption(
+        "--snapshot-dir",
+        default=os.path.expanduser("~/.localnet/snapshot"),
+        help="where the localnet snapshot is kept between runs",
+    )
+    parser.addoption(
+        "--localnet-bin",
+        default=os.path.expandvars("$GOPATH/src/github.com/ndau/commands/bin"),
+        help="directory holding the localnet's run.sh and kill.sh",
+    )
+    parser.addoption(
+        "--keep-order",
+        action="store_true",
+        default=False,
+        help="run tests in collection order instead of grouping them by fee and SIB regime",
+    )
+    parser.addoption(
+        "--runbench", action="store_true", default=False, help="run benchmarks"
+    )
+    parser.addoption(
+        "--benchdir",
+        default="bench-results",
+        help="directory into which benchmarks write their JSON results",
+    )
+    parser.addoption(
+        "--bench-txs",
+        type=int,
+        default=1000,
+        help="number of transactions the throughput benchmark submits",
+    )
+    parser.addoption(
+        "--bench-accounts",
+        type=int,
+        default=16,
+        help="number of accounts the throughput benchmark submits from at once",
+    )
+    parser.addoption(
+        "--api-pool-size",
+        type=int,
+        default=10,
+        help="max number of pooled keep-alive connections to ndauapi",
+    )
+    parser.addoption(
+        "--api-retries",
+        type=int,
+        default=3,
+        help="max retries of an ndauapi request which could not connect",
+    )
+    parser.addoption(
+        "--api-timeout",
+        type=float,
+        default=60,
+        help="seconds to wait for an ndauapi response",
+    )
+    parser.addoption(
+        "--cmd-stats",
+        default="cmd-stats.json",
+        help="file to which per-command tool timings are written; empty for none",
+    )
+    parser.addoption(
+        "--load-levels",
+        default="1,8,64",
+        help="comma-separated numbers of concurrent clients the read load test sweeps",
+    )
+    parser.addoption(
+        "--load-seconds",
+        type=float,
+        default=2.0,
+        help="seconds the load tests run at each concurrency level or rate",
+    )
+    parser.addoption(
+        "--load-rates",
+        default="50,200,1000",
+        help="comma-separated requests per second the open-loop load tests send at",
+    )
+    parser.addoption(
+        "--load-mix",
+        default="transfer=1",
+        help="weighted tx kinds for the open-loop tx load test, e.g. transfer=8,lock=1",
+    )
+    parser.addoption(
+        "--eai-batches",
+        default="1000,10000,100000",
+        help="comma-separated numbers of accounts the EAI rate benchmark posts at once",
+    )
+    parser.addoption(
+        "--eai-seed",
+        type=int,
+        default=0,
+        help="random seed of the accounts the EAI rate benchmark generates",
+    )
+    parser.addoption(
+        "--history-depth",
+        type=int,
+        default=1000,
+        help="number of history items the account history benchmark pages through",
+    )
+    parser.addoption(
+        "--sysvar-history",
+        type=int,
+        default=2000,
+        help="number of history entries the sysvar history benchmark writes",
+    )
+    parser.addoption(
+        "--crawl-workers",
+        type=int,
+        default=4,
+        help="number of /block/range windows the chain crawler fetches at once",
+    )
+    parser.addoption(
+        "--crawl-checkpoint",
+        default="",
+        help="file from which the chain crawler resumes, and where it records "
+        "its progress; empty to always crawl the whole chain",
+    )
+    parser.addoption(
+        "--build-cache",
+        default=None,
+        help="build the ndau and keytool binaries at their conf.toml labels, "
+        "cached per commit in this directory, instead of using prebuilt ones",
+    )
+    parser.addoption(
+        "--build-fetch",
+        action="store_true",
+        default=False,
+        help="with --build-cache, fetch the repos before resolving their labels",
+    )
+
+
+def pytest_configure(config):
+    if config.getoption("--account-pool-size") < 1:
+        raise pytest.UsageError("--account-pool-size must be at least 1")
+    if config.getoption("--snapshot") != "none" and (
+        getattr(config.option, "numprocesses", None) or xproc.parallel()
+    ):
+        raise pytest.UsageError(
+            "--snapshot stops the localnet; it can't run in parallel"
+        )
+    # (title, lines) pairs which fixtures want printed at the end of the run
+    config.ndau_summaries = []
+    # timings of every ndau and keytool subcommand run
+    config.ndau_cmd_stats = CommandStats()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    stats = session.config.ndau_cmd_stats
+    path = session.config.getoption("--cmd-stats")
+    if stats and path:
+        if xproc.parallel():
+            root, ext = os.path.splitext(path)
+            path = f"{root}-{xproc.worker_id()}{ext}"
+        stats.write(path)
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    for title, lines in config.ndau_summaries:
+        terminalreporter.write_sep("-", title)
+        for line in lines:
+            terminalreporter.write_line(line)
+    if config.ndau_cmd_stats:
+        terminalreporter.write_sep("-", "tool commands")
+        for line in config.ndau_cmd_stats.report():
+            terminalreporter.write_line(line)
 
 
 @pytest.fixture(scope="session")
@@ -51,8 +253,66 @@ def verbose(request):
 
 
 @pytest.fixture(scope="session")
-def ndauapi(localnet0_ip):
-    return f"http://{localnet0_ip}:{constants.LOCALNET0_NDAUAPI}"
+def standin(request):
+    return request.config.getoption("--standin")
+
+
+@pytest.fixture(scope="session")
+def ndauapi(localnet0_ip, standin):
+    if not standin:
+        yield f"http://{localnet0_ip}:{constants.LOCALNET0_NDAUAPI}"
+        return
+    server = StandinServer(Ledger()).start()
+    try:
+        yield server.url
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture(scope="session")
+def ndauapi_client(request, ndauapi, verbose):
+    """
+    Fixture providing a pooled HTTP session for ndauapi.
+
+    Request paths are relative to the ndauapi root, e.g.
+    `ndauapi_client.get("/block/current")`.
+    """
+    client = ApiClient(
+        ndauapi,
+        pool_size=request.config.getoption("--api-pool-size"),
+        retries=request.config.getoption("--api-retries"),
+        timeout=request.config.getoption("--api-timeout"),
+    )
+    try:
+        yield client
+    finally:
+        if verbose:
+            print("\nndauapi request latency:")
+            for route, summary in sorted(client.timing_summary().items()):
+                print(
+                    f"{route:>36}: n={summary['count']:<5} "
+                    f"p50 {summary['p50'] * 1000:8.2f} ms  "
+                    f"max {summary['max'] * 1000:8.2f} ms"
+                )
+        client.close()
+
+
+@pytest.fixture(scope="session")
+def chain_waiter(localnet0_ip, ndauapi_client):
+    """
+    Fixture providing a `ChainWaiter` for the localnet-0 node.
+
+    Use it instead of sleeping: `chain_waiter.wait_until(predicate, timeout)`
+    re-checks `predicate` as soon as each block is committed.
+    """
+    waiter = ChainWaiter(
+        f"http://{localnet0_ip}:{constants.LOCALNET0_RPC}", ndauapi_client
+    )
+    try:
+        yield waiter
+    finally:
+        waiter.close()
 
 
 @pytest.fixture(scope="session")
@@ -65,6 +325,58 @@ def localnet0_ip(request):
     return request.config.getoption("--ip")
 
 
+# Session fixtures whose chain state belongs in the snapshot
+SNAPSHOT_BOOTSTRAP = ("bootstrap", "node_rules_account")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def localnet_snapshot(request, localnet0_ip):
+    """
+    Start the session from a known, funded localnet state.
+
+    With `--snapshot`, the localnet is restored from the snapshot in
+    `--snapshot-dir` before anything else touches the chain. If there is no
+    snapshot yet, the RFE, SysVar and RecordPrice accounts are funded and one
+    is taken. Yields the `LocalnetSnapshot`, or `None` without `--snapshot`.
+    """
+    if request.config.getoption("--snapshot") == "none":
+        yield None
+        return
+    snapshot = LocalnetSnapshot(
+        request.config.getoption("--snapshot-dir"),
+        request.config.getoption("--localnet-bin"),
+        f"http://{localnet0_ip}:{constants.LOCALNET0_RPC}",
+        f"http://{localnet0_ip}:{constants.LOCALNET0_NDAUAPI}",
+    )
+    existed = snapshot.exists()
+    if existed:
+        snapshot.restore()
+    for name in SNAPSHOT_BOOTSTRAP:
+        request.getfixturevalue(name)
+    if not existed:
+        snapshot.take()
+    try:
+        yield snapshot
+    finally:
+        request.config.ndau_summaries.append(("localnet snapshot", snapshot.report()))
+
+
+@pytest.fixture(scope="module", autouse=True)
+def restore_localnet_per_module(request, localnet_snapshot):
+    """
+    With `--snapshot=module`, every module after the first starts from the snapshot.
+
+    Regime scheduling then keeps each module's tests together; see `schedule`.
+    """
+    if localnet_snapshot is None or request.config.getoption("--snapshot") != "module":
+        yield
+        return
+    if localnet_snapshot.dirty:
+        localnet_snapshot.restore()
+    yield
+    localnet_snapshot.dirty = True
+
+
 def pytest_collection_modifyitems(config, items):
     """Pytest func to adjust which tests are run."""
     if not config.getoption("--runslow"):
@@ -77,6 +389,34 @@ def pytest_collection_modifyitems(config, items):
         for item in items:
             if "meta" in item.keywords:
                 item.add_marker(skip_meta)
+    if not config.getoption("--runbench"):
+        skip_bench = pytest.mark.skip(reason="need --runbench option to run")
+        for item in items:
+            if "bench" in item.keywords:
+                item.add_marker(skip_bench)
+    if not config.getoption("--keep-order"):
+        schedule(items, by_module=config.getoption("--snapshot") == "module")
+
+
+@pytest.fixture(scope="session")
+def bench_record(request):
+    """
+    Fixture providing a function which saves a benchmark result.
+
+    `bench_record(name, data)` writes `data` as JSON to `<benchdir>/<name>.json`
+    and returns the path written.
+    """
+    benchdir = Path(request.config.getoption("--benchdir"))
+
+    def rf(name, data):
+        benchdir.mkdir(parents=True, exist_ok=True)
+        path = benchdir / f"{name}.json"
+        with open(path, "wt") as fp:
+            json.dump(data, fp, indent=2, sort_keys=True)
+        print(f"benchmark results: {path}")
+        return path
+
+    return rf
 
 
 @pytest.fixture(scope="session")
@@ -111,71 +451,116 @@ def findpath(name):
 
 
 @pytest.fixture(scope="session")
-def ndautool_path():
+def tool_binaries(request):
+    """
+    Paths of the ndau and keytool binaries built by --build-cache, or None.
+    """
+    cache_dir = request.config.getoption("--build-cache")
+    if cache_dir is None:
+        return None
+    cache = BuildCache(
+        load_repo_conf(), cache_dir, fetch=request.config.getoption("--build-fetch")
+    )
+    return xproc.run_once("tool-binaries", cache.binaries)
+
+
+@pytest.fixture(scope="session")
+def ndautool_path(standin, tool_binaries):
+    if standin:
+        pytest.skip("needs a chain, which --standin does not provide")
+    if tool_binaries is not None:
+        return Path(tool_binaries["ndau"])
     return findpath("ndau")
 
 
 @pytest.fixture(scope="session")
-def keytool_path():
+def keytool_path(standin, tool_binaries):
+    if standin:
+        pytest.skip("needs a chain, which --standin does not provide")
+    if tool_binaries is not None:
+        return Path(tool_binaries["keytool"])
     return findpath("keytool")
 
 
 @pytest.fixture(scope="session")
-def netconf(localnet0_ip):
+def netconf(localnet0_ip, standin):
+    if standin:
+        pytest.skip("needs a chain, which --standin does not provide")
     return {"address": localnet0_ip, "nodenet0_rpc": str(constants.LOCALNET0_RPC)}
 
 
-@pytest.fixture(scope="session")
-def ndau(ndautool_path, netconf, keeptemp):
+def use_private_conf(nd, prefix):
     """
-    Fixture providing a ndau function.
+    Point the ndau tool session `nd` at a private, compacted copy of its
+    configuration, without any accounts generated by earlier test runs.
+
+    Returns the private NDAUHOME directory and the original configuration path.
     """
+    conf_path = nd("conf-path")
+    home = tempfile.mkdtemp(prefix=prefix)
+    nd.env = dict(nd.env, NDAUHOME=home)
+    nd.forget()
+    private_conf_path = nd("conf-path")
+    os.makedirs(os.path.dirname(private_conf_path), exist_ok=True)
+    if os.path.exists(conf_path):
+        with open(conf_path, "rt") as conf_fp:
+            conf = toml.load(conf_fp)
+        with open(private_conf_path, "wt") as conf_fp:
+            toml.dump(compact(conf), conf_fp)
+    return home, conf_path
 
-    def nd(cmd, **kwargs):
-        try:
-            return subpv(f"{ndautool_path} {cmd}", env=ndenv(), **kwargs)
-        except subprocess.CalledProcessError as e:
-            print(e.stdout)
-            raise
 
-    # preserve existing config
-    conf_path = nd("conf-path")
-    conf_exists = os.path.exists(conf_path)
-    if conf_exists:
-        _, temp_conf_path = tempfile.mkstemp(prefix="ndautool_toml-")
-        shutil.copy2(conf_path, temp_conf_path)
-        print(f"temp ndautool.toml: {temp_conf_path}")
+@pytest.fixture(scope="session")
+def ndau(request, ndautool_path, netconf, keeptemp):
+    """
+    Fixture providing a ndau function.
+
+    The function is a `ToolSession`, so configuration-only queries such as
+    `conf-path` and `account addr` are only run once per session.
 
-    # configure
+    The session (or, when running in parallel, every worker) gets its own
+    compacted copy of the tool configuration, which is discarded afterwards
+    unless --keeptemp is set; the original is never modified, except by
+    --prune-conf. Transactions signed by the well-known chain accounts are
+    serialized across workers.
+    """
+    nd = ToolSession(
+        ndautool_path,
+        memoize=NDAU_MEMOIZE,
+        locks=NDAU_SIGNER_LOCKS,
+        stats=request.config.ndau_cmd_stats,
+    )
+    worker = xproc.worker_id()
+    home, conf_path = use_private_conf(
+        nd, f"ndauhome-{worker}-" if worker else "ndauhome-"
+    )
     nd(f"conf {netconf['address']}:{netconf['nodenet0_rpc']}")
 
     try:
         yield nd
     finally:
         if keeptemp:
-            print(temp_conf_path)
-        #    shutil.copy2(temp_conf_path, conf_path)
-        elif conf_exists:
-            # restore existing config
-            shutil.move(temp_conf_path, conf_path)
+            print(f"session NDAUHOME: {home}")
         else:
-            os.remove(conf_path)
+            shutil.rmtree(home)
+        if request.config.getoption("--prune-conf") and os.path.exists(conf_path):
+            archive, removed = xproc.run_once("prune-conf", lambda: prune(conf_path))
+            print(f"pruned {removed} generated accounts from {conf_path}")
+            print(f"previous configuration: {archive}")
 
 
 @pytest.fixture(scope="session")
-def keytool(keytool_path):
+def keytool(pytestconfig, keytool_path):
     """
-    Fixture providing a ndau function.
+    Fixture providing a keytool function.
     """
+    return ToolSession(keytool_path, stats=pytestconfig.ndau_cmd_stats)
 
-    def kt(cmd, **kwargs):
-        try:
-            return subpv(f"{keytool_path} {cmd}", env=ndenv(), **kwargs)
-        except subprocess.CalledProcessError as e:
-            print(e.stdout)
-            raise
 
-    return kt
+@pytest.fixture(scope="session")
+def account_registry(ndau):
+    """Index of the session's ndautool.toml accounts, by name and by address."""
+    return AccountRegistry(ndau("conf-path"))
 
 
 @pytest.fixture(scope="session")
@@ -206,56 +591,42 @@ def ndau_suppress_err(ndau):
 
 
 @pytest.fixture(scope="session")
-def rfe_to_rfe(ndau, ndautool_toml, verbose):
+def bootstrap(ndau, keytool, ndauapi_client, ndautool_toml, verbose):
     """
-    Ensure the RFE account has a non-zero balance
+    Ensure the RFE, SetSysvar and RecordPrice accounts have non-zero balances.
 
-    This has session scope, so it should only run once for a given test run
+    This has session scope, and runs only once per test run even with parallel
+    workers. Returns the ndautool.toml sections whose accounts were funded.
 
     Note: this depends on the RFE account having sufficient balance to perform
     RFE transactions at the beginning of the test session. If the test session
     opens with 0 RFE balance and non-zero tx fee, this fixture (and all tests
     which depend on it) will necessarily fail.
     """
-    rfe_acct = ndautool_toml["rfe"]["address"]
-    rfe_bal = json.loads(ndau(f"account query -a {rfe_acct}"))["balance"]
-    must_r2r = rfe_bal < 1e8  # 1 ndau
+
+    def fund():
+        return fund_special_accounts(ndau, keytool, ndauapi_client, ndautool_toml)
+
+    funded = xproc.run_once("bootstrap", fund)
     if verbose:
-        print("rfe address:", rfe_acct)
-        print("    balance:", rfe_bal)
-        print("   must_r2r:", must_r2r)
-    if must_r2r:
-        ndau(f"rfe 10 -a {rfe_acct}")
-        ndau("issue 10")
-    return must_r2r
+        print("funded special accounts:", funded or "none")
+    return funded
 
 
 @pytest.fixture(scope="session")
-def rfe_to_ssv(ndau, ndautool_toml, rfe_to_rfe):
-    """
-    Ensure the SSV account has a non-zero balance
-
-    This has session scope, so it should only run once for a given test run
-    """
-    ssv_acct = ndautool_toml["set_sysvar"]["address"]
-    ssv_bal = json.loads(ndau(f"account query -a {ssv_acct}"))["balance"]
-    if ssv_bal < 1e8:  # 1 ndau
-        ndau(f"rfe 10 -a {ssv_acct}")
-        ndau("issue 10")
+def rfe_to_rfe(bootstrap):
+    """Ensure the RFE account has a non-zero balance; see `bootstrap`."""
+    return "rfe" in bootstrap
 
 
 @pytest.fixture(scope="session")
-def rfe_to_rp(ndau, ndautool_toml, rfe_to_rfe):
-    """
-    Ensure the RecordPrice account has a non-zero balance
+def rfe_to_ssv(bootstrap):
+    """Ensure the SSV account has a non-zero balance; see `bootstrap`."""
 
-    This has session scope, so it should only run once for a given test run
-    """
-    rp_acct = ndautool_toml["record_price"]["address"]
-    rp_bal = json.loads(ndau(f"account query -a {rp_acct}"))["balance"]
-    if rp_bal < 1e8:  # 1 ndau
-        ndau(f"rfe 10 -a {rp_acct}")
-        ndau("issue 10")
+
+@pytest.fixture(scope="session")
+def rfe_to_rp(bootstrap):
+    """Ensure the RecordPrice account has a non-zero balance; see `bootstrap`."""
 
 
 @pytest.fixture(scope="session")
@@ -289,42 +660,95 @@ def set_up_account(ndau, rfe):
     return rf
 
 
-@pytest.fixture
-def zero_tx_fees(ndau, rfe_to_ssv):
-    yield from ensure_tx_fees(ndau, rfe_to_ssv, constants.ZERO_FEE_SCRIPT)
+@pytest.fixture(scope="session")
+def account_pool(
+    request, ndau, keytool, ndauapi_client, ndautool_toml, rfe_to_rfe, localnet_snapshot
+):
+    """
+    Session-wide pool of funded accounts with validation rules set.
+
+    `account_pool.take()` returns the name of a fresh account. Use it instead
+    of `set_up_account` whenever the test doesn't care about the name or the
+    exact fees paid while setting the account up.
+    """
+    pool = AccountPool(
+        ndau,
+        keytool,
+        ndauapi_client,
+        ndautool_toml,
+        batch_size=request.config.getoption("--account-pool-size"),
+    )
+    if localnet_snapshot is not None:
+        localnet_snapshot.on_restore(pool.discard)
+    try:
+        yield pool
+    finally:
+        request.config.ndau_summaries.append(("account pool", pool.report()))
+
+
+@pytest.fixture(scope="session")
+def regimes(request, ndau, localnet_snapshot):
+    """
+    Session-wide `RegimeManager` for the fee and SIB regime fixtures.
+
+    The fee script the chain started with is restored at the end of the session.
+    """
+    key = constants.TRANSACTION_FEE_SCRIPT_KEY
+
+    def original_fee_script():
+        return ndau.json(f"sysvar get {key}")[key]
+
+    manager = RegimeManager(ndau, xproc.run_once("fee-script", original_fee_script))
+    if localnet_snapshot is not None:
+        localnet_snapshot.on_restore(manager.forget)
+    try:
+        yield manager
+    finally:
+        with xproc.lock("tx-fees"):
+            manager.restore()
+        request.config.ndau_summaries.append(("fee and SIB regimes", manager.report()))
 
 
 @pytest.fixture
-def nonzero_tx_fees(ndau, rfe_to_ssv):
-    yield from ensure_tx_fees(ndau, rfe_to_ssv, constants.ONE_NAPU_FEE_SCRIPT)
+def zero_tx_fees(regimes, rfe_to_ssv):
+    # hold the fee script steady until the test is done with it
+    with xproc.lock("tx-fees"):
+        regimes.fees(constants.ZERO_FEE_SCRIPT)
+        yield
 
 
 @pytest.fixture
-def zero_sib(ndau, rfe_to_rp):
-    target_price = json.loads(ndau("sib"))["TargetPrice"]
-    ndau(f"record-price --nanocents {target_price}")
+def nonzero_tx_fees(regimes, rfe_to_ssv):
+    with xproc.lock("tx-fees"):
+        regimes.fees(constants.ONE_NAPU_FEE_SCRIPT)
+        yield
 
 
 @pytest.fixture
-def max_sib(ndau, rfe_to_rp):
-    ndau(f"record-price --nanocents 1")
-    # we can't validate any particular number for the outcome of SIB; we've
-    # already changed the SIB chaincode in a way which invalidated the previous
-    # check of its outcome. What we can do, at least, is ensure it is non-0 when
-    # the market price is the minimum legal value
+def zero_sib(regimes, rfe_to_rp):
+    # hold the price steady until the test is done with it
+    with xproc.lock("sib"):
+        regimes.sib("zero")
+        yield
+
 
-    # validate that we have some sib
-    sib = json.loads(ndau("sib"))["SIB"]
-    assert sib > 0
+@pytest.fixture
+def max_sib(regimes, rfe_to_rp):
+    with xproc.lock("sib"):
+        regimes.sib("max")
+        yield
 
 
 @pytest.fixture(scope="session")
 def node_rules_account(ndau, rfe):
-    address = json.loads(ndau(f"sysvar get NodeRulesAccountAddress"))[
-        "NodeRulesAccountAddress"
-    ][0]
-    data = json.loads(ndau(f"account query -a={address}"))
-    if data["stake_rules"] is None:
-        ndau(f"account set-stake-rules {address} {constants.ZERO_FEE_SCRIPT}")
-
-    return address
+
+    def set_stake_rules():
+        address = ndau.json(f"sysvar get NodeRulesAccountAddress")[
+            "NodeRulesAccountAddress"
+        ][0]
+        data = ndau.json(f"account query -a={address}")
+        if data["stake_rules"] is None:
+            ndau(f"account set-stake-rules {address} {constants.ZERO_FEE_SCRIPT}")
+        return address
+
+    return xproc.run_once("node_rules_account", set_stake_rules)
@@ -0,0 +1,90 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""
+Compare serial `git clone` of the conf.toml repos with `CheckoutManager`.
+
+Runs offline, against file:// remotes laid out like conf.toml: four
+sections, two of which share the commands repo.
+"""
+
+import os
+import time
+
+import pytest
+
+from src.util.checkout import CheckoutManager, git
+
+COMMITS = 50
+
+
+def make_remote(path, commits=COMMITS):
+    git("init", "--quiet", path)
+    for i in range(commits):
+        with open(os.path.join(path, f"file{i % 10}"), "a") as f:
+            f.write(f"{i}\n" * 1000)
+        git("-C", path, "add", "-A")
+        git(
+            "-C",
+            path,
+            "-c",
+            "user.name=bench",
+            "-c",
+            "user.email=bench@example.com",
+            "commit",
+            "--quiet",
+            "-m",
+            str(i),
+        )
+    return f"file://{path}"
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+@pytest.mark.bench
+def test_checkout_throughput(tmp_path, bench_record):
+    remotes = {
+        name: make_remote(str(tmp_path / "remotes" / name))
+        for name in ("chaos", "ndau", "commands")
+    }
+    conf = {
+        "chaos-go": ("chaos", "github.com/ndau/chaos"),
+        "chaostool": ("commands", "github.com/ndau/commands"),
+        "ndau-go": ("ndau", "github.com/ndau/ndau"),
+        "ndautool": ("commands", "github.com/ndau/commands"),
+    }
+    conf = {
+        name: {"repo": remotes[remote], "logical": logical, "label": "master"}
+        for name, (remote, logical) in conf.items()
+    }
+
+    def serial_clone():
+        # what src.util.repo does: one full clone per section
+        for i, section in enumerate(conf.values()):
+            git("clone", "--quiet", section["repo"], str(tmp_path / "clones" / str(i)))
+
+    manager = CheckoutManager(str(tmp_path / "cache"))
+    root = str(tmp_path / "gopath" / "src")
+    results = {
+        "serial-clone": timed(serial_clone),
+        "manager-cold": timed(lambda: manager.checkout(conf, root)),
+        "manager-warm": timed(lambda: manager.checkout(conf, root)),
+    }
+
+    print(f"checkout of {len(conf)} sections, {len(remotes)} remotes")
+    for name, seconds in results.items():
+        print(f"{name:>14}: {seconds * 1000:8.1f} ms")
+    bench_record("checkout", results)
+
+    # an up-to-date cache must beat cloning everything again
+    assert results["manager-warm"] < results["serial-clone"]
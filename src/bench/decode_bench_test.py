@@ -0,0 +1,96 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""
+Compare JSON decoding of representative ndauapi payloads.
+
+The payloads are fetched from a standin ndauapi whose ledger is sized like a
+long-lived localnet, so this runs offline. Each is decoded with the standard
+library, with `decode.loads` (orjson when installed) and, for arrays, element
+by element with `decode.iter_array`.
+"""
+
+import json
+import time
+
+import pytest
+
+from src.util import decode
+from src.util.api_client import ApiClient
+from src.util.standin import Ledger, StandinServer
+from src.util.stats import summarize
+
+ROUNDS = 20
+HISTORY = 20000
+# below this, timings are too noisy to compare decoders
+MIN_COMPARED_BYTES = 64 * 1024
+
+
+def timed(fn, rounds=ROUNDS):
+    latencies = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies)
+
+
+def chunked(data, size=decode.CHUNK_BYTES):
+    return (data[i : i + size] for i in range(0, len(data), size))
+
+
+@pytest.fixture(scope="module")
+def payloads():
+    ledger = Ledger(accounts=2, transfers=HISTORY)
+    for i in range(40):
+        ledger.sysvars[f"BenchSysvar{i}"] = [(1, "A" * 200)]
+    addr = next(iter(ledger.accounts))
+    server = StandinServer(ledger).start()
+    try:
+        client = ApiClient(server.url)
+        paths = {
+            "system-all": ("/system/all", None),
+            "block-range-100": ("/block/range/1/100", "block_metas"),
+            "account-history": (
+                f"/account/history/{addr}?limit={2 * HISTORY}",
+                "Items",
+            ),
+        }
+        yield {
+            name: (client.get(path).content, key) for name, (path, key) in paths.items()
+        }
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.bench
+def test_decode_payloads(payloads, bench_record):
+    results = {"backend": decode.BACKEND}
+    for name, (data, key) in payloads.items():
+        paths = {
+            "json": lambda: json.loads(data),
+            "decode": lambda: decode.loads(data),
+        }
+        if key is not None:
+            paths["stream"] = lambda: sum(
+                1 for _ in decode.iter_array(chunked(data), key)
+            )
+        results[name] = {"bytes": len(data)}
+        results[name].update({path: timed(fn) for path, fn in paths.items()})
+
+        print(f"{name}: {len(data) / 1024:.0f} KiB, backend {decode.BACKEND}")
+        for path in paths:
+            print(f"{path:>10}: p50 {results[name][path]['p50'] * 1000:8.2f} ms")
+
+        # with orjson, the decode layer must never be slower than the standard
+        # library; without it, both are the standard library
+        if decode.BACKEND == "orjson" and len(data) >= MIN_COMPARED_BYTES:
+            assert results[name]["decode"]["p50"] <= results[name]["json"]["p50"] * 1.1
+    bench_record("decode", results)
@@ -0,0 +1,75 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""
+Post large batches of generated accounts to /system/eai/rate.
+
+Each batch is checked in full against `eai.eai_rates`, the vectorized
+reference model, and the server's throughput is recorded per batch size.
+"""
+
+import time
+
+import pytest
+import requests
+
+from src.util.decode import decode_json
+from src.util.duration import SECOND, YEAR
+from src.util.eai import descriptor, eai_rates, lock_bonuses, np
+
+# requests codes aren't technically members of their containing objects
+# pylint: disable=no-member
+
+# share of generated accounts which are locked
+LOCKED = 0.5
+
+
+def generate(rng, count):
+    """
+    Return arrays of weighted average age, notice period and bonus for
+    `count` random accounts, in whole seconds as ndau tracks them.
+    """
+    waa = rng.integers(0, 2 * YEAR // SECOND, count) * SECOND
+    notice = rng.integers(0, 4 * YEAR // SECOND, count) * SECOND
+    notice[rng.random(count) >= LOCKED] = 0
+    return waa, notice, lock_bonuses(notice)
+
+
+@pytest.mark.bench
+@pytest.mark.skipif(np is None, reason="needs numpy")
+def test_eai_rate_batches(request, ndauapi_client, bench_record):
+    sizes = [int(n) for n in request.config.getoption("--eai-batches").split(",")]
+    rng = np.random.default_rng(request.config.getoption("--eai-seed"))
+    results = []
+    for size in sizes:
+        waa, notice, bonus = generate(rng, size)
+        body = [descriptor(f"a{i}", waa[i], notice[i], bonus[i]) for i in range(size)]
+        start = time.perf_counter()
+        resp = ndauapi_client.post("/system/eai/rate", json=body)
+        seconds = time.perf_counter() - start
+        assert resp.status_code == requests.codes.ok, resp.text[:1000]
+
+        got = decode_json(resp)
+        assert [r["address"] for r in got] == [d["address"] for d in body]
+        want = eai_rates(waa, notice, bonus)
+        wrong = np.flatnonzero(np.array([r["eairate"] for r in got]) != want)
+        assert not wrong.size, (
+            f"{wrong.size} of {size} rates differ from the model, e.g. "
+            f"{body[wrong[0]]}: got {got[wrong[0]]['eairate']}, want {want[wrong[0]]}"
+        )
+        results.append(
+            {
+                "accounts": size,
+                "seconds": seconds,
+                "accounts_per_second": size / seconds,
+            }
+        )
+        print(f"{size:>7} accounts: {seconds:7.3f} s  {size / seconds:10.0f} /s")
+
+    bench_record("eai-rate-batches", {"batches": results})
@@ -0,0 +1,72 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""Page through a deep account history and profile latency by offset."""
+
+import pytest
+
+from src.util.api_client import ApiClient
+from src.util.history import deepen, depth_profile, iter_history
+
+# how much slower than the first pages the deepest pages may get
+MAX_SLOWDOWN = 5
+
+
+@pytest.mark.bench
+def test_account_history_paging(
+    request, ndau, keytool, ndauapi, account_pool, account_registry, bench_record
+):
+    depth = request.config.getoption("--history-depth")
+    senders = request.config.getoption("--bench-accounts")
+    target = account_pool.take()
+    addr = account_registry.address(target)
+
+    # one connection per concurrent chain of submissions
+    client = ApiClient(ndauapi, pool_size=senders, retries=0)
+    before = sum(1 for _ in iter_history(client, addr))
+    added = deepen(
+        ndau,
+        keytool,
+        client,
+        account_pool,
+        account_registry,
+        target,
+        depth,
+        senders=senders,
+    )
+
+    pages = []
+    count = 0
+    last_height = 0
+    txhashes = set()
+    for item in iter_history(client, addr, pages=pages):
+        assert item["Height"] >= last_height, f"out of order at item {count}"
+        last_height = item["Height"]
+        txhashes.add(item["TxHash"])
+        count += 1
+    client.close()
+
+    assert count == before + added
+    assert len(txhashes) == count
+
+    profile = depth_profile(pages)
+    print(f"{count} history items in {len(pages)} pages")
+    for offset, seconds in profile:
+        print(f"offset {offset:>8}: p50 {seconds * 1000:8.2f} ms/page")
+    bench_record(
+        "account-history-paging",
+        {
+            "items": count,
+            "pages": [list(page) for page in pages],
+            "profile": profile,
+        },
+    )
+
+    # paging which gets linearly slower with depth would blow well past this
+    assert profile[-1][1] <= profile[0][1] * MAX_SLOWDOWN
@@ -0,0 +1,116 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""
+Load ndauapi at constant arrival rates, and find where it saturates.
+
+Unlike the closed-loop benchmarks, these send on a fixed schedule at each of
+the `--load-rates`, so queueing delay shows up in the latency histograms
+instead of silently lowering the rate. Each rate's txs are spread over
+enough pool accounts that no signer's in-order chain limits it; see
+`txmix.MAX_CHAIN`. That doesn't hold for the kinds in `txmix.SINGLE_CHAIN`,
+so no saturation point is reported for a mix including them.
+"""
+
+from contextlib import ExitStack
+
+import pytest
+
+from src.util import xproc
+from src.util.loadgen import open_loop, saturation
+from src.util.txmix import SINGLE_CHAIN, parse_mix, prepare
+
+
+def rates_of(request):
+    return [float(r) for r in request.config.getoption("--load-rates").split(",")]
+
+
+def report(reports, capped=()):
+    """
+    Print each rate's latencies and the saturation point, and return it.
+
+    With `capped` kinds in the load, whose txs go out one at a time, there is
+    no saturation point to report.
+    """
+    for r in reports:
+        line = f"{r['target_rate']:>7.0f} req/s target: {r['achieved_rate']:8.1f} req/s"
+        if r["latency"]["count"]:
+            percentiles = r["latency"]["percentiles"]
+            line += "".join(
+                f"  p{pct} {percentiles[str(pct)] * 1000:8.1f} ms"
+                for pct in (50, 99, 99.9)
+            )
+        print(f"{line}  errors {r['errors']}")
+    if capped:
+        print(f"saturation point: not measured, {', '.join(capped)} is sent in order")
+        return None
+    point = saturation(reports)
+    print(f"saturation point: {point} req/s")
+    return point
+
+
+@pytest.mark.bench
+def test_open_loop_queries(request, ndauapi, ndauapi_client, bench_record):
+    assert ndauapi_client.get("/block/current").status_code == 200
+    seconds = request.config.getoption("--load-seconds")
+    reports = []
+    for rate in rates_of(request):
+        queries = [("GET", "/block/current", None, None)] * int(rate * seconds)
+        reports.append(open_loop(ndauapi, queries, rate))
+
+    point = report(reports)
+    bench_record(
+        "open-loop-queries",
+        {"path": "/block/current", "saturation": point, "rates": reports},
+    )
+    assert all(r["latency"]["count"] > 0 for r in reports)
+
+
+@pytest.mark.bench
+def test_open_loop_txs(
+    request,
+    ndau,
+    keytool,
+    ndauapi,
+    ndauapi_client,
+    account_pool,
+    account_registry,
+    ndautool_toml,
+    bootstrap,
+    bench_record,
+):
+    mix = parse_mix(request.config.getoption("--load-mix"))
+    seconds = request.config.getoption("--load-seconds")
+    accounts = request.config.getoption("--bench-accounts")
+    reports = []
+    with ExitStack() as stack:
+        if "sysvar-set" in mix:
+            # other workers' `sysvar set`s would reuse our sequence numbers
+            stack.enter_context(xproc.lock("signer-set-sysvar"))
+        for rate in rates_of(request):
+            txs = prepare(
+                ndau,
+                keytool,
+                ndauapi_client,
+                account_pool,
+                account_registry,
+                ndautool_toml,
+                mix,
+                int(rate * seconds),
+                accounts=accounts,
+            )
+            reports.append(open_loop(ndauapi, txs, rate))
+
+    capped = [kind for kind in SINGLE_CHAIN if kind in mix]
+    point = report(reports, capped)
+    bench_record(
+        "open-loop-txs",
+        {"mix": mix, "saturation": point, "capped": capped, "rates": reports},
+    )
+    assert all(r["latency"]["count"] > 0 for r in reports)
@@ -0,0 +1,103 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""
+Sweep concurrent asyncio clients over the ndauapi read endpoints.
+
+Each endpoint gets its own scaling curve of throughput and latency
+percentiles per concurrency level, saved as `read-load-<endpoint>.json`
+together with the ndauapi version, for comparison between ndau builds.
+"""
+
+import pytest
+import requests
+
+from src.util.loadgen import sweep
+
+# requests codes aren't technically members of their containing objects
+# pylint: disable=no-member
+
+# name: (method, path, body); `{addr}` is replaced by a funded account
+ENDPOINTS = {
+    "account-accounts": ("POST", "/account/accounts", ["{addr}"]),
+    "account-history": ("GET", "/account/history/{addr}", None),
+    "block-current": ("GET", "/block/current", None),
+    "system-all": ("GET", "/system/all", None),
+    "node-health": ("GET", "/node/health", None),
+    "node-abci": ("GET", "/node/abci", None),
+    "node-consensus": ("GET", "/node/consensus", None),
+    "node-genesis": ("GET", "/node/genesis", None),
+    "node-net": ("GET", "/node/net", None),
+    "node-nodes": ("GET", "/node/nodes", None),
+}
+
+
+@pytest.fixture(scope="module")
+def load_address(ndauapi_client):
+    """The address of an account which a recent transaction credited."""
+    resp = ndauapi_client.get("/block/current")
+    height = resp.json()["block_meta"]["header"]["height"]
+    for h in range(height, max(0, height - 100), -1):
+        for txhash in ndauapi_client.get(f"/block/transactions/{h}").json() or ():
+            tx = ndauapi_client.get(f"/transaction/{txhash}").json()
+            addr = ((tx or {}).get("TxData") or {}).get("destination")
+            if addr:
+                return addr
+    pytest.skip("no recently credited account to load-test with")
+
+
+@pytest.fixture(scope="module")
+def ndau_build(ndauapi_client):
+    resp = ndauapi_client.get("/version")
+    return resp.json() if resp.status_code == requests.codes.ok else None
+
+
+@pytest.mark.bench
+@pytest.mark.parametrize("endpoint", ENDPOINTS)
+def test_read_scaling(
+    request, ndauapi, ndauapi_client, load_address, ndau_build, endpoint, bench_record
+):
+    method, path, body = ENDPOINTS[endpoint]
+    path = path.format(addr=load_address)
+    if body is not None:
+        body = [item.format(addr=load_address) for item in body]
+    # the endpoint must work before it's worth loading
+    assert ndauapi_client.request(method, path, json=body).status_code == 200
+
+    levels = [int(n) for n in request.config.getoption("--load-levels").split(",")]
+    curve = sweep(
+        ndauapi,
+        method,
+        path,
+        body,
+        levels=levels,
+        seconds=request.config.getoption("--load-seconds"),
+    )
+
+    print(f"{method} {path}")
+    for level in curve:
+        latency = level["latency"]
+        if level["requests"] == 0:
+            # no request completed, so there are no latencies to report
+            print(
+                f"{level['concurrency']:>4} clients: no responses"
+                f"  errors {level['errors']}"
+            )
+            continue
+        print(
+            f"{level['concurrency']:>4} clients: {level['throughput']:8.1f} req/s  "
+            f"p50 {latency['p50'] * 1000:7.1f} ms  p99 {latency['p99'] * 1000:7.1f} ms"
+            f"  errors {level['errors']}"
+        )
+    bench_record(
+        f"read-load-{endpoint}",
+        {"method": method, "path": path, "build": ndau_build, "levels": curve},
+    )
+
+    assert all(level["requests"] > 0 for level in curve)
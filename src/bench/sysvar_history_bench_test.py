@@ -0,0 +1,84 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""
+Grow a fake sysvar's history to thousands of entries, and time reading it
+back through `ndau sysvar history` and `/system/history` as it grows.
+"""
+
+import time
+
+import pytest
+
+from src.util.api_client import ApiClient
+from src.util.random_string import random_string
+from src.util.sysvar_history import fill, iter_history, value_of
+
+# SetSysvar txs submitted together
+WINDOW = 50
+# reading a history may take this long, plus this long per entry
+BUDGET_SECONDS = 1.0
+BUDGET_PER_ENTRY = 0.001
+
+
+def stages(total, count=4):
+    """History lengths to measure at: `total`, halved `count - 1` times."""
+    return sorted({max(1, total >> i) for i in range(count)})
+
+
+def entries(history):
+    return [(int(e["height"]), value_of(e)) for e in history]
+
+
+@pytest.mark.bench
+def test_sysvar_history_scale(
+    request, ndau, keytool, ndauapi, ndautool_toml, bootstrap, bench_record
+):
+    client = ApiClient(ndauapi, pool_size=WINDOW, retries=0)
+    name = random_string("history-sysvar")
+    values = []
+    rows = []
+    for length in stages(request.config.getoption("--sysvar-history")):
+        new = [f"v{i}" for i in range(len(values), length)]
+        start = time.perf_counter()
+        fill(ndau, keytool, client, ndautool_toml, name, new, window=WINDOW)
+        fill_seconds = time.perf_counter() - start
+        values += new
+
+        start = time.perf_counter()
+        tool = entries(ndau.stream_array(f"sysvar history {name}", "history"))
+        tool_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        api = entries(iter_history(client, name))
+        api_seconds = time.perf_counter() - start
+
+        assert tool == api
+        assert sorted(value for _, value in api) == sorted(values)
+        heights = [height for height, _ in api]
+        assert heights == sorted(heights)
+
+        rows.append(
+            {
+                "entries": length,
+                "fill_seconds": fill_seconds,
+                "tool_seconds": tool_seconds,
+                "api_seconds": api_seconds,
+            }
+        )
+        print(
+            f"{length:>7} entries: written in {fill_seconds:7.1f} s, "
+            f"read by tool in {tool_seconds:6.3f} s, by api in {api_seconds:6.3f} s"
+        )
+    client.close()
+    bench_record("sysvar-history-scale", {"window": WINDOW, "stages": rows})
+
+    for row in rows:
+        budget = BUDGET_SECONDS + BUDGET_PER_ENTRY * row["entries"]
+        assert row["tool_seconds"] <= budget, row
+        assert row["api_seconds"] <= budget, row
@@ -0,0 +1,56 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""Compare per-call latency of the ndau tool session against plain `subpv`."""
+
+import time
+
+import pytest
+
+from src.util.stats import summarize
+from src.util.subp import subpv, ndenv
+from src.util.tool import ToolSession, NDAU_MEMOIZE
+
+CALLS = 50
+# both paths are dominated by process startup, so only a gross slowdown fails
+MAX_RATIO = 1.5
+
+
+def timed(fn, cmd, calls=CALLS):
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn(cmd)
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies)
+
+
+@pytest.mark.bench
+@pytest.mark.parametrize("cmd", ["conf-path", "info"])
+def test_tool_session_latency(ndau, ndautool_path, bench_record, cmd):
+    env = ndenv()
+    paths = {
+        "subpv": lambda c: subpv(f"{ndautool_path} {c}", env=env),
+        "session": ToolSession(ndautool_path).run,
+        "session-memoized": ToolSession(ndautool_path, memoize=NDAU_MEMOIZE),
+    }
+    results = {name: timed(fn, cmd) for name, fn in paths.items()}
+
+    print(f"ndau {cmd}: {CALLS} calls per path")
+    for name, summary in results.items():
+        print(
+            f"{name:>18}: p50 {summary['p50'] * 1000:8.2f} ms  "
+            f"p95 {summary['p95'] * 1000:8.2f} ms"
+        )
+    ratio = results["session"]["p50"] / results["subpv"]["p50"]
+    print(f"session / subpv p50: {ratio:.2f}")
+    bench_record(f"tool-session-{cmd}", dict(results, session_ratio=ratio))
+
+    # skipping the shell must not make things grossly slower
+    assert ratio <= MAX_RATIO
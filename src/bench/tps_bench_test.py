@@ -0,0 +1,79 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""Measure transaction throughput and submit-to-commit latency."""
+
+from collections import Counter
+
+import pytest
+
+from src.util.api_client import ApiClient
+from src.util.presign import Presigner, accepted, account_sequences, submit_chains
+from src.util.stats import summarize
+
+
+@pytest.mark.bench
+def test_transfer_throughput(
+    request, ndau, keytool, ndauapi, account_pool, account_registry, bench_record
+):
+    txs = request.config.getoption("--bench-txs")
+    naccounts = min(request.config.getoption("--bench-accounts"), txs)
+    per_account = -(-txs // naccounts)
+
+    names = [account_pool.take() for _ in range(naccounts)]
+    addrs = [ndau(f"account addr {name}") for name in names]
+
+    # one connection per concurrent chain of submissions
+    client = ApiClient(ndauapi, pool_size=naccounts, retries=0)
+    sequences = account_sequences(client, addrs)
+
+    # each account sends 1 napu to the next one round the ring; everything is
+    # signed before the clock starts
+    presigner = Presigner(ndau, keytool)
+    chains = []
+    for i, name in enumerate(names):
+        dest = names[(i + 1) % naccounts]
+        template = ndau.json(f"-j transfer --napu=1 {name} {dest}")
+        first = sequences[addrs[i]] + 1
+        chains.append(
+            presigner.resequence(
+                "Transfer",
+                template,
+                account_registry.validation_keys(name),
+                range(first, first + per_account),
+            )
+        )
+
+    submissions, seconds = submit_chains(client, "Transfer", chains)
+    client.close()
+
+    ok = [s for s in submissions if accepted(s)]
+    rejected = Counter(str(s.status) for s in submissions if not accepted(s))
+    report = {
+        "txs": len(submissions),
+        "accounts": naccounts,
+        "seconds": seconds,
+        "tps": len(ok) / seconds,
+        "rejection_rate": 1 - len(ok) / len(submissions),
+        "rejections_by_status": dict(rejected),
+        "commit_latency": summarize([s.seconds for s in ok]) if ok else None,
+    }
+    print(
+        f"{report['txs']} transfers from {naccounts} accounts in {seconds:.2f}s: "
+        f"{report['tps']:.1f} tps, {report['rejection_rate']:.1%} rejected"
+    )
+    if ok:
+        latency = report["commit_latency"]
+        print(
+            f"submit to commit: p50 {latency['p50'] * 1000:.1f} ms  "
+            f"p95 {latency['p95'] * 1000:.1f} ms  p99 {latency['p99'] * 1000:.1f} ms"
+        )
+    bench_record("tps-transfer", report)
+
+    assert ok, f"every transfer was rejected: {submissions[0].body}"
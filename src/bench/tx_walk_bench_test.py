@@ -0,0 +1,50 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""
+Walk the whole tx index through `/transaction/before`, with and without type
+filters, and record how fast it pages as the chain grows.
+"""
+
+import pytest
+
+from src.util.txwalk import pages_per_second, walk
+
+# name: the tx types to walk through; none means all of them
+FILTERS = {
+    "all": (),
+    "transfer": ("Transfer",),
+    "set-validation": ("SetValidation",),
+    "lock-notify": ("Lock", "Notify"),
+}
+
+
+@pytest.mark.bench
+@pytest.mark.parametrize("name", FILTERS)
+def test_tx_index_walk(ndauapi_client, name, bench_record):
+    current = ndauapi_client.get("/block/current").json()
+    height = current["block_meta"]["header"]["height"]
+    report = walk(ndauapi_client, types=FILTERS[name])
+    assert report.problems == []
+
+    print(
+        f"{name}: {report.txs} txs in {report.pages} pages, {report.seconds:.2f} s, "
+        f"{pages_per_second(report):.1f} pages/s at height {height}"
+    )
+    bench_record(
+        f"tx-walk-{name}",
+        {
+            "types": FILTERS[name],
+            "height": height,
+            "txs": report.txs,
+            "pages": report.pages,
+            "seconds": report.seconds,
+            "pages_per_second": pages_per_second(report),
+        },
+    )
@@ -11,6 +11,8 @@
 Test that the fixtures we build work properly.
 """
 
+from pathlib import Path
+
 import pytest
 
 from src.util.subp import subpv
@@ -27,3 +29,72 @@ def test_ndau_node_connection(ndau):
     # "version remote" ensures we connect properly not just to TM but also to the
     # remote node via its query ABCI cmd
     ndau("-v version remote")
+
+
+# stands in for the localnet snapshot and the fee regime, and logs what runs
+SNAPSHOT_CONFTEST = """
+import os
+
+import pytest
+
+LOG = os.path.join(os.path.dirname(__file__), "log")
+
+
+def log(line):
+    with open(LOG, "a") as f:
+        f.write(line + "\\n")
+
+
+class FakeSnapshot:
+    dirty = False
+
+    def restore(self):
+        log("restore")
+        self.dirty = False
+
+
+@pytest.fixture(scope="session")
+def localnet_snapshot(request):
+    if request.config.getoption("--snapshot") == "none":
+        return None
+    return FakeSnapshot()
+
+
+@pytest.fixture
+def zero_tx_fees():
+    pass
+
+
+@pytest.fixture
+def record(request):
+    log(request.node.name)
+"""
+
+
+@pytest.mark.meta
+@pytest.mark.parametrize(
+    "snapshot,want",
+    [
+        # regime tests are moved to the end of the run
+        ("none", ["test_a1", "test_b1", "test_a2"]),
+        # but only to the end of their module when each starts from a snapshot
+        ("module", ["test_a1", "test_a2", "restore", "test_b1"]),
+    ],
+)
+def test_snapshot_modules_run_as_one_block(pytester, monkeypatch, snapshot, want):
+    root = Path(__file__).resolve().parents[1]
+    monkeypatch.setenv("PYTHONPATH", str(root))
+    pytester.makeconftest((root / "conftest.py").read_text())
+    tests = pytester.mkpydir("tests")
+    (tests / "conftest.py").write_text(SNAPSHOT_CONFTEST)
+    (tests / "a_test.py").write_text(
+        "def test_a1(record):\n    pass\n\n\n"
+        "def test_a2(zero_tx_fees, record):\n    pass\n"
+    )
+    (tests / "b_test.py").write_text("def test_b1(record):\n    pass\n")
+
+    result = pytester.runpytest_subprocess(
+        f"--snapshot={snapshot}", "--cmd-stats=", "-p", "no:cacheprovider"
+    )
+    result.assert_outcomes(passed=3)
+    assert (tests / "log").read_text().split() == want
@@ -12,55 +12,63 @@
 import base64
 import json
 import os
+import pytest
 import tarfile
 import tempfile
 import toml
 from pathlib import Path
-from src.util import constants
+from src.util import constants, xproc
+from src.util.accounts import BalanceSnapshot
 from src.util.random_string import random_string
 from src.util.subp import subpv
-from time import sleep
 
 
 def test_get_ndau_status(ndau):
     """`ndautool` can connect to `ndau node` and get status."""
-    info = json.loads(ndau("info"))
+    info = ndau.json("info")
     moniker = info["node_info"]["moniker"]
     assert moniker == constants.LOCALNET0_MONIKER
     print("conf-path")
 
 
-def test_create_account(ndau, rfe, zero_tx_fees):
+def test_create_account(ndau, account_registry, rfe, zero_tx_fees):
     """Create account, RFE to it, and check attributes"""
     _random_string = random_string("generic")
-    known_ids = ndau("account list").splitlines()
     # make sure account does not already exist
-    assert not any(_random_string in id_line for id_line in known_ids)
+    assert _random_string not in account_registry
     # create new randomly named account
     ndau(f"account new {_random_string}")
-    new_ids = ndau("account list").splitlines()
-    # check that account now exists
-    assert any(_random_string in id_line for id_line in new_ids)
-    id_line = [s for s in new_ids if _random_string in s]
+    assert _random_string in account_registry
+    # check that the tool lists the account
+    id_line = next(
+        (line for line in ndau.stream("account list") if _random_string in line), None
+    )
+    assert id_line is not None
     # check that account has no validation keys
-    assert "(0 tr keys)" in id_line[0]
-    account_data = json.loads(ndau(f"account query {_random_string}"))
+    assert "(0 tr keys)" in id_line
+    account_data = ndau.json(f"account query {_random_string}")
     assert account_data["validationKeys"] is None
     # RFE to account 10 ndau
     orig_ndau = 10
     orig_napu = 10 * 1e8
     rfe(orig_ndau, _random_string)
-    account_data = json.loads(ndau(f"account query {_random_string}"))
+    account_data = ndau.json(f"account query {_random_string}")
     # check that account balance is 10 ndau
     assert account_data["balance"] == orig_napu
     # set validation, and check that account now has validation keys
     ndau(f"account set-validation {_random_string}")
-    account_data = json.loads(ndau(f"account query {_random_string}"))
+    account_data = ndau.json(f"account query {_random_string}")
     assert account_data["validationKeys"] is not None
 
 
 def test_genesis(
-    ndau, rfe, ndau_suppress_err, netconf, zero_tx_fees, node_rules_account
+    ndau,
+    ndauapi_client,
+    rfe,
+    ndau_suppress_err,
+    netconf,
+    zero_tx_fees,
+    node_rules_account,
 ):
     # Set up a purchaser account.  We don't have to rfe to it to pay for
     # 0-napu set-validation tx fee.
@@ -105,7 +113,7 @@ def test_genesis(
     node_addr = ndau(f"account addr {node_account}")
 
     # ensure the delegation succeeded
-    purchaser_acct_data = json.loads(ndau(f"account query {purchaser_account}"))
+    purchaser_acct_data = ndau.json(f"account query {purchaser_account}")
     assert purchaser_acct_data["delegationNode"] == node_addr
 
     # We want to ensure that every account which is supposed to get a cut of EAI
@@ -115,39 +123,31 @@ def test_genesis(
     # - All accounts delegated to the node account
     # - _Not_ the node account itself
 
-    eai_fee_table = json.loads(ndau(f"sysvar get {constants.EAI_FEE_TABLE_KEY}"))[
+    eai_fee_table = ndau.json(f"sysvar get {constants.EAI_FEE_TABLE_KEY}")[
         constants.EAI_FEE_TABLE_KEY
     ]
 
-    # start acct_balances from the fee table
-    acct_balances = {
-        addr: json.loads(ndau(f"account query -a {addr}"))["balance"]
-        for fee in eai_fee_table
-        if fee["To"] is not None
-        for addr in fee["To"]
-    }
-    # add the purchaser_account as a proxy for every accoutn delegated to this node
-    acct_balances[ndau(f"account addr {purchaser_account}")] = purchaser_acct_data[
-        "balance"
+    # start from the fee table
+    credited_addrs = [
+        addr for fee in eai_fee_table if fee["To"] is not None for addr in fee["To"]
     ]
-    node_past_balance = json.loads(ndau(f"account query {node_account}"))["balance"]
+    # add the purchaser_account as a proxy for every account delegated to this node
+    credited_addrs.append(ndau(f"account addr {purchaser_account}"))
+    snapshot = BalanceSnapshot(ndauapi_client, credited_addrs + [node_addr])
 
     # Submit CreditEAI tx so that bpc operations can have ndau to
     # pay for changing sysvars.
     ndau(f"account credit-eai {node_account}")
 
-    for addr, past_balance in acct_balances.items():
-        current_balance = json.loads(ndau(f"account query -a {addr}"))["balance"]
+    gains = snapshot.diff()
+    for addr in credited_addrs:
         # it is outside the scope of this test to compute _how much_ EAI each account
         # should have earned; that's the province of EAI unit tests. We just want to
         # ensure that they all got credited.
-        assert current_balance > past_balance
+        assert gains[addr] > 0, addr
 
     # ensure the node didn't yet receive any EAI
-    assert (
-        node_past_balance
-        == json.loads(ndau(f"account query {node_account}"))["balance"]
-    )
+    assert gains[node_addr] == 0
 
     # Now  attempt to test NNR
     #
@@ -179,9 +179,7 @@ def test_genesis(
         if reward_result.startswith("winner was"):
             winner = reward_result.split()[2]
             if winner == node_addr:
-                reward_balance = json.loads(ndau(f"account query {reward_account}"))[
-                    "balance"
-                ]
+                reward_balance = ndau.json(f"account query {reward_account}")["balance"]
                 # this works because this is an otherwise brand-new account,
                 # which has never received any other rewards or transfers
                 assert reward_balance > 0
@@ -201,13 +199,13 @@ def test_transfer(ndau, nonzero_tx_fees, set_up_account, zero_sib):
     xfer_napu = int(xfer_ndau * 1e8)
 
     # One napu for the set-validation transaction.
-    account_data1 = json.loads(ndau(f"account query {account1}"))
+    account_data1 = ndau.json(f"account query {account1}")
     assert account_data1["balance"] == orig_napu - constants.ONE_NAPU_FEE
 
     # Transfer
     ndau(f"transfer {xfer_ndau} {account1} {account2}")
-    account_data1 = json.loads(ndau(f"account query {account1}"))
-    account_data2 = json.loads(ndau(f"account query {account2}"))
+    account_data1 = ndau.json(f"account query {account1}")
+    account_data2 = ndau.json(f"account query {account2}")
     # Subtract one napu for the set-validation transaction, one for the transfer.
     assert (
         account_data1["balance"] == orig_napu - xfer_napu - 2 * constants.ONE_NAPU_FEE
@@ -235,14 +233,14 @@ def test_transfer_lock(ndau, nonzero_tx_fees, set_up_account, zero_sib):
     xfer_napu = int(xfer_ndau * 1e8)
 
     # One napu for the set-validation transaction.
-    account_data1 = json.loads(ndau(f"account query {account1}"))
+    account_data1 = ndau.json(f"account query {account1}")
     assert account_data1["balance"] == orig_napu - constants.ONE_NAPU_FEE
 
     # TransferLock
     lock_months = 3
     ndau(f"transfer-lock {xfer_ndau} {account1} {account2} {lock_months}m")
-    account_data1 = json.loads(ndau(f"account query {account1}"))
-    account_data2 = json.loads(ndau(f"account query {account2}"))
+    account_data1 = ndau.json(f"account query {account1}")
+    account_data2 = ndau.json(f"account query {account2}")
     # Subtract one napu for the set-validation transaction, one for the transfer-lock.
     assert (
         account_data1["balance"] == orig_napu - xfer_napu - 2 * constants.ONE_NAPU_FEE
@@ -268,13 +266,13 @@ def test_transfer_with_sib(ndau, nonzero_tx_fees, set_up_account, max_sib):
     xfer_napu = int(xfer_ndau * 1e8)
 
     # One napu for the set-validation transaction.
-    account_data1 = json.loads(ndau(f"account query {account1}"))
+    account_data1 = ndau.json(f"account query {account1}")
     assert account_data1["balance"] == orig_napu - constants.ONE_NAPU_FEE
 
     # Transfer
     ndau(f"transfer {xfer_ndau} {account1} {account2}")
-    account_data1 = json.loads(ndau(f"account query {account1}"))
-    account_data2 = json.loads(ndau(f"account query {account2}"))
+    account_data1 = ndau.json(f"account query {account1}")
+    account_data2 = ndau.json(f"account query {account2}")
     # Subtract one napu for the set-validation transaction, one for the transfer.
     assert account_data1["balance"] == orig_napu - xfer_napu - 2 * constants.ONE_NAPU_FEE
     assert account_data1["lock"] is None
@@ -283,28 +281,27 @@ def test_transfer_with_sib(ndau, nonzero_tx_fees, set_up_account, max_sib):
     assert account_data2["lock"] is None
 
 
-def test_lock_notify(ndau, set_up_account):
+def test_lock_notify(ndau, account_pool):
     """Test Lock and Notify transactions"""
 
     # Set up account to lock.
-    account = random_string("lock-notify")
-    set_up_account(account)
+    account = account_pool.take()
 
     # Lock
     lock_months = 3
     ndau(f"account lock {account} {lock_months}m")
-    account_data = json.loads(ndau(f"account query {account}"))
+    account_data = ndau.json(f"account query {account}")
     assert account_data["lock"] is not None
     assert account_data["lock"]["unlocksOn"] is None
 
     # Notify
     ndau(f"account notify {account}")
-    account_data = json.loads(ndau(f"account query {account}"))
+    account_data = ndau.json(f"account query {account}")
     assert account_data["lock"] is not None
     assert account_data["lock"]["unlocksOn"] is not None
 
 
-def test_change_settlement_period(ndau, set_up_account):
+def test_change_settlement_period(ndau, account_pool):
     """Test ChangeSettlementPeriod transaction"""
 
     # Pick something that we wouldn't ever use as a default.  That way, we can
@@ -314,9 +311,8 @@ def test_change_settlement_period(ndau, set_up_account):
     new_period = "2m3dt5h7m11s"
 
     # Set up a new account, which will have the default settlement period.
-    account = random_string("settlement-period")
-    set_up_account(account)
-    account_data = json.loads(ndau(f"account query {account}"))
+    account = account_pool.take()
+    account_data = ndau.json(f"account query {account}")
     assert account_data["recourseSettings"] is not None
     old_period = account_data["recourseSettings"]["period"]
     assert old_period is not None
@@ -326,19 +322,18 @@ def test_change_settlement_period(ndau, set_up_account):
 
     # ChangeSettlementPeriod
     ndau(f"account change-recourse-period {account} {new_period}")
-    account_data = json.loads(ndau(f"account query {account}"))
+    account_data = ndau.json(f"account query {account}")
     assert account_data["recourseSettings"] is not None
     assert account_data["recourseSettings"]["period"] == old_period
     assert account_data["recourseSettings"]["next"] == new_period
 
 
-def test_change_validation(ndau, set_up_account):
+def test_change_validation(ndau, account_pool):
     """Test ChangeValidation transaction"""
 
     # Set up an account.
-    account = random_string("change-validation")
-    set_up_account(account)
-    account_data = json.loads(ndau(f"account query {account}"))
+    account = account_pool.take()
+    account_data = ndau.json(f"account query {account}")
     assert account_data["validationKeys"] is not None
     assert len(account_data["validationKeys"]) == 1
     key1 = account_data["validationKeys"][0]
@@ -346,7 +341,7 @@ def test_change_validation(ndau, set_up_account):
 
     # Add
     ndau(f"account validation {account} add")
-    account_data = json.loads(ndau(f"account query {account}"))
+    account_data = ndau.json(f"account query {account}")
     assert account_data["validationKeys"] is not None
     assert len(account_data["validationKeys"]) == 2
     assert account_data["validationKeys"][0] == key1
@@ -355,7 +350,7 @@ def test_change_validation(ndau, set_up_account):
 
     # Reset
     ndau(f"account validation {account} reset")
-    account_data = json.loads(ndau(f"account query {account}"))
+    account_data = ndau.json(f"account query {account}")
     assert account_data["validationKeys"] is not None
     assert len(account_data["validationKeys"]) == 1
     assert account_data["validationKeys"][0] != key1
@@ -363,7 +358,7 @@ def test_change_validation(ndau, set_up_account):
 
     # SetScript
     ndau(f"account validation {account} set-script oAAgiA")
-    account_data = json.loads(ndau(f"account query {account}"))
+    account_data = ndau.json(f"account query {account}")
     assert account_data["validationScript"] == "oAAgiA=="
 
 
@@ -404,7 +399,7 @@ def get_pvk():
 
 
 def test_command_validator_change(
-    ndau, ndau_suppress_err, keytool, set_up_account, node_rules_account
+    ndau, ndau_suppress_err, keytool, set_up_account, node_rules_account, chain_waiter
 ):
     """Test CommandValidatorChange transaction"""
 
@@ -418,7 +413,7 @@ def test_command_validator_change(
     pvk = get_pvk()
 
     # Get info about the connected validator
-    info = json.loads(ndau("info"))
+    info = ndau.json("info")
     assert info["validator_info"] is not None
     assert info["validator_info"]["address"] == pvk["address"]
 
@@ -471,7 +466,7 @@ def test_command_validator_change(
                 "private": "npvtayjadtcbiahcbm8k5ik5piz5n86itab9ffx7qf244ayhnaqwz5fw3c4aj3zmqsy7wekya36fg72jm267sf6m3pdevncr27dd5ter8ye8spxyh349uxz8s684",  # noqa: E501 this one either
             }
         ]
-        acct_data = json.loads(ndau("account query -a=" + ln0["address"]))
+        acct_data = ndau.json("account query -a=" + ln0["address"])
         pubkeys = [t["public"] for t in ln0["validation"]]
 
         valkeys = acct_data.get("validationKeys", [])
@@ -537,30 +532,28 @@ def test_command_validator_change(
     # CVC
     ndau(f"cvc {ln0['name']} {new_power}")
 
-    # Make up to 10 attempts for the change in power to propagate.
-    new_voting_power_was_set = False
-    for _ in range(10):
-        info = json.loads(ndau("info"))
+    # Give the change in power up to 10 seconds to propagate. This reads the
+    # node's status over RPC rather than starting `ndau info` on every check.
+    def new_voting_power_was_set():
+        info = chain_waiter.status()
         assert info["validator_info"] is not None
-        voting_power = info["validator_info"]["voting_power"]
+        voting_power = int(info["validator_info"]["voting_power"])
         if voting_power == new_power:
-            new_voting_power_was_set = True
-            break
+            return True
         assert voting_power == old_power
-        sleep(1)
-    assert new_voting_power_was_set
+        return False
 
+    chain_waiter.wait_until(new_voting_power_was_set, timeout=10, what="cvc")
 
-def test_create_child_account(ndau, set_up_account):
+
+def test_create_child_account(ndau, account_pool):
     """Test CreateChildAccount transaction"""
 
     # Set up parent account.
-    parent_account = random_string("create-parent")
-    set_up_account(parent_account)
+    parent_account = account_pool.take()
 
     # Set up delegation account
-    delegation_account = random_string("child-delegate")
-    set_up_account(delegation_account)
+    delegation_account = account_pool.take()
 
     # Declare a child account and create it.
     child_account = random_string("create-child")
@@ -571,7 +564,7 @@ def test_create_child_account(ndau, set_up_account):
     )
 
     # Ensure the child account was created properly.
-    account_data = json.loads(ndau(f"account query {child_account}"))
+    account_data = ndau.json(f"account query {child_account}")
     assert account_data["validationKeys"] is not None
     assert len(account_data["validationKeys"]) == 1
     parent_address = account_data["parent"]
@@ -580,7 +573,7 @@ def test_create_child_account(ndau, set_up_account):
     assert account_data["recourseSettings"]["period"] == settlement_period
 
     # See that the parent/progenitor address matches that of the parent account.
-    account_data = json.loads(ndau(f"account query -a {parent_address}"))
+    account_data = ndau.json(f"account query -a {parent_address}")
     # This just proves that we get back non-degenerate account data, proving
     # the parent exists.
     assert len(account_data["validationKeys"]) > 0
@@ -612,33 +605,42 @@ def test_change_sysvar(ndau, rfe_to_ssv):
     ndau("info")
 
 
+# test_transfer_with_sib_exch_dest depends on the elephant account set up here,
+# so in parallel mode (--dist loadgroup) both must run on the same worker.
+@pytest.mark.xdist_group("elephant")
 def test_account_attributes(ndau, ndau_suppress_err, set_up_account, rfe_to_ssv):
     """Test setting AccountAttributes system variable"""
-    # Clear the account_attributes if there are any, so we can use the
-    # elephant account below.
-    account_attributes = "{}"
-    ndau(
-        f"sysvar set {constants.ACCOUNT_ATTRIBUTES_KEY} "
-        f"--json '{account_attributes}'"
-    )
+    with xproc.lock("account-attributes"):
+        # Clear the account_attributes if there are any, so we can use the
+        # elephant account below.
+        account_attributes = "{}"
+        ndau(
+            f"sysvar set {constants.ACCOUNT_ATTRIBUTES_KEY} "
+            f"--json '{account_attributes}'"
+        )
 
-    # Set up the elephant account as an exchange account.
-    account = "elephant-test"
-    set_up_account(account, " ".join(["elephant"] * 12))
+        # Set up the elephant account as an exchange account.
+        account = "elephant-test"
+        set_up_account(account, " ".join(["elephant"] * 12))
 
-    # Make it an exchange account.
-    account_attributes = '{"ndaegwggj8qv7tqccvz6ffrthkbnmencp9t2y4mn89gdq3yk":{"x":{}}}'
-    ndau(
-        f"sysvar set {constants.ACCOUNT_ATTRIBUTES_KEY} "
-        f"--json '{account_attributes}'"
-    )
+        # Make it an exchange account.
+        account_attributes = (
+            '{"ndaegwggj8qv7tqccvz6ffrthkbnmencp9t2y4mn89gdq3yk":{"x":{}}}'
+        )
+        ndau(
+            f"sysvar set {constants.ACCOUNT_ATTRIBUTES_KEY} "
+            f"--json '{account_attributes}'"
+        )
 
-    # One of the rules of exchange accounts is that you cannot lock them.
-    # Testing this means we've verified that the AccountAttributes in svi is
-    # set up properly.
-    assert "InvalidTransaction" in ndau_suppress_err("account lock elephant-test 2d")
+        # One of the rules of exchange accounts is that you cannot lock them.
+        # Testing this means we've verified that the AccountAttributes in svi is
+        # set up properly.
+        assert "InvalidTransaction" in ndau_suppress_err(
+            "account lock elephant-test 2d"
+        )
 
 
+@pytest.mark.xdist_group("elephant")
 def test_transfer_with_sib_exch_dest(ndau, nonzero_tx_fees, set_up_account, max_sib):
     """Test Transfer transaction"""
     # Set up accounts to transfer between.
@@ -651,13 +653,13 @@ def test_transfer_with_sib_exch_dest(ndau, nonzero_tx_fees, set_up_account, max_
     xfer_napu = int(xfer_ndau * 1e8)
 
     # One napu for the set-validation transaction.
-    account_data1 = json.loads(ndau(f"account query {account1}"))
+    account_data1 = ndau.json(f"account query {account1}")
     assert account_data1["balance"] == orig_napu - constants.ONE_NAPU_FEE
 
     # Transfer
     ndau(f"transfer {xfer_ndau} {account1} elephant-test")
-    account_data1 = json.loads(ndau(f"account query {account1}"))
-    account_data2 = json.loads(ndau(f"account query elephant-test"))
+    account_data1 = ndau.json(f"account query {account1}")
+    account_data2 = ndau.json(f"account query elephant-test")
     # Subtract one napu for the set-validation transaction, one for the transfer.
     assert account_data1["balance"] < orig_napu - xfer_napu - 2 * constants.ONE_NAPU_FEE
     assert account_data1["lock"] is None
@@ -681,9 +683,8 @@ def test_sysvar_history(ndau):
         ndau(f"sysvar set {fake_sv_name} {val}")
 
     # get history
-    sv_json = ndau(f"sysvar history {fake_sv_name}")
-    print(sv_json)
-    sv_data = json.loads(sv_json)["history"]
+    sv_data = list(ndau.stream_array(f"sysvar history {fake_sv_name}", "history"))
+    print(sv_data)
     last_height = 0
     for i in range(len(data)):
         sv_data_i = sv_data[i]
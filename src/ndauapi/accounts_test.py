@@ -12,21 +12,16 @@ from urllib.parse import parse_qs, urlparse
 import pytest
 import requests
 
-from src.util.random_string import random_string
+from src.util.history import iter_history
 
 # requests codes aren't technically members of their containing objects
 # pylint: disable=no-member
 
 
 @pytest.fixture(scope="session")
-def accounts_with_history(ndau, set_up_account):
+def accounts_with_history(ndau, account_pool):
     # set up some accounts with some history
-    names = []
-    for _ in range(3):
-        name = random_string("test-acct")
-        names.append(name)
-        # use "set_up_account" instead of new, rfe, set-validation
-        set_up_account(name)
+    names = [account_pool.take() for _ in range(3)]
     for _ in range(5):
         for source in names:
             for dest in names:
@@ -45,8 +40,8 @@ def accounts_with_history(ndau, set_up_account):
         ({"addresses": ["asdf"]}, requests.codes.bad),
     ],
 )
-def test_handle_accounts(ndauapi, input, expect_code):
-    resp = requests.post(f"{ndauapi}/account/accounts", json=input)
+def test_handle_accounts(ndauapi_client, input, expect_code):
+    resp = ndauapi_client.post("/account/accounts", json=input)
     assert resp.status_code == expect_code
 
 
@@ -69,7 +64,13 @@ def test_handle_accounts(ndauapi, input, expect_code):
     ],
 )
 def test_account_history(
-    ndau, ndauapi, accounts_with_history, valid_addr, params, want_status, want_body
+    ndau,
+    ndauapi_client,
+    accounts_with_history,
+    valid_addr,
+    params,
+    want_status,
+    want_body,
 ):
     name = accounts_with_history[0]
 
@@ -80,14 +81,14 @@ def test_account_history(
         addr = "invalid"
     else:
         addr = ndau(f"account addr {name}")
-    url = f"{ndauapi}/account/history/{addr}"
+    path = f"/account/history/{addr}"
 
     # craft the request based on other test params
     if params is None:
         params = {}
 
     # send request, perform tests
-    response = requests.get(url, params=params)
+    response = ndauapi_client.get(path, params=params)
     assert response.status_code == want_status
     assert len(response.text) > 0
     if want_body is not None:
@@ -113,3 +114,18 @@ def test_account_history(
             # Next item may or may not appear, but must be empty
             nxt = respj.get("Next", "")
             assert nxt == ""
+
+
+@pytest.mark.api
+def test_account_history_pages(ndau, ndauapi_client, accounts_with_history):
+    addr = ndau(f"account addr {accounts_with_history[0]}")
+    whole = list(iter_history(ndauapi_client, addr))
+    pages = []
+    paged = list(iter_history(ndauapi_client, addr, limit=3, pages=pages))
+    assert paged == whole
+    # a full last page may be followed by one empty page
+    n = -(-len(whole) // 3)
+    assert len(pages) in (n, n + 1)
+    assert all(page.items == 3 for page in pages[: n - 1])
+    heights = [item["Height"] for item in paged]
+    assert heights == sorted(heights)
@@ -9,18 +9,24 @@
 
 import pytest
 import requests
+from src.util.crawler import blocks_per_second, crawl
 from src.util.random_string import random_string
 
 # requests codes aren't technically members of their containing objects
 # pylint: disable=no-member
 
+# blocks test_crawl_resumes crawls, at most
+CRAWL_RESUME_BLOCKS = 40
+
 
 @pytest.fixture(scope="module")
-def current_block(set_up_account, ndauapi):
-    # the hash doesn't get recorded unless there is a tx in it.
-    # simplest way to accomplish that is to set up a random account real quick.
-    set_up_account(random_string("create-block-for-hash"))
-    resp = requests.get(f"{ndauapi}/block/current")
+def current_block(request, standin, ndauapi_client):
+    if not standin:
+        # the hash doesn't get recorded unless there is a tx in it.
+        # simplest way to accomplish that is to set up a random account real quick.
+        set_up_account = request.getfixturevalue("set_up_account")
+        set_up_account(random_string("create-block-for-hash"))
+    resp = ndauapi_client.get("/block/current")
     if resp.status_code != requests.codes.ok:
         pytest.skip(f"failed to get current block data")
     return resp.json()
@@ -55,14 +61,14 @@ def min_height(current_height):
         ("high", requests.codes.bad),
     ],
 )
-def test_block_height(ndauapi, height, want_code):
-    resp = requests.get(f"{ndauapi}/block/height/{height}")
+def test_block_height(ndauapi_client, height, want_code):
+    resp = ndauapi_client.get(f"/block/height/{height}")
     assert resp.status_code == want_code
 
 
 @pytest.mark.api
-def test_block_current_height(ndauapi):
-    resp = requests.get(f"{ndauapi}/block/current")
+def test_block_current_height(ndauapi_client):
+    resp = ndauapi_client.get("/block/current")
     assert resp.status_code == requests.codes.ok
 
 
@@ -79,11 +85,18 @@ def test_block_current_height(ndauapi):
         (1, 2, requests.codes.ok),
     ],
 )
-def test_block_range(ndauapi, min_height, start, end, want_code):
-    resp = requests.get(f"{ndauapi}/block/range/{start}/{end}")
+def test_block_range(ndauapi_client, min_height, start, end, want_code):
+    resp = ndauapi_client.get(f"/block/range/{start}/{end}")
     assert resp.status_code == want_code
 
 
+@pytest.mark.api
+def test_block_range_streamed(ndauapi_client, min_height):
+    path = "/block/range/1/100"
+    metas = list(ndauapi_client.iter_array(path, "block_metas"))
+    assert metas == ndauapi_client.get(path).json()["block_metas"]
+
+
 @pytest.mark.api
 @pytest.mark.parametrize(
     "start,end,want_code",
@@ -93,8 +106,8 @@ def test_block_range(ndauapi, min_height, start, end, want_code):
         ("2018-07-10T00:00:00Z", "2018-07-11T00:00:00Z", requests.codes.ok),
     ],
 )
-def test_block_date_range(ndauapi, min_height, start, end, want_code):
-    resp = requests.get(f"{ndauapi}/block/daterange/{start}/{end}")
+def test_block_date_range(ndauapi_client, min_height, start, end, want_code):
+    resp = ndauapi_client.get(f"/block/daterange/{start}/{end}")
     assert resp.status_code == want_code
 
 
@@ -109,7 +122,7 @@ def test_block_date_range(ndauapi, min_height, start, end, want_code):
         (True, requests.codes.ok, None),  # should include hash we searched for
     ],
 )
-def test_block_hash(ndauapi, current_hash, send_valid_hash, want_code, want_body):
+def test_block_hash(ndauapi_client, current_hash, send_valid_hash, want_code, want_body):
     if send_valid_hash is None:
         hash = ""
     elif send_valid_hash:
@@ -117,7 +130,7 @@ def test_block_hash(ndauapi, current_hash, send_valid_hash, want_code, want_body
     else:
         hash = "invalid"
 
-    resp = requests.get(f"{ndauapi}/block/hash/{hash}")
+    resp = ndauapi_client.get(f"/block/hash/{hash}")
     print(resp.url)
     assert resp.status_code == want_code
     if want_body is None:
@@ -126,6 +139,34 @@ def test_block_hash(ndauapi, current_hash, send_valid_hash, want_code, want_body
 
 
 @pytest.mark.api
-def test_block_transactions(ndauapi, current_height):
-    resp = requests.get(f"{ndauapi}/block/transactions/{current_height}")
+def test_block_transactions(ndauapi_client, current_height):
+    resp = ndauapi_client.get(f"/block/transactions/{current_height}")
     assert resp.status_code == requests.codes.ok
+
+
+@pytest.mark.api
+def test_crawl_resumes(ndauapi_client, current_height, tmp_path):
+    # a few windows are enough to test checkpoint and resume; crawling the
+    # whole chain is left to test_chain_hash_links
+    checkpoint = str(tmp_path / "checkpoint.json")
+    end = min(current_height, CRAWL_RESUME_BLOCKS)
+    half = end // 2
+    report = crawl(ndauapi_client, end=half, window=10, checkpoint=checkpoint)
+    assert (report.first, report.last, report.breaks) == (1, half, [])
+    report = crawl(ndauapi_client, end=end, window=10, checkpoint=checkpoint)
+    assert (report.first, report.last, report.breaks) == (half + 1, end, [])
+
+
+@pytest.mark.api
+@pytest.mark.slow
+def test_chain_hash_links(ndauapi_client, pytestconfig):
+    report = crawl(
+        ndauapi_client,
+        workers=pytestconfig.getoption("--crawl-workers"),
+        checkpoint=pytestconfig.getoption("--crawl-checkpoint") or None,
+    )
+    print(
+        f"verified blocks {report.first}-{report.last}: "
+        f"{blocks_per_second(report):.0f} blocks/s"
+    )
+    assert report.breaks == []
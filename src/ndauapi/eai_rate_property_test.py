@@ -0,0 +1,44 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+import pytest
+import requests
+
+from src.util.duration import SECOND, YEAR
+from src.util.eai import LOCK_BONUS_TABLE, descriptor, eai_rate_of
+
+hypothesis = pytest.importorskip("hypothesis")
+st = hypothesis.strategies
+
+# requests codes aren't technically members of their containing objects
+# pylint: disable=no-member
+
+seconds = st.integers(min_value=0, max_value=4 * YEAR // SECOND).map(
+    lambda s: s * SECOND
+)
+# lock table boundaries are where an off-by-one would hide
+boundaries = st.sampled_from([row[0] for row in LOCK_BONUS_TABLE])
+accounts = st.builds(
+    lambda i, waa, notice, bonus: descriptor(f"a{i}", waa, notice, bonus),
+    st.integers(min_value=0),
+    seconds | boundaries,
+    st.just(0) | seconds | boundaries,
+    st.sampled_from([row[1] for row in LOCK_BONUS_TABLE]),
+)
+
+
+@pytest.mark.api
+@hypothesis.settings(max_examples=50, deadline=None)
+@hypothesis.given(body=st.lists(accounts, max_size=50))
+def test_eai_rate_matches_model(ndauapi_client, body):
+    resp = ndauapi_client.post("/system/eai/rate", json=body)
+    assert resp.status_code == requests.codes.ok
+    assert resp.json() == [
+        {"address": d["address"], "eairate": eai_rate_of(d)} for d in body
+    ]
@@ -110,8 +110,8 @@ import pytest
         ),
     ],
 )
-def test_get_eai_rate(ndauapi, body, want_status, want_response):
-    resp = requests.post(f"{ndauapi}/system/eai/rate", json=body)
+def test_get_eai_rate(ndauapi_client, body, want_status, want_response):
+    resp = ndauapi_client.post("/system/eai/rate", json=body)
     assert resp.status_code == want_status
     if want_response is not None:
         assert resp.json() == want_response
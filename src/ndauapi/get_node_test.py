@@ -7,7 +7,6 @@
 #  https://www.apache.org/licenses/LICENSE-2.0.txt
 #  - -- --- ---- -----
 
-import json
 import pytest
 import requests
 
@@ -17,10 +16,10 @@ import requests
 
 @pytest.fixture(scope="module")
 def node_id(ndau):
-    return json.loads(ndau("info"))["node_info"]["id"]
+    return ndau.json("info")["node_info"]["id"]
 
 
 @pytest.mark.api
-def test_netinfo(ndauapi, node_id):
-    resp = requests.get(f"{ndauapi}/node/{node_id}")
+def test_netinfo(ndauapi_client, node_id):
+    resp = ndauapi_client.get(f"/node/{node_id}")
     assert resp.status_code == requests.codes.ok
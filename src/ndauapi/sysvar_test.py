@@ -20,7 +20,7 @@ from src.util.random_string import random_string
 
 
 @pytest.mark.api
-def test_sysvar_history(ndau, ndauapi):
+def test_sysvar_history(ndau, ndauapi_client):
     # Fill a new sysvar with some history so it won't conflict with another
     # sysvar's history.
     count = 3
@@ -29,7 +29,7 @@ def test_sysvar_history(ndau, ndauapi):
         ndau(f"sysvar set {sysvar} bar{i}")
 
     # Get history.
-    resp = requests.get(f"{ndauapi}/system/history/{sysvar}")
+    resp = ndauapi_client.get(f"/system/history/{sysvar}")
     assert resp.status_code == requests.codes.ok
 
     # Validate each element in the response.
@@ -54,8 +54,8 @@ def test_sysvar_history(ndau, ndauapi):
 @pytest.mark.parametrize(
     "path", ["/system/all", "/system/get/TransactionFeeScript,SIBScript"]
 )
-def test_sysvar_get(ndauapi, ndau, path):
-    resp = requests.get(f"{ndauapi}{path}")
+def test_sysvar_get(ndauapi_client, ndau, path):
+    resp = ndauapi_client.get(path)
     assert resp.status_code == requests.codes.ok
 
     sysvars = resp.json()
@@ -72,28 +72,24 @@ def test_sysvar_get(ndauapi, ndau, path):
         msgpack.loads(fee_bytes)
 
     # double-check against output from ndau tool, which we know unpacks things properly
-    tool_fee = json.loads(ndau("sysvar get TransactionFeeScript"))[
-        "TransactionFeeScript"
-    ]
+    tool_fee = ndau.json("sysvar get TransactionFeeScript")["TransactionFeeScript"]
     assert tool_fee == sysvars["TransactionFeeScript"]
 
 
 @pytest.mark.api
-def test_sysvar_set(ndauapi, ndau):
+def test_sysvar_set(ndauapi_client, ndau):
     name = random_string("fake-sysvar")
     value = random_string("fake-value")
 
-    cur_value = json.loads(ndau(f"sysvar get {name}"))[name]
+    cur_value = ndau.json(f"sysvar get {name}")[name]
     if cur_value != "":
         pytest.skip("accidentally generated an existing sysvar")
 
-    resp = requests.post(
-        f"{ndauapi}/system/set/{name}", data=f'"{value}"'.encode("utf8")
-    )
+    resp = ndauapi_client.post(f"/system/set/{name}", data=f'"{value}"'.encode("utf8"))
     assert resp.status_code == requests.codes.ok
 
     # this endpoint must not modify the blockchain
-    cur_value = json.loads(ndau(f"sysvar get {name}"))[name]
+    cur_value = ndau.json(f"sysvar get {name}")[name]
     assert cur_value == ""
 
     # this endpoint must return a transaction with certain properties
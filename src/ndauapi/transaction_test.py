@@ -8,13 +8,15 @@
 #  - -- --- ---- -----
 
 import base64
-import hashlib
 import json
 import pytest
 import requests
 import time
+from itertools import islice
 from tempfile import NamedTemporaryFile
+from src.util import txencode
 from src.util.random_string import random_string
+from src.util.txwalk import iter_pages, walk
 
 # requests codes aren't technically members of their containing objects
 # pylint: disable=no-member
@@ -26,7 +28,7 @@ def set_validation_json(ndau):
     ndau(f"account new {name}")
     # JSG must rfe before set_validation to pay for tx fees
     ndau(f"rfe 10 {name}")
-    return json.loads(ndau(f"-j account set-validation {name}"))
+    return ndau.json(f"-j account set-validation {name}")
 
 
 @pytest.fixture(scope="session")
@@ -38,26 +40,9 @@ def set_validation_file(set_validation_json):
 
 
 @pytest.fixture(scope="session")
-def set_validation_signable_bytes(ndau, set_validation_file):
-    signable_bytes_b64 = ndau(f"signable-bytes --strip set-validation {set_validation_file}")
-    return base64.b64decode(signable_bytes_b64, validate=True)
-
-
-@pytest.fixture(scope="session")
-def set_validation_txhash(set_validation_signable_bytes):
-    """
-    Compute the tx hash of the set_validation tx.
-
-    Defined in
-    https://github.com/ndau/metanode/
-            blob/0f1c08ce1863f6950738932dc30ddaf8d8e66809/
-            pkg/meta/transaction/transactable.go#L163-L166
-    """
-    return (
-        base64.urlsafe_b64encode(hashlib.md5(set_validation_signable_bytes).digest())
-        .decode("utf-8")
-        .strip("=")  # tx hashes do not include base64 padding characters
-    )
+def set_validation_txhash(set_validation_json):
+    """Compute the tx hash of the set_validation tx."""
+    return txencode.tx_hash("SetValidation", set_validation_json)
 
 
 @pytest.fixture(scope="session")
@@ -75,7 +60,7 @@ def set_validation(ndau, set_validation_file):
         (True, requests.codes.ok, '"BlockHeight":'),
     ],
 )
-def test_tx_hash(ndauapi, set_validation, set_validation_txhash, send_hash, want_status, want_body):
+def test_tx_hash(ndauapi_client, set_validation, set_validation_txhash, send_hash, want_status, want_body):
     if send_hash is None:
         txhash = ""
     elif send_hash:
@@ -83,7 +68,7 @@ def test_tx_hash(ndauapi, set_validation, set_validation_txhash, send_hash, want
     else:
         txhash = "invalid-hash"
 
-    resp = requests.get(f"{ndauapi}/transaction/{txhash}")
+    resp = ndauapi_client.get(f"/transaction/{txhash}")
     assert resp.status_code == want_status
     assert want_body in resp.text
 
@@ -104,50 +89,104 @@ def test_tx_hash(ndauapi, set_validation, set_validation_txhash, send_hash, want
     ],
 )
 def test_tx_before_hash(
-    ndauapi, set_validation, set_validation_txhash, txhash, want_status, want_body
+    ndauapi_client,
+    set_validation,
+    set_validation_txhash,
+    txhash,
+    want_status,
+    want_body,
 ):
     if txhash is None:
         txhash = set_validation_txhash
 
-    resp = requests.get(f"{ndauapi}/transaction/before/{txhash}")
+    resp = ndauapi_client.get(f"/transaction/before/{txhash}")
     assert resp.status_code == want_status
     assert want_body in resp.text
 
 
+def hashes(pages):
+    return [tx["TxHash"] for txs in pages for tx in txs]
+
+
+def walk_hashes(client, start, types, limit, pages):
+    """The hashes of the first `pages` pages of `limit` txs back from `start`."""
+    return hashes(islice(iter_pages(client, start, types=types, limit=limit), pages))
+
+
+# page size and pages of the bounded walk; together they fit one full page
+WALK_LIMIT = 7
+WALK_PAGES = 14
+
+
+@pytest.mark.api
+@pytest.mark.parametrize("types", [(), ("SetValidation",), ("X", "Transfer")])
+def test_tx_before_walk(ndauapi_client, types):
+    # start from the latest tx found, so that txs committed since can't shift
+    # the pages, and only look at what fits one full page, however long the
+    # chain is; test_tx_before_walk_to_genesis walks the rest
+    latest = walk_hashes(ndauapi_client, "start", types, 1, 1)
+    assert latest, "the walk should find at least one transaction"
+    start = latest[0]
+    whole = walk_hashes(ndauapi_client, start, types, WALK_LIMIT * WALK_PAGES, 1)
+
+    # small pages must cover the same txs, in the same order
+    assert walk_hashes(ndauapi_client, start, types, WALK_LIMIT, WALK_PAGES) == whole
+    report = walk(
+        ndauapi_client, start, types=types, limit=WALK_LIMIT, max_pages=WALK_PAGES
+    )
+    assert report.problems == []
+    assert report.txs == len(whole)
+
+    # and so must a walk from part way along
+    middle = len(whole) // 2
+    part = walk_hashes(ndauapi_client, whole[middle], types, WALK_LIMIT, WALK_PAGES)
+    assert part[: len(whole) - middle] == whole[middle:]
+
+
+@pytest.mark.api
+@pytest.mark.slow
+@pytest.mark.parametrize("types", [(), ("SetValidation",), ("X", "Transfer")])
+def test_tx_before_walk_to_genesis(ndauapi_client, types):
+    whole = hashes(iter_pages(ndauapi_client, types=types, limit=100))
+    assert whole, "the walk should find at least one transaction"
+
+    # small pages must cover the same txs, in the same order; start them from
+    # the first tx found, in case another has been committed since
+    report = walk(ndauapi_client, whole[0], types=types, limit=7)
+    assert report.problems == []
+    assert report.txs == len(whole)
+    assert report.pages == -(-len(whole) // 7)
+    assert (report.first["TxHash"], report.last["TxHash"]) == (whole[0], whole[-1])
+
+    # and so must a walk from part way back
+    middle = len(whole) // 2
+    report = walk(ndauapi_client, whole[middle], types=types, limit=7)
+    assert report.problems == []
+    assert report.txs == len(whole) - middle
+
+
 @pytest.mark.api
-def test_tx_prevalidate_and_submit(ndauapi, ndau, ndautool_toml):
+def test_tx_prevalidate_and_submit(ndauapi_client, ndau, ndautool_toml):
     # Any transaction will do.  Here we RFE to the rfe address.
     txtype = "ReleaseFromEndowment"
     name = random_string("prevalsubmit-acct")
     ndau(f"account new {name}")
-    tx = json.loads(ndau(f"-j rfe 1 {name}"))
-
-    # We need the tx in a temp file to get the signable bytes.
-    tf = NamedTemporaryFile(mode="w+t")
-    json.dump(tx, tf)
-    tf.flush()
-    tx_file = tf.name
+    tx = ndau.json(f"-j rfe 1 {name}")
 
     # We can calculate the expected tx hash before we submit the transaction.
-    signable_bytes_b64 = ndau(f"signable-bytes --strip {txtype} {tx_file}")
-    signable_bytes = base64.b64decode(signable_bytes_b64, validate=True)
-    txhash = (
-        base64.urlsafe_b64encode(hashlib.md5(signable_bytes).digest())
-        .decode("utf-8")
-        .strip("=")  # tx hashes do not include base64 padding characters
-    )
+    txhash = txencode.tx_hash(txtype, tx)
 
     # We expect the next transactions to succeed when posted.
     want_body = f'"hash":"{txhash}"'
     want_status = requests.codes.ok
 
     # Prevalidate new tx.
-    resp = requests.post(f"{ndauapi}/tx/prevalidate/{txtype}", json=tx)
+    resp = ndauapi_client.post(f"/tx/prevalidate/{txtype}", json=tx)
     assert resp.status_code == want_status
     assert want_body in resp.text
 
     # Submit new tx.
-    resp = requests.post(f"{ndauapi}/tx/submit/{txtype}", json=tx)
+    resp = ndauapi_client.post(f"/tx/submit/{txtype}", json=tx)
     assert resp.status_code == want_status
     assert want_body in resp.text
 
@@ -155,11 +194,47 @@ def test_tx_prevalidate_and_submit(ndauapi, ndau, ndautool_toml):
     want_status = requests.codes.accepted
 
     # Prevalidate tx again.
-    resp = requests.post(f"{ndauapi}/tx/prevalidate/{txtype}", json=tx)
+    resp = ndauapi_client.post(f"/tx/prevalidate/{txtype}", json=tx)
     assert resp.status_code == want_status
     assert want_body in resp.text
 
     # Submit tx again.
-    resp = requests.post(f"{ndauapi}/tx/submit/{txtype}", json=tx)
+    resp = ndauapi_client.post(f"/tx/submit/{txtype}", json=tx)
     assert resp.status_code == want_status
     assert want_body in resp.text
+
+
+@pytest.mark.api
+@pytest.mark.parametrize(
+    "txtype,cmd",
+    [
+        ("Transfer", "-j transfer --napu=1 {account} {other}"),
+        ("ReleaseFromEndowment", "-j rfe 1 {account}"),
+        ("Issue", "-j issue 1"),
+        ("Lock", "-j account lock {account} 3m"),
+        ("Notify", "-j account notify {account}"),
+        ("SetValidation", "-j account set-validation {new}"),
+        ("SetSysvar", "-j sysvar set {sysvar} --json '\"txencode\"'"),
+    ],
+)
+def test_signable_bytes_match_tool(ndau, account_pool, rfe_to_ssv, txtype, cmd):
+    new = random_string("txencode-acct")
+    ndau(f"account new {new}")
+    tx = ndau.json(
+        cmd.format(
+            account=account_pool.take(),
+            other=account_pool.take(),
+            new=new,
+            sysvar=random_string("txencode-sysvar"),
+        )
+    )
+
+    with NamedTemporaryFile(mode="w+t") as tf:
+        json.dump(tx, tf)
+        tf.flush()
+        want = base64.b64decode(
+            ndau(f"signable-bytes --strip {txtype} {tf.name}"), validate=True
+        )
+
+    assert txencode.signable_bytes(txtype, tx) == want
+    assert txencode.tx_hashes(txtype, [tx, tx]) == [txencode.hash_bytes(want)] * 2
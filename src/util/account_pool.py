@@ -0,0 +1,135 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""A pool of funded accounts with validation rules already set."""
+
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from src.util.bootstrap import submit_as_rfe
+from src.util.random_string import random_string
+
+# requests codes aren't technically members of their containing objects
+# pylint: disable=no-member
+
+# Setting up a single account the traditional way commits an RFE, an Issue and
+# a SetValidation transaction, each of which blocks until its own block.
+TXS_PER_ACCOUNT = 3
+
+
+def current_height(client):
+    """Return the current block height as reported by ndauapi."""
+    resp = client.get("/block/current")
+    assert resp.status_code == requests.codes.ok
+    return resp.json()["block_meta"]["header"]["height"]
+
+
+class AccountPool:
+    """
+    Hand out fresh, funded accounts with validation rules set.
+
+    Accounts are set up in batches: every account in a batch is created
+    locally, then an RFE of `ndau_each` ndau to each of them and a single
+    Issue covering them all are pre-signed with consecutive RFE-account
+    sequence numbers and submitted together (see `bootstrap.submit_as_rfe`).
+    Finally their SetValidation transactions are generated with `ndau -j` and
+    submitted to ndauapi concurrently. Either way the batch shares a block or
+    two instead of waiting for one per transaction.
+
+    `conf` is the parsed ndautool.toml, for the RFE account's keys.
+
+    `take()` returns the name of an account which no other caller has seen.
+    """
+
+    def __init__(self, ndau, keytool, client, conf, *, batch_size=8, ndau_each=10):
+        self.ndau = ndau
+        self.keytool = keytool
+        self.client = client
+        self.conf = conf
+        self.batch_size = batch_size
+        self.ndau_each = ndau_each
+        self._fresh = deque()
+        self.accounts = 0
+        self.blocks = 0
+        self.seconds = 0.0
+        self.legacy_seconds = 0.0
+
+    def take(self):
+        """Return the name of a fresh account, setting up a batch if needed."""
+        if len(self._fresh) == 0:
+            self.fill()
+        return self._fresh.popleft()
+
+    def discard(self):
+        """Forget every fresh account, e.g. after the chain was reset."""
+        self._fresh.clear()
+
+    def fill(self, count=None):
+        """Set up `count` more accounts (default: `batch_size`)."""
+        if count is None:
+            count = self.batch_size
+        if count <= 0:
+            return
+        start_height = current_height(self.client)
+        start = time.perf_counter()
+
+        names = [random_string("pool") for _ in range(count)]
+        for name in names:
+            self.ndau(f"account new {name}")
+        created = time.perf_counter()
+
+        pending = [
+            ("ReleaseFromEndowment", self.ndau.json(f"-j rfe {self.ndau_each} {n}"))
+            for n in names
+        ]
+        pending.append(("Issue", self.ndau.json(f"-j issue {self.ndau_each * count}")))
+        rejected = submit_as_rfe(
+            self.ndau, self.keytool, self.client, self.conf, pending
+        )
+        assert not rejected, f"could not fund pool accounts: {rejected[0]}"
+
+        txs = [self.ndau.json(f"-j account set-validation {n}") for n in names]
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            resps = list(
+                executor.map(
+                    lambda tx: self.client.post("/tx/submit/SetValidation", json=tx),
+                    txs,
+                )
+            )
+        for name, resp in zip(names, resps):
+            assert resp.status_code == requests.codes.ok, f"{name}: {resp.text}"
+
+        elapsed = time.perf_counter() - start
+        blocks = current_height(self.client) - start_height
+        self.accounts += count
+        self.blocks += blocks
+        self.seconds += elapsed
+        # Each block above cost at least one commit wait, which is what each
+        # of the transactions in the traditional setup would cost.
+        commit_seconds = (elapsed - (created - start)) / max(1, blocks)
+        legacy_commits = count * TXS_PER_ACCOUNT * commit_seconds
+        self.legacy_seconds += (created - start) + legacy_commits
+        self._fresh.extend(names)
+
+    def report(self):
+        """Describe how much the pool saved compared with per-account setup."""
+        if self.accounts == 0:
+            return ["no pooled accounts were set up"]
+        legacy_blocks = self.accounts * TXS_PER_ACCOUNT
+        return [
+            f"accounts set up: {self.accounts} ({len(self._fresh)} unused)",
+            f"blocks: {self.blocks} (per-account setup: {legacy_blocks}, "
+            f"saved {legacy_blocks - self.blocks})",
+            f"seconds: {self.seconds:.1f} "
+            f"(per-account setup: ~{self.legacy_seconds:.1f}, "
+            f"saved ~{self.legacy_seconds - self.seconds:.1f})",
+        ]
@@ -0,0 +1,65 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""Query the state of many accounts at once through ndauapi."""
+
+import requests
+
+from src.util.decode import decode_json
+
+# requests codes aren't technically members of their containing objects
+# pylint: disable=no-member
+
+# Addresses per POST /account/accounts request; keeps request bodies and
+# response times modest no matter how many addresses are asked for.
+CHUNK_SIZE = 100
+
+
+def account_states(client, addresses, *, chunk_size=CHUNK_SIZE):
+    """
+    Return a dict of account data by address, like `ndau account query`.
+
+    Takes one request per `chunk_size` addresses. Addresses which the chain
+    has never seen may be missing from the result.
+    """
+    addresses = list(dict.fromkeys(addresses))
+    states = {}
+    for start in range(0, len(addresses), chunk_size):
+        resp = client.post(
+            "/account/accounts", json=addresses[start : start + chunk_size]
+        )
+        assert resp.status_code == requests.codes.ok, resp.text
+        states.update(decode_json(resp))
+    return states
+
+
+def balances(client, addresses, **kwargs):
+    """Return the balance in napu of each of `addresses`; unknown ones are 0."""
+    states = account_states(client, addresses, **kwargs)
+    return {addr: (states.get(addr) or {}).get("balance", 0) for addr in addresses}
+
+
+class BalanceSnapshot:
+    """
+    Record balances now, to compare with balances later.
+
+        snapshot = BalanceSnapshot(ndauapi_client, addresses)
+        ndau("account credit-eai ...")
+        assert all(gain > 0 for gain in snapshot.diff().values())
+    """
+
+    def __init__(self, client, addresses):
+        self.client = client
+        self.addresses = list(dict.fromkeys(addresses))
+        self.before = balances(client, self.addresses)
+
+    def diff(self):
+        """Return the change in balance of each address since the snapshot."""
+        after = balances(self.client, self.addresses)
+        return {addr: after[addr] - self.before[addr] for addr in self.addresses}
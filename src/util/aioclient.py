@@ -0,0 +1,123 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""
+A minimal asyncio HTTP/1.1 client for load-testing ndauapi.
+
+Load tests need hundreds of concurrent clients from a single process, which
+threads and `requests` can't drive without becoming the bottleneck
+themselves. Each `Connection` is one keep-alive connection speaking just
+enough HTTP for ndauapi: requests with an optional JSON body, and responses
+framed by `Content-Length`, chunked encoding or the connection closing.
+"""
+
+import asyncio
+import json
+from collections import namedtuple
+from urllib.parse import urlparse
+
+Response = namedtuple("Response", ["status", "body"])
+
+
+def run(coro):
+    """Run `coro` to completion on a fresh event loop, and return its result."""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+class Connection:
+    """A keep-alive HTTP connection to `base_url`, reopened whenever it drops."""
+
+    def __init__(self, base_url, *, timeout=60):
+        url = urlparse(base_url)
+        self.host = url.hostname
+        self.port = url.port or 80
+        self.prefix = url.path.rstrip("/")
+        self.timeout = timeout
+        self._reader = None
+        self._writer = None
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def request(self, method, path, body=None):
+        """
+        Send a request and return its `Response`.
+
+        `body`, if not None, is sent as JSON. A request on a kept-alive
+        connection which the server has since closed is retried once.
+        """
+        data = b"" if body is None else json.dumps(body).encode("utf8")
+        head = (
+            f"{method} {self.prefix}{path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            f"Content-Length: {len(data)}\r\n"
+        )
+        if body is not None:
+            head += "Content-Type: application/json\r\n"
+        message = (head + "\r\n").encode("ascii") + data
+        for attempt in range(2):
+            fresh = self._writer is None
+            if fresh:
+                await self._connect()
+            try:
+                self._writer.write(message)
+                return await asyncio.wait_for(self._response(), self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                self.close()
+                if fresh or attempt:
+                    raise
+            except BaseException:
+                # e.g. a timeout or cancellation part way through a response
+                self.close()
+                raise
+
+    async def _response(self):
+        status_line = await self._reader.readuntil(b"\r\n")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self._reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self._reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                if size == 0:
+                    # trailers, if any, end with an empty line
+                    while await self._reader.readuntil(b"\r\n") != b"\r\n":
+                        pass
+                    break
+                chunks.append(await self._reader.readexactly(size))
+                await self._reader.readexactly(2)
+            body = b"".join(chunks)
+        elif "content-length" in headers:
+            body = await self._reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await self._reader.read()
+            self.close()
+            return Response(status, body)
+        connection = headers.get("connection", "").lower()
+        if connection == "close" or (
+            status_line.startswith(b"HTTP/1.0") and connection != "keep-alive"
+        ):
+            self.close()
+        return Response(status, body)
@@ -0,0 +1,114 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""A pooled, instrumented HTTP client for ndauapi."""
+
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src.util import decode
+from src.util.stats import Histogram
+
+# Only retry responses which indicate that the server was unavailable,
+# never ones which the tests are checking for.
+RETRY_STATUSES = (502, 503, 504)
+
+
+class ApiClient(requests.Session):
+    """
+    HTTP session bound to a single ndauapi instance.
+
+    Connections are kept alive and pooled, so consecutive requests reuse the
+    same TCP connection. Idempotent requests which fail to connect or which
+    hit a gateway error are retried with exponential backoff.
+
+    Paths beginning with `/` are resolved against `base_url`; absolute URLs
+    are used as they are. Every request is timed into a per-route
+    `Histogram`, so memory stays flat however many requests a session makes;
+    see `timing_summary`. Large responses are best decoded with
+    `decode.decode_json`, or incrementally with `iter_array` for arrays.
+    """
+
+    def __init__(self, base_url, *, pool_size=10, retries=3, backoff=0.1, timeout=None):
+        super().__init__()
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.histograms = {}
+        self._histograms_lock = threading.Lock()
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size, max_retries=retry
+        )
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+
+    def url(self, path):
+        """Resolve `path` against the base URL."""
+        if path.startswith("/"):
+            return self.base_url + path
+        return path
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        url = self.url(url)
+        start = time.perf_counter()
+        resp = super().request(method, url, **kwargs)
+        seconds = time.perf_counter() - start
+        route = f"{method} " + "/".join(urlparse(url).path.split("/")[:3])
+        with self._histograms_lock:
+            self.histograms.setdefault(route, Histogram()).record(seconds)
+        return resp
+
+    def iter_array(self, path, key=None, **kwargs):
+        """
+        GET `path` and yield the elements of the JSON array it returns; with
+        `key`, of the array which is member `key` of the returned object.
+
+        Raises `requests.HTTPError` for an error status.
+        """
+        resp = self.get(path, stream=True, **kwargs)
+        with resp:
+            resp.raise_for_status()
+            size = resp.headers.get("Content-Length")
+            yield from decode.iter_array(
+                resp.iter_content(decode.CHUNK_BYTES),
+                key,
+                size=int(size) if size is not None else None,
+            )
+
+    def timing_summary(self):
+        """
+        Summarize request latency per route.
+
+        Routes are identified by the method and the first two path segments,
+        e.g. `GET /block/range`.
+        """
+        with self._histograms_lock:
+            histograms = dict(self.histograms)
+        return {
+            route: {
+                "count": h.count,
+                "mean": h.total / h.count / 1e6,
+                "p50": h.percentile(50),
+                "p95": h.percentile(95),
+                "p99": h.percentile(99),
+                "max": h.max / 1e6,
+            }
+            for route, h in histograms.items()
+        }
@@ -0,0 +1,91 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""
+Fund the well-known chain accounts the suite depends on, all at once.
+
+The RFE, SetSysvar and RecordPrice accounts each need a balance to pay tx
+fees. Every funding transaction (an RFE per account, then one Issue covering
+them all) is signed by the RFE account, so they are pre-signed with
+consecutive sequence numbers and submitted together; they normally commit in
+a single block. Should the chain see them out of order, the rejected ones are
+re-signed with fresh sequence numbers and submitted again.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from src.util import xproc
+from src.util.accounts import balances
+from src.util.presign import Presigner, accepted, account_sequences, submit
+
+# ndautool.toml sections of the accounts to fund, in funding order
+SPECIAL_ACCOUNTS = ("rfe", "set_sysvar", "record_price")
+MIN_BALANCE = 100_000_000  # 1 ndau, in napu
+TOP_UP = 10  # ndau
+
+
+def fund_special_accounts(ndau, keytool, client, conf, *, retries=3):
+    """
+    Ensure every account in `SPECIAL_ACCOUNTS` holds at least `MIN_BALANCE`.
+
+    `conf` is the parsed ndautool.toml. Returns the names of the sections
+    whose accounts had to be funded.
+    """
+    addrs = {name: conf[name]["address"] for name in SPECIAL_ACCOUNTS}
+    bals = balances(client, addrs.values())
+    needy = [name for name in SPECIAL_ACCOUNTS if bals[addrs[name]] < MIN_BALANCE]
+    if not needy:
+        return []
+
+    pending = [
+        ("ReleaseFromEndowment", ndau.json(f"-j rfe {TOP_UP} -a {addrs[n]}"))
+        for n in needy
+    ]
+    pending.append(("Issue", ndau.json(f"-j issue {TOP_UP * len(needy)}")))
+    rejected = submit_as_rfe(ndau, keytool, client, conf, pending, retries=retries)
+    if rejected:
+        raise AssertionError(f"could not fund {needy}: {rejected[0]}")
+    return needy
+
+
+def submit_as_rfe(ndau, keytool, client, conf, pending, *, retries=3):
+    """
+    Sign `pending` (txtype, tx) pairs as the RFE account, with consecutive
+    sequence numbers, and submit them together.
+
+    Txs the chain rejects are re-signed with fresh sequence numbers and
+    submitted again, up to `retries` times. This holds the `signer-rfe` lock
+    throughout, so other workers' `ndau rfe` and `ndau issue` can't take the
+    same sequence numbers. Returns the response bodies of the last rejected
+    submissions; empty if every tx was accepted.
+    """
+    presigner = Presigner(ndau, keytool)
+    keys = conf["rfe"]["keys"]
+    signer = conf["rfe"]["address"]
+    rejected = []
+    with xproc.lock("signer-rfe"):
+        for _ in range(retries + 1):
+            first = account_sequences(client, [signer])[signer] + 1
+            signed = [
+                (txtype, presigner.sign(txtype, dict(tx, sequence=first + i), keys))
+                for i, (txtype, tx) in enumerate(pending)
+            ]
+            with ThreadPoolExecutor(max_workers=len(signed)) as executor:
+                submissions = list(
+                    executor.map(lambda pair: submit(client, *pair), signed)
+                )
+            rejected = [s.body for s in submissions if not accepted(s)]
+            pending = [
+                (txtype, tx)
+                for (txtype, tx), submission in zip(pending, submissions)
+                if not accepted(submission)
+            ]
+            if not pending:
+                return []
+    return rejected
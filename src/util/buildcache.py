@@ -0,0 +1,184 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""
+Build the ndau and keytool binaries once per commit, and reuse them after.
+
+Binaries are cached under `<cache_dir>/<commit>/<tool>`, keyed by the commit
+which the conf.toml label of their repo resolves to, next to a manifest
+recording that commit and the binary's size, mtime and SHA-256. A lookup
+resolves the label in the local mirror, without touching the network, and
+checks the binary against its manifest by `stat` alone, so a cache hit takes
+milliseconds. Misses are built concurrently from worktrees of the mirror,
+in module mode; a commit without a go.mod can't be built outside of its
+GOPATH, so it is refused instead.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from src.util import xproc
+from src.util.checkout import DEFAULT_CACHE as MIRROR_CACHE, CheckoutManager, git
+from src.util.subp import subp
+
+DEFAULT_CACHE = os.path.expanduser("~/.cache/ndau-integration-tests/builds")
+
+# tool name: (conf.toml section of its repo, go package within the repo)
+TOOLS = {"ndau": ("ndautool", "./cmd/ndau"), "keytool": ("ndautool", "./cmd/keytool")}
+
+COMMIT = re.compile(r"^[0-9a-f]{40}$")
+
+
+def sha256_of(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fp:
+        for chunk in iter(lambda: fp.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def stamp_of(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class BuildCache:
+    """
+    Cache of tool binaries built from the repos in a conf.toml configuration.
+
+    `checkouts` provides the mirrors labels are resolved against, by default
+    those of `python -m src.util.checkout`. With `fetch`, mirrors are brought
+    up to date before resolving, at the cost of a network round trip.
+    """
+
+    def __init__(self, conf, cache_dir=DEFAULT_CACHE, checkouts=None, *, fetch=False):
+        self.conf = conf
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.checkouts = checkouts or CheckoutManager(MIRROR_CACHE)
+        self.fetch = fetch
+        self.hits = 0
+        self.builds = 0
+
+    def resolve(self, section):
+        """Return the commit that the label of conf section `section` names."""
+        remote, label = self.conf[section]["repo"], self.conf[section]["label"]
+        if COMMIT.match(label) and not self.fetch:
+            return label
+        mirror = self.checkouts.mirror_path(remote)
+        if self.fetch or not os.path.exists(mirror):
+            self.checkouts.fetch(remote)
+        return git("-C", mirror, "rev-parse", "--verify", f"{label}^{{commit}}")
+
+    def path(self, commit, tool):
+        return os.path.join(self.cache_dir, commit, tool)
+
+    def manifest_path(self, commit, tool):
+        return self.path(commit, tool) + ".json"
+
+    def cached(self, commit, tool):
+        """Return the cached binary of `tool` at `commit`, or None."""
+        try:
+            with open(self.manifest_path(commit, tool), "rt") as fp:
+                manifest = json.load(fp)
+            section = TOOLS[tool][0]
+            if (manifest["commit"], manifest["repo"]) != (
+                commit,
+                self.conf[section]["repo"],
+            ):
+                return None
+            if stamp_of(self.path(commit, tool)) != manifest["stamp"]:
+                return None
+        except (OSError, ValueError, KeyError):
+            return None
+        return self.path(commit, tool)
+
+    def build(self, section, commit, tools, *, workers=4):
+        """
+        Build each of `tools` from conf section `section` at `commit` into the
+        cache, concurrently from a single worktree, and return {tool: path}.
+        """
+        remote = self.conf[section]["repo"]
+        with xproc.lock(f"build-{commit}"):
+            paths = {tool: self.cached(commit, tool) for tool in tools}
+            tools = [tool for tool, path in paths.items() if path is None]
+            if not tools:
+                return paths
+            mirror = self.checkouts.mirror_path(remote)
+            try:
+                git("-C", mirror, "cat-file", "-e", f"{commit}:go.mod")
+            except subprocess.CalledProcessError:
+                raise Exception(
+                    f"{section} has no go.mod at {commit}; "
+                    "only go modules can be built with --build-cache"
+                ) from None
+            os.makedirs(os.path.join(self.cache_dir, commit), exist_ok=True)
+            src = os.path.join(self.cache_dir, "src", commit)
+            self.checkouts.worktree(remote, commit, src)
+            try:
+                with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+                    built = executor.map(
+                        lambda tool: self._build(src, commit, tool), tools
+                    )
+                    paths.update(zip(tools, built))
+            finally:
+                shutil.rmtree(src, ignore_errors=True)
+            return paths
+
+    def _build(self, src, commit, tool):
+        section, package = TOOLS[tool]
+        path = self.path(commit, tool)
+        env = dict(os.environ, GO111MODULE="on")
+        subp(["go", "build", "-o", path + ".tmp", package], env=env, cwd=src)
+        os.replace(path + ".tmp", path)
+        manifest = {
+            "commit": commit,
+            "label": self.conf[section]["label"],
+            "repo": self.conf[section]["repo"],
+            "stamp": stamp_of(path),
+            "sha256": sha256_of(path),
+        }
+        with open(self.manifest_path(commit, tool), "wt") as fp:
+            json.dump(manifest, fp, indent=2, sort_keys=True)
+        self.builds += 1
+        return path
+
+    def binaries(self, tools=tuple(TOOLS), *, workers=4):
+        """
+        Return {tool: path} of each of `tools`, built at its label's commit.
+
+        Cached binaries are reused. The others are built concurrently, one
+        worktree per repo.
+        """
+        commits = {}
+        paths = {}
+        missing = {}
+        for tool in tools:
+            section = TOOLS[tool][0]
+            if section not in commits:
+                commits[section] = self.resolve(section)
+            commit = commits[section]
+            paths[tool] = self.cached(commit, tool)
+            if paths[tool] is None:
+                missing.setdefault((section, commit), []).append(tool)
+            else:
+                self.hits += 1
+        if missing:
+            with ThreadPoolExecutor(max_workers=max(1, len(missing))) as executor:
+                futures = [
+                    executor.submit(self.build, section, commit, group, workers=workers)
+                    for (section, commit), group in missing.items()
+                ]
+                for future in futures:
+                    paths.update(future.result())
+        return paths
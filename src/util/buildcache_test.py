@@ -0,0 +1,81 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""Build, cache and reuse tools from a local go repository."""
+
+import os
+import shutil
+import subprocess
+import time
+
+import pytest
+
+from src.util.buildcache import BuildCache
+from src.util.checkout import CheckoutManager, git
+from src.util.subp import subp
+
+
+def make_go_remote(path, tools, *, module=True):
+    """Create a git repository at `path` holding a go `main` package per tool."""
+    git("init", "--quiet", path)
+    if module:
+        with open(os.path.join(path, "go.mod"), "w") as f:
+            f.write("module example.com/commands\n\ngo 1.13\n")
+    for tool in tools:
+        os.makedirs(os.path.join(path, "cmd", tool))
+        with open(os.path.join(path, "cmd", tool, "main.go"), "w") as f:
+            f.write(f'package main\n\nfunc main() {{ println("{tool}") }}\n')
+    git("-C", path, "add", "-A")
+    git(
+        "-C",
+        path,
+        "-c",
+        "user.name=test",
+        "-c",
+        "user.email=test@example.com",
+        "commit",
+        "--quiet",
+        "-m",
+        "tools",
+    )
+    return f"file://{path}"
+
+
+def test_build_cache(tmp_path):
+    if shutil.which("go") is None:
+        pytest.skip("needs the go toolchain")
+    remote = make_go_remote(str(tmp_path / "commands"), ["ndau", "keytool"])
+    conf = {"ndautool": {"repo": remote, "logical": "commands", "label": "master"}}
+    checkouts = CheckoutManager(str(tmp_path / "mirrors"))
+
+    cache = BuildCache(conf, str(tmp_path / "builds"), checkouts)
+    paths = cache.binaries()
+    assert cache.builds == 2
+    assert subp([paths["keytool"]], stderr=subprocess.STDOUT) == "keytool"
+
+    # a fresh cache finds both binaries without building
+    cache = BuildCache(conf, str(tmp_path / "builds"), checkouts)
+    start = time.perf_counter()
+    assert cache.binaries() == paths
+    assert time.perf_counter() - start < 0.5
+    assert (cache.builds, cache.hits) == (0, 2)
+
+    # a binary which no longer matches its manifest is rebuilt
+    with open(paths["ndau"], "ab") as f:
+        f.write(b"\0")
+    assert cache.binaries() == paths
+    assert cache.builds == 1
+
+    # a label from before go modules is refused rather than built as one
+    remote = make_go_remote(str(tmp_path / "gopath-commands"), ["ndau"], module=False)
+    conf["ndautool"]["repo"] = remote
+    cache = BuildCache(conf, str(tmp_path / "builds"), checkouts, fetch=True)
+    with pytest.raises(Exception, match="no go.mod"):
+        cache.binaries(("ndau",))
+    assert cache.builds == 0
@@ -0,0 +1,190 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""
+Wait for chain progress without fixed sleeps.
+
+If the optional `websocket-client` package is installed, `ChainWaiter`
+subscribes to Tendermint's `NewBlock` and `Tx` events and wakes waiters as
+soon as anything is committed. Otherwise, or if the subscription drops, it
+falls back to polling Tendermint's `/status` endpoint, backing off from a
+short interval for as long as the chain doesn't move.
+"""
+
+import json
+import threading
+import time
+
+import requests
+
+try:
+    import websocket
+except ImportError:
+    websocket = None
+
+# requests codes aren't technically members of their containing objects
+# pylint: disable=no-member
+
+EVENT_QUERIES = ("tm.event='NewBlock'", "tm.event='Tx'")
+
+
+class ChainWaiter:
+    """
+    Block until the chain reaches some state, or a deadline passes.
+
+    `rpc_url` is the Tendermint RPC root, e.g. `http://localhost:26670`.
+    `client` is an `ApiClient` for ndauapi; it is only needed by `wait_for_tx`.
+
+    All `wait_*` methods raise `TimeoutError` once `timeout` seconds elapse.
+    When not subscribed, they poll every `poll_interval` seconds at first,
+    doubling the interval up to `max_poll_interval` until the height changes.
+    """
+
+    def __init__(
+        self, rpc_url, client=None, *, poll_interval=0.05, max_poll_interval=1.0
+    ):
+        self.rpc_url = rpc_url.rstrip("/")
+        self.client = client
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self._session = requests.Session()
+        self._cond = threading.Condition()
+        self._events = 0
+        self._height = None
+        self._ws = None
+        if websocket is not None:
+            self._subscribe()
+
+    @property
+    def subscribed(self):
+        """Whether chain events are currently being received."""
+        return self._ws is not None
+
+    def _subscribe(self):
+        ws_url = "ws" + self.rpc_url[len("http") :] + "/websocket"
+        try:
+            self._ws = websocket.create_connection(ws_url, timeout=5)
+            for i, query in enumerate(EVENT_QUERIES):
+                self._ws.send(
+                    json.dumps(
+                        {
+                            "jsonrpc": "2.0",
+                            "method": "subscribe",
+                            "id": i,
+                            "params": {"query": query},
+                        }
+                    )
+                )
+            self._ws.settimeout(None)
+        except (OSError, websocket.WebSocketException):
+            self._ws = None
+            return
+        threading.Thread(target=self._receive, daemon=True).start()
+
+    def _receive(self):
+        ws = self._ws
+        try:
+            while True:
+                msg = json.loads(ws.recv())
+                data = msg.get("result", {}).get("data")
+                if data is None:
+                    # subscription acknowledgement
+                    continue
+                with self._cond:
+                    if data.get("type") == "tendermint/event/NewBlock":
+                        header = data["value"]["block"]["header"]
+                        self._height = int(header["height"])
+                    self._events += 1
+                    self._cond.notify_all()
+        except (OSError, ValueError, websocket.WebSocketException):
+            pass
+        # fall back to polling
+        with self._cond:
+            self._ws = None
+            self._cond.notify_all()
+
+    def close(self):
+        """Stop receiving chain events."""
+        ws = self._ws
+        self._ws = None
+        if ws is not None:
+            ws.close()
+        self._session.close()
+
+    def status(self):
+        """Return the node's Tendermint `/status` result."""
+        resp = self._session.get(f"{self.rpc_url}/status")
+        resp.raise_for_status()
+        return resp.json()["result"]
+
+    def height(self):
+        """Return the latest committed block height."""
+        if self.subscribed and self._height is not None:
+            return self._height
+        return int(self.status()["sync_info"]["latest_block_height"])
+
+    def wait_until(self, predicate, timeout=30, what=None):
+        """
+        Wait until `predicate()` returns a truthy value, and return that value.
+
+        `predicate` is evaluated immediately, and then again after every chain
+        event or, when not subscribed, after every poll.
+        """
+        deadline = time.monotonic() + timeout
+        interval = self.poll_interval
+        last_height = None
+        while True:
+            with self._cond:
+                seen = self._events
+            result = predicate()
+            if result:
+                return result
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(
+                    f"timed out after {timeout}s waiting for {what or predicate}"
+                )
+            with self._cond:
+                if self.subscribed:
+                    if self._events == seen:
+                        self._cond.wait(remaining)
+                    continue
+                self._cond.wait(min(remaining, interval))
+            if not self.subscribed:
+                height = self.height()
+                if height == last_height:
+                    interval = min(2 * interval, self.max_poll_interval)
+                else:
+                    interval = self.poll_interval
+                last_height = height
+
+    def wait_for_height(self, height, timeout=30):
+        """Wait until block `height` has been committed; return the latest height."""
+
+        def reached():
+            current = self.height()
+            return current if current >= height else None
+
+        return self.wait_until(reached, timeout, f"block height {height}")
+
+    def wait_for_tx(self, txhash, timeout=30):
+        """
+        Wait until the ndau transaction `txhash` is indexed; return its data.
+
+        `txhash` is the ndau hash as computed from a tx's signable bytes, not
+        the Tendermint hash of its serialized form.
+        """
+
+        def indexed():
+            resp = self.client.get(f"/transaction/{txhash}")
+            if resp.status_code == requests.codes.ok and resp.text.strip() != "null":
+                return resp.json()
+            return None
+
+        return self.wait_until(indexed, timeout, f"tx {txhash}")
@@ -0,0 +1,137 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""Wait for the chain through a fake Tendermint RPC."""
+
+import http.server
+import json
+import threading
+import time
+
+import pytest
+
+from src.util import chain_waiter
+from src.util.api_client import ApiClient
+from src.util.standin import Ledger, StandinServer
+
+
+class FakeRPC(http.server.HTTPServer):
+    """A Tendermint RPC which only answers `/status`, at a settable height."""
+
+    def __init__(self):
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(handler):
+                self.polls += 1
+                body = json.dumps(
+                    {"result": {"sync_info": {"latest_block_height": str(self.height)}}}
+                ).encode("utf8")
+                handler.send_response(200)
+                handler.send_header("Content-Length", str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, *args):
+                pass
+
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.height = 1
+        self.polls = 0
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return "http://%s:%d" % self.server_address[:2]
+
+
+@pytest.fixture
+def fake_rpc():
+    server = FakeRPC()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_chain_waiter_polls_with_backoff(fake_rpc, monkeypatch):
+    monkeypatch.setattr(chain_waiter, "websocket", None)
+    waiter = chain_waiter.ChainWaiter(fake_rpc.url, max_poll_interval=0.4)
+    assert not waiter.subscribed
+
+    calls = []
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        waiter.wait_until(lambda: calls.append(1), timeout=1.5, what="nothing")
+    assert 1.5 <= time.monotonic() - start < 2.5
+    # 0.05, 0.1, 0.2, 0.4, 0.4, 0.4 s: nowhere near one call per 50 ms
+    assert len(calls) <= 8
+
+    threading.Timer(0.3, lambda: setattr(fake_rpc, "height", 5)).start()
+    assert waiter.wait_for_height(5, timeout=5) == 5
+    waiter.close()
+
+
+class DroppingSocket:
+    """A websocket which delivers one NewBlock event and then drops."""
+
+    def __init__(self):
+        block = {"block": {"header": {"height": "3"}}}
+        data = {"type": "tendermint/event/NewBlock", "value": block}
+        self.messages = [{"result": {}}, {"result": {"data": data}}]
+
+    def send(self, msg):
+        pass
+
+    def settimeout(self, timeout):
+        pass
+
+    def recv(self):
+        time.sleep(0.2)
+        if not self.messages:
+            raise OSError("connection dropped")
+        return json.dumps(self.messages.pop(0))
+
+    def close(self):
+        pass
+
+
+def test_chain_waiter_falls_back_to_polling(fake_rpc, monkeypatch):
+    class FakeWebsocket:
+        WebSocketException = Exception
+
+        @staticmethod
+        def create_connection(url, timeout):
+            return DroppingSocket()
+
+    monkeypatch.setattr(chain_waiter, "websocket", FakeWebsocket)
+    waiter = chain_waiter.ChainWaiter(fake_rpc.url)
+    assert waiter.subscribed
+    assert waiter.wait_until(lambda: waiter.height() == 3, timeout=5)
+
+    # once the subscription drops, waits carry on by polling
+    waiter.wait_until(lambda: not waiter.subscribed, timeout=5)
+    fake_rpc.height = 7
+    assert waiter.wait_for_height(7, timeout=5) == 7
+    waiter.close()
+
+
+def test_chain_waiter_wait_for_tx(fake_rpc, monkeypatch):
+    monkeypatch.setattr(chain_waiter, "websocket", None)
+    ledger = Ledger()
+    server = StandinServer(ledger).start()
+    client = ApiClient(server.url)
+    try:
+        waiter = chain_waiter.ChainWaiter(fake_rpc.url, client)
+        txhash = ledger.txs[-1]["TxHash"]
+        assert waiter.wait_for_tx(txhash, timeout=5)["TxHash"] == txhash
+        with pytest.raises(TimeoutError):
+            waiter.wait_for_tx("no-such-tx", timeout=0.5)
+        waiter.close()
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
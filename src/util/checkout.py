@@ -0,0 +1,128 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""
+Check out the repositories listed in conf.toml from a local mirror cache.
+
+Each distinct remote is mirrored once into a bare repository under the cache
+directory; later runs only fetch what changed. Checkouts are git worktrees of
+a mirror, detached at the requested label, so they share its objects and are
+created without copying history. Remotes are fetched concurrently, and
+sections which name the same remote (e.g. `chaostool` and `ndautool`) share a
+single mirror, and a single worktree when they also share label and path.
+
+`python -m src.util.checkout [CACHE_DIR]` checks out every repo in conf.toml
+under `$GOPATH/src`.
+"""
+
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from src.util import conf, xproc
+from src.util.repo import gopath
+from src.util.subp import subp
+
+DEFAULT_CACHE = os.path.expanduser("~/.cache/ndau-integration-tests/mirrors")
+
+
+def git(*args, **kwargs):
+    return subp(["git"] + list(args), env=None, **kwargs)
+
+
+class CheckoutManager:
+    """
+    Mirror remotes into `cache_dir` and check them out as worktrees.
+
+    `workers` bounds how many remotes are fetched at once.
+    """
+
+    def __init__(self, cache_dir, *, workers=4):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.workers = workers
+
+    def mirror_path(self, remote):
+        name = re.sub(r"[^A-Za-z0-9._-]+", "_", remote).strip("_")
+        if not name.endswith(".git"):
+            name += ".git"
+        return os.path.join(self.cache_dir, name)
+
+    def fetch(self, remote):
+        """Create or update the mirror of `remote`, and return its path."""
+        path = self.mirror_path(remote)
+        with xproc.lock(f"mirror-{os.path.basename(path)}"):
+            if os.path.exists(path):
+                git("-C", path, "remote", "update", "--prune")
+            else:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                git("clone", "--mirror", "--quiet", remote, path)
+        return path
+
+    def fetch_all(self, remotes):
+        """Update the mirrors of all distinct `remotes` concurrently."""
+        remotes = list(dict.fromkeys(remotes))
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+            return dict(zip(remotes, executor.map(self.fetch, remotes)))
+
+    def worktrees(self, mirror):
+        """Return the real paths of the worktrees of `mirror`."""
+        porcelain = git("-C", mirror, "worktree", "list", "--porcelain")
+        return {
+            os.path.realpath(line[len("worktree ") :])
+            for line in porcelain.splitlines()
+            if line.startswith("worktree ")
+        }
+
+    def worktree(self, remote, label, path):
+        """
+        Check `remote` out at `label` in `path`, which must be empty or a
+        worktree of the same mirror. The mirror must have been fetched.
+        """
+        mirror = self.mirror_path(remote)
+        path = os.path.abspath(path)
+        commit = git("-C", mirror, "rev-parse", "--verify", f"{label}^{{commit}}")
+        if os.path.exists(os.path.join(path, ".git")):
+            if os.path.realpath(path) not in self.worktrees(mirror):
+                raise Exception(f"'{path}' is not a worktree of the mirror of {remote}")
+            git("-C", path, "checkout", "--quiet", "--detach", commit)
+        else:
+            if os.path.isdir(path) and os.listdir(path):
+                raise Exception(f"'{path}' is not empty and not a git worktree")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            git("-C", mirror, "worktree", "prune")
+            git("-C", mirror, "worktree", "add", "--quiet", "--detach", path, commit)
+        return path
+
+    def checkout(self, conf, root):
+        """
+        Check out every section of `conf` (as loaded from conf.toml).
+
+        Each section's `repo` is checked out at its `label` under
+        `root/<logical>`. Returns the path of each section.
+        """
+        self.fetch_all(section["repo"] for section in conf.values())
+        paths = {}
+        done = {}
+        for name, section in conf.items():
+            path = os.path.join(root, section["logical"])
+            key = (section["repo"], section["label"], path)
+            if key not in done:
+                if path in done.values():
+                    raise Exception(f"conflicting checkouts requested at {path}")
+                done[key] = self.worktree(section["repo"], section["label"], path)
+            paths[name] = done[key]
+        return paths
+
+
+if __name__ == "__main__":
+    cache_dir = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CACHE
+    root = os.path.join(gopath(), "src")
+    for name, path in CheckoutManager(cache_dir).checkout(conf.load(), root).items():
+        print(f"{name}: {path}")
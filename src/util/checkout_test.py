@@ -0,0 +1,85 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""Check out local repositories through `CheckoutManager`."""
+
+import os
+
+import pytest
+
+from src.util.checkout import CheckoutManager, git
+
+
+def make_remote(path, branches):
+    """Create a git repository at `path` with one commit on each of `branches`."""
+    git("init", "--quiet", path)
+    for branch in branches:
+        git("-C", path, "checkout", "--quiet", "-B", branch)
+        with open(os.path.join(path, "branch"), "w") as f:
+            f.write(branch)
+        git("-C", path, "add", "branch")
+        git(
+            "-C",
+            path,
+            "-c",
+            "user.name=test",
+            "-c",
+            "user.email=test@example.com",
+            "commit",
+            "--quiet",
+            "-m",
+            branch,
+        )
+    return f"file://{path}"
+
+
+def test_checkout_manager(tmp_path):
+    chaos = make_remote(str(tmp_path / "chaos"), ["master"])
+    commands = make_remote(str(tmp_path / "commands"), ["master", "feature"])
+    conf = {
+        "chaos-go": {
+            "repo": chaos,
+            "logical": "github.com/ndau/chaos",
+            "label": "master",
+        },
+        "chaostool": {
+            "repo": commands,
+            "logical": "github.com/ndau/commands",
+            "label": "feature",
+        },
+        "ndautool": {
+            "repo": commands,
+            "logical": "github.com/ndau/commands",
+            "label": "feature",
+        },
+    }
+    manager = CheckoutManager(str(tmp_path / "cache"))
+    root = tmp_path / "gopath" / "src"
+
+    paths = manager.checkout(conf, str(root))
+
+    # the shared remote is mirrored once, and checked out once
+    assert len(os.listdir(str(tmp_path / "cache"))) == 2
+    assert paths["chaostool"] == paths["ndautool"]
+    with open(os.path.join(paths["ndautool"], "branch")) as f:
+        assert f.read() == "feature"
+
+    # a second run only updates the mirrors and moves the worktrees
+    conf["chaostool"]["label"] = conf["ndautool"]["label"] = "master"
+    paths = manager.checkout(conf, str(root))
+    with open(os.path.join(paths["ndautool"], "branch")) as f:
+        assert f.read() == "master"
+
+    # a checkout which isn't a worktree of the mirror is left alone
+    foreign = str(root / "github.com" / "ndau" / "foreign")
+    git("clone", "--quiet", chaos, foreign)
+    with pytest.raises(Exception, match="not a worktree"):
+        manager.worktree(chaos, "master", foreign)
+    with pytest.raises(Exception, match="not a worktree"):
+        manager.worktree(commands, "master", paths["chaos-go"])
@@ -0,0 +1,117 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""Record how long each ndau and keytool subcommand takes."""
+
+import json
+import shlex
+import threading
+
+from src.util.stats import Histogram
+
+# Subcommands which are only groups; their verb includes the next word too,
+# e.g. `account query` or `sysvar set`.
+GROUPS = frozenset(("account", "sysvar", "ed", "hd"))
+
+
+def verb_of(cmd):
+    """
+    Return the subcommand verb of a tool command line, without the binary.
+
+    Flags are skipped, so `-j transfer --napu=1 a b` is a `transfer`.
+    """
+    try:
+        words = shlex.split(cmd)
+    except ValueError:
+        words = cmd.split()
+    words = [word for word in words if not word.startswith("-")]
+    if not words:
+        return "(none)"
+    if words[0] in GROUPS and len(words) > 1:
+        return " ".join(words[:2])
+    return words[0]
+
+
+class VerbStats:
+    """Latency histogram, failure count and output size of one verb's calls."""
+
+    def __init__(self):
+        self.histogram = Histogram()
+        self.failures = 0
+        self.output_bytes = 0
+
+
+class CommandStats:
+    """
+    Thread-safe collection of subcommand timings, keyed by tool and verb.
+
+    Each verb's calls are recorded into a `VerbStats`, so memory stays flat
+    however many commands a session runs. `recorder(tool, cmd)` returns a
+    callback suitable for `subp`'s `record` argument.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.verbs = {}
+
+    def __bool__(self):
+        return bool(self.verbs)
+
+    def add(self, tool, verb, seconds, returncode, output_bytes):
+        with self._lock:
+            stats = self.verbs.setdefault((tool, verb), VerbStats())
+            stats.histogram.record(seconds)
+            if returncode != 0:
+                stats.failures += 1
+            stats.output_bytes += output_bytes
+
+    def recorder(self, tool, cmd):
+        verb = verb_of(cmd)
+        return lambda *call: self.add(tool, verb, *call)
+
+    def to_dict(self):
+        """Return per-verb statistics, slowest verb in total first."""
+        with self._lock:
+            rows = [
+                {
+                    "tool": tool,
+                    "verb": verb,
+                    "failures": stats.failures,
+                    "total_seconds": stats.histogram.total / 1e6,
+                    "output_bytes": stats.output_bytes,
+                    "count": stats.histogram.count,
+                    "mean": stats.histogram.total / stats.histogram.count / 1e6,
+                    "p50": stats.histogram.percentile(50),
+                    "p95": stats.histogram.percentile(95),
+                    "p99": stats.histogram.percentile(99),
+                    "max": stats.histogram.max / 1e6,
+                }
+                for (tool, verb), stats in self.verbs.items()
+            ]
+        rows.sort(key=lambda row: row["total_seconds"], reverse=True)
+        return {"verbs": rows}
+
+    def write(self, path):
+        with open(path, "w") as fp:
+            json.dump(self.to_dict(), fp, indent=2)
+
+    def report(self):
+        """Return a table of counts and latencies per verb, as lines of text."""
+        lines = [
+            f"{'command':<28} {'count':>6} {'fail':>5} {'total s':>9} "
+            f"{'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'out KiB':>9}"
+        ]
+        for row in self.to_dict()["verbs"]:
+            lines.append(
+                f"{row['tool'] + ' ' + row['verb']:<28} {row['count']:>6} "
+                f"{row['failures']:>5} {row['total_seconds']:>9.2f} "
+                f"{row['p50'] * 1000:>9.1f} {row['p95'] * 1000:>9.1f} "
+                f"{row['max'] * 1000:>9.1f} {row['output_bytes'] / 1024:>9.1f}"
+            )
+        return lines
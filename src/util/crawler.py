@@ -0,0 +1,132 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""
+Walk the whole chain through ndauapi and verify that its blocks link up.
+
+Blocks are fetched in `/block/range` windows of up to `MAX_WINDOW` blocks,
+several windows at a time, and checked in height order: the `last_block_id`
+of every header must be the `block_id` of the block before it. Progress can
+be saved to a checkpoint file after every verified window, so a later crawl
+of a long-lived chain only fetches the blocks added since.
+"""
+
+import json
+import os
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from src.util.decode import decode_json
+
+# the most blocks ndauapi returns from one /block/range request
+MAX_WINDOW = 100
+
+Break = namedtuple("Break", ["height", "want", "got"])
+CrawlReport = namedtuple(
+    "CrawlReport", ["first", "last", "blocks", "seconds", "breaks"]
+)
+
+
+def blocks_per_second(report):
+    return report.blocks / report.seconds if report.seconds else 0.0
+
+
+def load_checkpoint(path):
+    """Return the (height, hash) saved at `path`, or None if there is none."""
+    try:
+        with open(path, "rt") as fp:
+            data = json.load(fp)
+    except FileNotFoundError:
+        return None
+    return data["height"], data["hash"]
+
+
+def save_checkpoint(path, height, block_hash):
+    tmp = f"{path}.tmp"
+    with open(tmp, "wt") as fp:
+        json.dump({"height": height, "hash": block_hash}, fp)
+    os.replace(tmp, path)
+
+
+def fetch_window(client, first, last):
+    """Return the block metas of heights `first` to `last`, in height order."""
+    resp = client.get(f"/block/range/{first}/{last}")
+    resp.raise_for_status()
+    metas = sorted(
+        decode_json(resp)["block_metas"], key=lambda m: m["header"]["height"]
+    )
+    heights = [m["header"]["height"] for m in metas]
+    if heights != list(range(first, last + 1)):
+        raise ValueError(f"/block/range/{first}/{last} returned heights {heights}")
+    return metas
+
+
+def crawl(client, *, end=None, window=MAX_WINDOW, workers=4, checkpoint=None):
+    """
+    Verify the hash links of every block up to height `end`, by default the
+    current height, and return a `CrawlReport`.
+
+    With a `checkpoint` path, the crawl resumes after the block recorded
+    there, provided its hash is unchanged, and records its progress there.
+    The crawl stops at the first break in the chain.
+    """
+    window = min(window, MAX_WINDOW)
+    if end is None:
+        resp = client.get("/block/current")
+        resp.raise_for_status()
+        end = resp.json()["block_meta"]["header"]["height"]
+
+    first, prev_hash = 1, None
+    saved = load_checkpoint(checkpoint) if checkpoint else None
+    if saved is not None and saved[0] <= end:
+        height, prev_hash = saved
+        # a localnet which was reset since has different blocks
+        (meta,) = fetch_window(client, height, height)
+        if meta["block_id"]["hash"] == prev_hash:
+            first = height + 1
+        else:
+            prev_hash = None
+
+    start = time.perf_counter()
+    starts = iter(range(first, end + 1, window))
+    blocks = 0
+    breaks = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        # keep a bounded number of windows in flight, consumed in order
+        pending = deque()
+
+        def submit():
+            lo = next(starts, None)
+            if lo is not None:
+                hi = min(lo + window - 1, end)
+                pending.append(executor.submit(fetch_window, client, lo, hi))
+
+        for _ in range(2 * max(1, workers)):
+            submit()
+        while pending and not breaks:
+            metas = pending.popleft().result()
+            submit()
+            for meta in metas:
+                got = meta["header"]["last_block_id"]["hash"]
+                if prev_hash is not None and got != prev_hash:
+                    breaks.append(Break(meta["header"]["height"], prev_hash, got))
+                    break
+                prev_hash = meta["block_id"]["hash"]
+                blocks += 1
+            else:
+                if checkpoint:
+                    save_checkpoint(
+                        checkpoint, metas[-1]["header"]["height"], prev_hash
+                    )
+        for future in pending:
+            future.cancel()
+    return CrawlReport(
+        first, first + blocks - 1, blocks, time.perf_counter() - start, breaks
+    )
@@ -0,0 +1,65 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""
+Decode the JSON which the ndau tool and ndauapi produce.
+
+`ToolSession.json` and `decode_json`, for ndauapi responses, go through
+`loads`, which uses the optional `orjson` package when it is installed and the
+standard library otherwise. Arrays larger than `STREAM_THRESHOLD` bytes, or
+of unknown size, are decoded element by element by `iter_array` instead of
+being held in memory all at once.
+"""
+
+import json
+
+from src.util import jsonstream
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+STREAM_THRESHOLD = 1024 * 1024
+CHUNK_BYTES = 64 * 1024
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def loads(data):
+    """Decode the JSON document `data`, which may be `str` or `bytes`."""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson rejects some documents the standard library accepts,
+            # such as integers beyond 64 bits
+            pass
+    return json.loads(data)
+
+
+def decode_json(resp):
+    """Decode the body of the `requests.Response` `resp` with `loads`."""
+    return loads(resp.content)
+
+
+def iter_array(chunks, key=None, *, size=None):
+    """
+    Yield the elements of the JSON array in the byte iterable `chunks`.
+
+    The array is the whole document, or with `key`, the member `key` of the
+    top-level object. If `size`, the document's length, is known and below
+    `STREAM_THRESHOLD`, it is decoded in one go with `loads`; otherwise it is
+    decoded incrementally as chunks arrive.
+    """
+    if size is not None and size < STREAM_THRESHOLD:
+        doc = loads(b"".join(chunks))
+        yield from doc if key is None else doc[key]
+        return
+    yield from jsonstream.iter_array(jsonstream.decode_chunks(chunks), key)
@@ -0,0 +1,66 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""
+Parse and format ndau durations such as `3m`, `1y1m5d` and `2m3dt5h7m11s`.
+
+Like ndau's `math.Duration`, durations are counted in microseconds. A year is
+365 days and a month is 30 days. Before the `t`, `m` means months; after it,
+minutes.
+"""
+
+import re
+
+SECOND = 1_000_000
+MINUTE = 60 * SECOND
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+MONTH = 30 * DAY
+YEAR = 365 * DAY
+
+DURATION_RE = re.compile(
+    r"^(?:(?P<y>\d+)y)?(?:(?P<mo>\d+)m)?(?:(?P<d>\d+)d)?"
+    r"(?:t(?:(?P<h>\d+)h)?(?:(?P<mi>\d+)m)?(?:(?P<s>\d+(?:\.\d{1,6})?)s)?"
+    r"(?:(?P<us>\d+)us)?)?$"
+)
+
+UNITS = (("y", YEAR), ("mo", MONTH), ("d", DAY), ("h", HOUR), ("mi", MINUTE))
+
+
+def parse_duration(text):
+    """Return the number of microseconds in the duration `text`."""
+    match = DURATION_RE.match(text)
+    if match is None or text in ("", "t"):
+        raise ValueError(f"invalid duration: {text!r}")
+    us = sum(int(match[name] or 0) * unit for name, unit in UNITS)
+    if match["s"] is not None:
+        whole, _, frac = match["s"].partition(".")
+        us += int(whole) * SECOND + int(frac.ljust(6, "0"))
+    return us + int(match["us"] or 0)
+
+
+def format_duration(us):
+    """Return the ndau text form of a duration of `us` microseconds."""
+    out = ""
+    for suffix, unit in (("y", YEAR), ("m", MONTH), ("d", DAY)):
+        if us >= unit:
+            out += f"{us // unit}{suffix}"
+            us %= unit
+    time = ""
+    for suffix, unit in (("h", HOUR), ("m", MINUTE)):
+        if us >= unit:
+            time += f"{us // unit}{suffix}"
+            us %= unit
+    if us % SECOND:
+        time += f"{us // SECOND}.{us % SECOND:06d}".rstrip("0") + "s"
+    elif us or (out + time) == "":
+        time += f"{us // SECOND}s"
+    if time:
+        out += "t" + time
+    return out
@@ -0,0 +1,131 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""
+Reference model of ndau's EAI rate calculation, as served by /system/eai/rate.
+
+Rates are fixed-point with `RATE_DENOMINATOR` representing 100%, so
+40_000_000_000 is 4%.
+
+`eai_rates` evaluates the same model over whole arrays of accounts at once;
+it needs the optional `numpy` package.
+"""
+
+from src.util.duration import DAY, MONTH, YEAR, format_duration, parse_duration
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+RATE_DENOMINATOR = 1_000_000_000_000
+PERCENT = RATE_DENOMINATOR // 100
+
+# The default unlocked rate table: (minimum effective age, rate).
+# An account earns the rate of the last row whose age it has reached.
+UNLOCKED_RATE_TABLE = (
+    (0, 0),
+    (1 * MONTH, 2 * PERCENT),
+    (2 * MONTH, 3 * PERCENT),
+    (3 * MONTH, 4 * PERCENT),
+    (4 * MONTH, 5 * PERCENT),
+    (5 * MONTH, 6 * PERCENT),
+    (6 * MONTH, 7 * PERCENT),
+    (7 * MONTH, 8 * PERCENT),
+    (8 * MONTH, 9 * PERCENT),
+    (9 * MONTH, 10 * PERCENT),
+)
+
+# The default lock bonus table: (minimum notice period, bonus). ndauapi takes
+# each account's bonus as given, but real accounts get theirs from this table.
+LOCK_BONUS_TABLE = (
+    (0, 0),
+    (90 * DAY, 1 * PERCENT),
+    (180 * DAY, 2 * PERCENT),
+    (1 * YEAR, 3 * PERCENT),
+    (2 * YEAR, 4 * PERCENT),
+    (3 * YEAR, 5 * PERCENT),
+)
+
+
+def require_numpy():
+    if np is None:
+        raise RuntimeError("vectorized EAI rates need numpy: pip3 install numpy")
+
+
+def lookup(table, values):
+    """
+    Return the rate of the last row of `table` reached by each of `values`,
+    an array of microseconds.
+    """
+    require_numpy()
+    thresholds = np.array([row[0] for row in table], dtype=np.int64)
+    rates = np.array([row[1] for row in table], dtype=np.int64)
+    values = np.asarray(values, dtype=np.int64)
+    return rates[np.searchsorted(thresholds, values, side="right") - 1]
+
+
+def unlocked_rate(age_us):
+    """Return the unlocked EAI rate for an effective age in microseconds."""
+    rate = 0
+    for from_age, row_rate in UNLOCKED_RATE_TABLE:
+        if age_us < from_age:
+            break
+        rate = row_rate
+    return rate
+
+
+def eai_rate(waa_us, notice_us=0, bonus=0):
+    """
+    Return the EAI rate of an account.
+
+    A locked account is treated as though its weighted average age already
+    included its notice period, and additionally earns its lock bonus.
+    """
+    return unlocked_rate(waa_us + notice_us) + bonus
+
+
+def eai_rate_of(descriptor):
+    """
+    Return the EAI rate of an account descriptor as posted to /system/eai/rate.
+    """
+    waa = parse_duration(descriptor["weightedAverageAge"])
+    lock = descriptor.get("lock")
+    if lock is None:
+        return eai_rate(waa)
+    return eai_rate(waa, parse_duration(lock["noticePeriod"]), lock["bonus"])
+
+
+def descriptor(address, waa_us, notice_us=0, bonus=0, at="2019-04-03T13:13:22Z"):
+    """Return an account descriptor to post to /system/eai/rate."""
+    return {
+        "address": address,
+        "weightedAverageAge": format_duration(int(waa_us)),
+        "lock": {
+            "noticePeriod": format_duration(int(notice_us)),
+            "unlocksOn": None,
+            "bonus": int(bonus),
+        },
+        "at": at,
+    }
+
+
+def lock_bonuses(notice_us):
+    """Return the default lock bonus of each notice period in `notice_us`."""
+    return lookup(LOCK_BONUS_TABLE, notice_us)
+
+
+def eai_rates(waa_us, notice_us, bonus):
+    """
+    Return the EAI rate of each account, given arrays of their weighted
+    average ages, notice periods (0 if unlocked) and lock bonuses.
+    """
+    require_numpy()
+    waa_us = np.asarray(waa_us, dtype=np.int64)
+    return lookup(UNLOCKED_RATE_TABLE, waa_us + notice_us) + bonus
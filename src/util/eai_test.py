@@ -0,0 +1,45 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""Compare the vectorized EAI rate model with the scalar one."""
+
+import pytest
+
+from src.util.duration import DAY, YEAR
+from src.util.eai import (
+    LOCK_BONUS_TABLE,
+    UNLOCKED_RATE_TABLE,
+    descriptor,
+    eai_rate_of,
+    eai_rates,
+    lock_bonuses,
+    np,
+)
+
+
+@pytest.mark.skipif(np is None, reason="needs numpy")
+def test_eai_rates_match_scalar_model():
+    # every table boundary, a microsecond either side of it, and random ages
+    edges = [row[0] for row in UNLOCKED_RATE_TABLE + LOCK_BONUS_TABLE]
+    ages = sorted({max(0, e + d) for e in edges for d in (-1, 0, 1)})
+    rng = np.random.default_rng(0)
+    waa = np.concatenate([ages, rng.integers(0, 2 * YEAR, 1000)])
+    notice = np.concatenate([ages[::-1], rng.integers(0, 4 * YEAR, 1000)])
+    notice[rng.random(len(notice)) < 0.25] = 0
+    bonus = lock_bonuses(notice)
+
+    rates = eai_rates(waa, notice, bonus)
+    for i, rate in enumerate(rates):
+        assert rate == eai_rate_of(descriptor(str(i), waa[i], notice[i], bonus[i]))
+    assert lock_bonuses([0, 90 * DAY - 1, 90 * DAY, 3 * YEAR]).tolist() == [
+        0,
+        0,
+        10_000_000_000,
+        50_000_000_000,
+    ]
@@ -0,0 +1,109 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""
+Give accounts deep histories, and page through `/account/history`.
+
+`deepen` adds thousands of history items to an account by having a set of
+pool accounts send it 1 napu each, many times over: the transfers are
+pre-signed, and every sender's chain of them is submitted concurrently with
+the others'. `iter_history` then follows `Next` links page by page, timing
+each page against its offset into the history.
+"""
+
+import time
+from collections import namedtuple
+from urllib.parse import urlparse
+
+import requests
+
+from src.util.decode import decode_json
+from src.util.presign import Presigner, accepted, account_sequences, submit_chains
+
+# requests codes aren't technically members of their containing objects
+# pylint: disable=no-member
+
+Page = namedtuple("Page", ["offset", "items", "seconds"])
+
+
+def deepen(
+    ndau, keytool, client, account_pool, account_registry, target, depth, *, senders=16
+):
+    """
+    Add about `depth` items to the history of account `target` (a name).
+
+    Returns the number of transfers into `target` which were accepted.
+    """
+    senders = max(1, min(senders, depth))
+    per_sender = -(-depth // senders)
+    names = [account_pool.take() for _ in range(senders)]
+    addrs = [account_registry.address(name) for name in names]
+    sequences = account_sequences(client, addrs)
+
+    presigner = Presigner(ndau, keytool)
+    chains = []
+    for name, addr in zip(names, addrs):
+        template = ndau.json(f"-j transfer --napu=1 {name} {target}")
+        first = sequences[addr] + 1
+        chains.append(
+            presigner.resequence(
+                "Transfer",
+                template,
+                account_registry.validation_keys(name),
+                range(first, first + per_sender),
+            )
+        )
+    submissions, _ = submit_chains(client, "Transfer", chains)
+    return sum(1 for s in submissions if accepted(s))
+
+
+def next_path(nxt):
+    """Turn a `Next` link into a path or URL the client can request."""
+    if urlparse(nxt).scheme:
+        return nxt
+    return "/" + nxt.lstrip("/")
+
+
+def iter_history(client, addr, *, limit=100, pages=None):
+    """
+    Yield every history item of the account at `addr`, one page at a time.
+
+    Each page fetched is appended to the list `pages`, if given, as a `Page`
+    of its offset, item count and latency.
+    """
+    path = f"/account/history/{addr}?limit={limit}"
+    offset = 0
+    while path:
+        start = time.perf_counter()
+        resp = client.get(path)
+        seconds = time.perf_counter() - start
+        assert resp.status_code == requests.codes.ok, resp.text
+        data = decode_json(resp)
+        items = data.get("Items") or []
+        if pages is not None:
+            pages.append(Page(offset, len(items), seconds))
+        yield from items
+        offset += len(items)
+        nxt = data.get("Next", "")
+        path = next_path(nxt) if nxt else None
+
+
+def depth_profile(pages, buckets=10):
+    """
+    Summarize page latency as a function of offset.
+
+    Returns `buckets` rows of [first offset, median seconds per page], one
+    per equal share of the pages in offset order.
+    """
+    profile = []
+    size = max(1, -(-len(pages) // buckets))
+    for i in range(0, len(pages), size):
+        group = sorted(p.seconds for p in pages[i : i + size])
+        profile.append([pages[i].offset, group[len(group) // 2]])
+    return profile
@@ -0,0 +1,135 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""
+Decode JSON incrementally from an iterable of text chunks.
+
+Only the value being decoded and the unread rest of the current chunk are
+held in memory, so a long array can be consumed element by element while it
+is still arriving from a pipe or socket.
+"""
+
+import codecs
+import json
+
+_decoder = json.JSONDecoder()
+WHITESPACE = " \t\n\r"
+DELIMITERS = WHITESPACE + ",:]}"
+
+
+def decode_chunks(chunks, encoding="utf-8"):
+    """Decode an iterable of byte chunks, even when they split characters."""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+
+class Reader:
+    """A cursor over an iterable of text chunks which JSON is decoded from."""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Read another chunk, dropping what was consumed. False at EOF."""
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Return the next non-whitespace character, or "" at EOF."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, chars):
+        char = self.peek()
+        if char == "" or char not in chars:
+            raise json.JSONDecodeError(f"expected one of {chars!r}", self.buf, self.pos)
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        # A decode of an incomplete value is retried only once the buffer has
+        # doubled, so a value spanning many chunks is decoded O(1) times.
+        need = 0
+        while True:
+            if self.eof or len(self.buf) - self.pos >= need:
+                try:
+                    value, end = _decoder.raw_decode(self.buf, self.pos)
+                except json.JSONDecodeError:
+                    if self.eof:
+                        raise
+                    need = 2 * (len(self.buf) - self.pos)
+                else:
+                    # a number may continue in the next chunk ("-3." or "1e")
+                    if (
+                        self.eof
+                        or self.buf[end - 1] in '"]}'
+                        or (end < len(self.buf) and self.buf[end] in DELIMITERS)
+                    ):
+                        self.pos = end
+                        return value
+                    need = len(self.buf) - self.pos + 1
+            self.fill()
+
+
+def iter_values(chunks):
+    """Yield each of a sequence of JSON values, e.g. newline-delimited JSON."""
+    reader = Reader(chunks)
+    while reader.peek():
+        yield reader.value()
+
+
+def iter_array(chunks, key=None):
+    """
+    Yield the elements of a JSON array one at a time.
+
+    The array is the whole document, or with `key`, the member `key` of the
+    top-level object; other members are decoded and discarded.
+    """
+    reader = Reader(chunks)
+    if key is not None:
+        reader.expect("{")
+        while True:
+            if reader.peek() == "}":
+                raise KeyError(key)
+            name = reader.value()
+            reader.expect(":")
+            if name == key:
+                break
+            reader.value()
+            if reader.expect(",}") == "}":
+                raise KeyError(key)
+    reader.expect("[")
+    if reader.peek() == "]":
+        reader.pos += 1
+        return
+    while True:
+        yield reader.value()
+        if reader.expect(",]") == "]":
+            return
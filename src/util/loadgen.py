@@ -0,0 +1,180 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""
+Generate load against ndauapi from asyncio clients.
+
+`closed_loop` runs a number of clients which each send a request, wait for
+the response and immediately send the next, for a fixed time. `sweep` does
+that at increasing concurrency levels, producing a scaling curve: throughput
+and latency percentiles per level.
+
+A closed loop only sends as fast as the server answers, so it never sees the
+queue that builds up when the server falls behind. `open_loop` instead sends
+requests on a fixed schedule, whether or not earlier ones have been answered,
+and measures each latency from when the request was meant to be sent.
+"""
+
+import asyncio
+import time
+
+from src.util.aioclient import Connection, run
+from src.util.stats import Histogram, summarize
+
+LEVELS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+def level_report(concurrency, latencies, errors, seconds):
+    """Summarize one load level as a dict."""
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": seconds,
+        "throughput": len(latencies) / seconds if seconds else 0.0,
+        "latency": summarize(latencies),
+    }
+
+
+async def _closed_loop(base_url, method, path, body, concurrency, seconds):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+
+    async def client():
+        nonlocal errors
+        conn = Connection(base_url)
+        try:
+            while time.perf_counter() < deadline:
+                sent = time.perf_counter()
+                try:
+                    resp = await asyncio.wait_for(
+                        conn.request(method, path, body), deadline - sent
+                    )
+                except asyncio.TimeoutError:
+                    # cut off at the deadline, whether stalled or just slow
+                    conn.close()
+                    break
+                except (OSError, asyncio.IncompleteReadError):
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - sent)
+                if resp.status >= 400:
+                    errors += 1
+        finally:
+            conn.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return level_report(concurrency, latencies, errors, time.perf_counter() - start)
+
+
+def closed_loop(base_url, method, path, body=None, *, concurrency=1, seconds=5.0):
+    """
+    Run `concurrency` clients requesting `method path` back to back for
+    `seconds`, and return a `level_report`.
+
+    Responses with an error status count as errors, but their latency is
+    still recorded. Requests still in flight at the end are abandoned, so a
+    level never overruns; if every request stalls, it reports none at all.
+    """
+    return run(_closed_loop(base_url, method, path, body, concurrency, seconds))
+
+
+def sweep(base_url, method, path, body=None, *, levels=LEVELS, seconds=5.0):
+    """Return the `closed_loop` report at each concurrency level in `levels`."""
+    return [
+        closed_loop(base_url, method, path, body, concurrency=n, seconds=seconds)
+        for n in levels
+    ]
+
+
+async def _open_loop(base_url, requests, rate, max_in_flight):
+    histogram = Histogram()
+    errors = 0
+    idle = []
+    connections = asyncio.Semaphore(max_in_flight)
+    chains = {}
+
+    async def send(intended, method, path, body):
+        nonlocal errors
+        async with connections:
+            conn = idle.pop() if idle else Connection(base_url)
+            try:
+                resp = await conn.request(method, path, body)
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+                conn.close()
+                errors += 1
+                return
+            idle.append(conn)
+        histogram.record(time.perf_counter() - intended)
+        if resp.status >= 400:
+            errors += 1
+
+    async def send_in_order(intended, chain, method, path, body):
+        # requests of one chain (e.g. one signer's txs) go out one at a time
+        lock = chains.setdefault(chain, asyncio.Lock())
+        async with lock:
+            await send(intended, method, path, body)
+
+    loop = asyncio.get_event_loop()
+    start = time.perf_counter()
+    tasks = []
+    for i, (method, path, body, chain) in enumerate(requests):
+        intended = start + i / rate
+        delay = intended - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if chain is None:
+            coro = send(intended, method, path, body)
+        else:
+            coro = send_in_order(intended, chain, method, path, body)
+        tasks.append(loop.create_task(coro))
+    await asyncio.gather(*tasks)
+    seconds = time.perf_counter() - start
+    for conn in idle:
+        conn.close()
+    return {
+        "target_rate": rate,
+        "requests": len(requests),
+        "errors": errors,
+        "seconds": seconds,
+        "achieved_rate": histogram.count / seconds if seconds else 0.0,
+        "latency": histogram.to_dict(),
+    }
+
+
+def open_loop(base_url, requests, rate, *, max_in_flight=1024):
+    """
+    Send `requests` at `rate` per second, on schedule, and return a report.
+
+    `requests` is a sequence of `(method, path, body, chain)`. Request `i` is
+    due `i / rate` seconds after the start, and its latency is measured from
+    then, so time spent waiting for a connection (at most `max_in_flight`
+    are open) or behind an earlier request counts against the server.
+    Requests sharing a `chain` other than None are sent one at a time, in
+    order, e.g. so that a signer's sequence numbers arrive in order.
+    """
+    return run(_open_loop(base_url, list(requests), rate, max_in_flight))
+
+
+def saturation(reports, *, min_ratio=0.95, max_error_rate=0.01):
+    """
+    Return the highest target rate which the server kept up with, or None.
+
+    The server keeps up with a rate if it completes at least `min_ratio` of
+    it and at most `max_error_rate` of the requests fail.
+    """
+    kept_up = [
+        r["target_rate"]
+        for r in reports
+        if r["achieved_rate"] >= min_ratio * r["target_rate"]
+        and r["errors"] <= max_error_rate * r["requests"]
+    ]
+    return max(kept_up) if kept_up else None
@@ -0,0 +1,29 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""Generate load against a server which never answers."""
+
+import socket
+import time
+
+from src.util.loadgen import closed_loop
+
+
+def test_closed_loop_stops_at_deadline_without_responses():
+    # a listening socket which is never accepted from: connections complete,
+    # but no request is ever answered
+    with socket.socket() as server:
+        server.bind(("127.0.0.1", 0))
+        server.listen(16)
+        url = f"http://127.0.0.1:{server.getsockname()[1]}"
+        start = time.perf_counter()
+        level = closed_loop(url, "GET", "/block/current", concurrency=4, seconds=0.5)
+        assert time.perf_counter() - start < 5
+    assert (level["requests"], level["errors"]) == (0, 0)
+    assert level["latency"]["p50"] is None
@@ -0,0 +1,124 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""
+Pre-sign ndau transactions and submit them through ndauapi.
+
+The ndau tool always signs a tx with the account's next sequence number, so
+it can't prepare more than one tx per account ahead of time. `Presigner`
+takes a tx which the tool emitted with `-j` and re-signs copies of it with
+any sequence numbers we like, so that thousands of txs can be prepared
+before a benchmark starts.
+"""
+
+import base64
+import json
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from src.util import txencode
+from src.util.accounts import account_states
+
+# requests codes aren't technically members of their containing objects
+# pylint: disable=no-member
+
+Submission = namedtuple("Submission", ["txtype", "sent", "seconds", "status", "body"])
+
+
+def account_sequences(client, addresses):
+    """Return the current sequence number of each of `addresses`."""
+    states = account_states(client, addresses)
+    return {addr: (states.get(addr) or {}).get("sequence", 0) for addr in addresses}
+
+
+class Presigner:
+    """
+    Sign copies of ndau transactions.
+
+    `ndau` and `keytool` are the fixtures of the same names. Signing runs on
+    `workers` threads, since each signature costs a keytool call.
+    """
+
+    def __init__(self, ndau, keytool, workers=8):
+        self.ndau = ndau
+        self.keytool = keytool
+        self.workers = workers
+
+    def signable_bytes_b64(self, txtype, tx):
+        """
+        Return the base64-encoded signable bytes of `tx`.
+
+        Types which `txencode` supports are encoded in-process; anything else
+        is left to the ndau tool.
+        """
+        try:
+            data = txencode.signable_bytes(txtype, tx)
+        except ValueError:
+            return self.ndau(f"signable-bytes {txtype}", input=json.dumps(tx))
+        return base64.b64encode(data).decode("utf8")
+
+    def sign(self, txtype, tx, private_keys):
+        """Return a copy of `tx` signed by one private key or a list of them."""
+        if isinstance(private_keys, str):
+            private_keys = [private_keys]
+        tx = dict(tx, signatures=None)
+        data = self.signable_bytes_b64(txtype, tx)
+        tx["signatures"] = [
+            self.keytool(f"sign {key} {data} --b64") for key in private_keys
+        ]
+        return tx
+
+    def resequence(self, txtype, template, private_keys, sequences):
+        """Return copies of `template`, one per sequence number, all signed."""
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(
+                executor.map(
+                    lambda seq: self.sign(
+                        txtype, dict(template, sequence=seq), private_keys
+                    ),
+                    sequences,
+                )
+            )
+
+
+def submit(client, txtype, tx):
+    """Submit `tx` to ndauapi and return a `Submission`."""
+    sent = time.perf_counter()
+    resp = client.post(f"/tx/submit/{txtype}", json=tx)
+    return Submission(
+        txtype, sent, time.perf_counter() - sent, resp.status_code, resp.text
+    )
+
+
+def submit_chains(client, txtype, chains):
+    """
+    Submit several chains of transactions concurrently.
+
+    The txs within each chain are submitted one after another, in order, so
+    that sequence numbers of a single account arrive in order; the chains
+    themselves run in parallel. ndauapi answers a submission once the tx has
+    been committed, so each `Submission.seconds` is a submit-to-commit latency.
+
+    Returns the list of `Submission`s and the wall time taken.
+    """
+
+    def run(chain):
+        return [submit(client, txtype, tx) for tx in chain]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, len(chains))) as executor:
+        results = [s for chain in executor.map(run, chains) for s in chain]
+    return results, time.perf_counter() - start
+
+
+def accepted(submission):
+    return submission.status == requests.codes.ok
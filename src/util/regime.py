@@ -0,0 +1,162 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""
+Manage chain-global fee and SIB regimes across a whole test session.
+
+Tests ask for a regime through the `zero_tx_fees`/`nonzero_tx_fees` and
+`zero_sib`/`max_sib` fixtures. Rather than setting the regime up and tearing
+it down around every test, `RegimeManager` leaves it in place and only
+commits a transaction when a test needs something different from what the
+chain already has; `schedule` orders tests so that happens as rarely as
+possible. The original fee script is restored once, at the end of the session.
+"""
+
+from src.util import constants, xproc
+
+FEE_FIXTURES = ("zero_tx_fees", "nonzero_tx_fees")
+SIB_FIXTURES = ("zero_sib", "max_sib")
+
+
+def regime_of(item):
+    """Return the (fee fixture, SIB fixture) a test item uses; either may be None."""
+    names = item.fixturenames
+    fee = next((name for name in FEE_FIXTURES if name in names), None)
+    sib = next((name for name in SIB_FIXTURES if name in names), None)
+    return fee, sib
+
+
+def schedule(items, *, by_module=False):
+    """
+    Reorder test items in place so that tests sharing a regime run together.
+
+    Tests which need no regime run first, in their original order; these
+    include every test outside of regime groups, so module-scoped fixtures
+    aren't split up. The rest follow grouped by fee regime, then SIB regime,
+    with groups and the tests within them in order of first appearance.
+
+    With `by_module`, tests are only reordered within their module, so that
+    every module runs as one block, e.g. to start each from a snapshot.
+
+    Returns the number of regime groups.
+    """
+    fee_rank = {None: -1}
+    sib_rank = {None: -1}
+    for item in items:
+        fee, sib = regime_of(item)
+        fee_rank.setdefault(fee, len(fee_rank))
+        sib_rank.setdefault(sib, len(sib_rank))
+
+    module_rank = {}
+    for item in items:
+        module_rank.setdefault(item.module, len(module_rank))
+
+    def regime_key(item):
+        fee, sib = regime_of(item)
+        if fee is None and sib is None:
+            return (-1, -1)
+        return (fee_rank[fee], sib_rank[sib])
+
+    def key(item):
+        if by_module:
+            return (module_rank[item.module],) + regime_key(item)
+        return regime_key(item)
+
+    # sorted() is stable, so each group keeps the collection order
+    items[:] = sorted(items, key=key)
+    return len({key(item) for item in items if regime_key(item) != (-1, -1)})
+
+
+class RegimeManager:
+    """
+    Put the chain into the fee and SIB regimes tests ask for.
+
+    `original_fee_script` is the fee script (without JSON quotes) the chain had
+    before the session started. When running serially, the manager remembers
+    what it last set and skips redundant transactions; when running in
+    parallel, other workers may have changed the chain in between, so it
+    re-reads the fee script and always records the price. Callers must hold
+    the `tx-fees` or `sib` lock, as appropriate.
+    """
+
+    def __init__(self, ndau, original_fee_script):
+        self.ndau = ndau
+        self.original_fee_script = original_fee_script
+        self._fee_script = original_fee_script
+        self._sib = None
+        self.fee_txs = 0
+        self.price_txs = 0
+        self.per_test_fee_txs = 0
+        self.per_test_price_txs = 0
+
+    def _trusted(self):
+        return not xproc.parallel()
+
+    def forget(self):
+        """Stop trusting what was last set, e.g. after the chain was reset."""
+        self._fee_script = None
+        self._sib = None
+
+    def current_fee_script(self):
+        if self._trusted() and self._fee_script is not None:
+            return self._fee_script
+        key = constants.TRANSACTION_FEE_SCRIPT_KEY
+        self._fee_script = self.ndau.json(f"sysvar get {key}")[key]
+        return self._fee_script
+
+    def _set_fee_script(self, script):
+        key = constants.TRANSACTION_FEE_SCRIPT_KEY
+        self.ndau(f"sysvar set {key} --json '\"{script}\"'")
+        self.fee_txs += 1
+        # Check that it worked.
+        assert self.ndau.json(f"sysvar get {key}")[key] == script
+        self._fee_script = script
+
+    def fees(self, fee_script):
+        """Make `fee_script` (as quoted JSON, like the constants) current."""
+        script = fee_script.strip('"')
+        if script != self.original_fee_script:
+            # setting it up and restoring it again
+            self.per_test_fee_txs += 2
+        if self.current_fee_script() != script:
+            self._set_fee_script(script)
+
+    def sib(self, regime):
+        """Make the SIB regime `"zero"` or `"max"` current."""
+        self.per_test_price_txs += 1
+        if self._trusted() and self._sib == regime:
+            return
+        if regime == "zero":
+            target_price = self.ndau.json("sib")["TargetPrice"]
+            self.ndau(f"record-price --nanocents {target_price}")
+        else:
+            self.ndau("record-price --nanocents 1")
+            # we can't validate any particular number for the outcome of SIB;
+            # what we can do, at least, is ensure it is non-0 when the market
+            # price is the minimum legal value
+            assert self.ndau.json("sib")["SIB"] > 0
+        self.price_txs += 1
+        self._sib = regime
+
+    def restore(self):
+        """Restore the original fee script, if it was changed."""
+        if self.current_fee_script() != self.original_fee_script:
+            self._set_fee_script(self.original_fee_script)
+
+    def report(self):
+        """Return a summary of the regime transactions, as lines of text."""
+        made = self.fee_txs + self.price_txs
+        per_test = self.per_test_fee_txs + self.per_test_price_txs
+        return [
+            f"fee script sysvar txs: {self.fee_txs} "
+            f"(per-test setup would have made {self.per_test_fee_txs})",
+            f"record-price txs: {self.price_txs} "
+            f"(per-test setup would have made {self.per_test_price_txs})",
+            f"sysvar and price txs avoided: {per_test - made}",
+        ]
@@ -0,0 +1,113 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""
+Keep ndautool.toml small, and look accounts up in it by name or address.
+
+Every test run creates accounts with `random_string` names such as
+`xfer1-0123456789abcdef`. The suite works on a compacted copy of the
+configuration without any of those, and `prune` archives them out of a
+long-lived configuration so the tool doesn't slow down run after run.
+"""
+
+import os
+import re
+import time
+
+import toml
+
+# names made by `random_string(prefix)`
+GENERATED_NAME = re.compile(r"-[a-z0-9]{16}$")
+
+
+def is_generated(account):
+    return GENERATED_NAME.search(account.get("name", "")) is not None
+
+
+def compact(conf):
+    """Return a copy of `conf` without any generated accounts."""
+    conf = dict(conf)
+    conf["accounts"] = [a for a in conf.get("accounts", []) if not is_generated(a)]
+    return conf
+
+
+def prune(conf_path):
+    """
+    Move every generated account out of the configuration at `conf_path`.
+
+    The full configuration is archived next to it first. Returns the archive
+    path and the number of accounts removed.
+    """
+    with open(conf_path, "rt") as conf_fp:
+        conf = toml.load(conf_fp)
+    compacted = compact(conf)
+    removed = len(conf.get("accounts", [])) - len(compacted["accounts"])
+    archive = f"{conf_path}.{time.strftime('%Y%m%d-%H%M%S')}"
+    os.replace(conf_path, archive)
+    with open(conf_path, "wt") as conf_fp:
+        toml.dump(compacted, conf_fp)
+    return archive, removed
+
+
+class AccountRegistry:
+    """
+    Index of the accounts in an ndautool.toml by name and by address.
+
+    The file is re-read only when it changes on disk, so lookups stay O(1)
+    however often the tool adds accounts in between.
+    """
+
+    def __init__(self, conf_path):
+        self.conf_path = conf_path
+        self._stamp = None
+        self.by_name = {}
+        self.by_address = {}
+
+    def refresh(self):
+        try:
+            stat = os.stat(self.conf_path)
+        except FileNotFoundError:
+            stamp, accounts = None, []
+        else:
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            if stamp == self._stamp:
+                return
+            with open(self.conf_path, "rt") as conf_fp:
+                accounts = toml.load(conf_fp).get("accounts", [])
+        self._stamp = stamp
+        self.by_name = {a["name"]: a for a in accounts}
+        self.by_address = {a["address"]: a for a in accounts if "address" in a}
+
+    def __contains__(self, name):
+        self.refresh()
+        return name in self.by_name
+
+    def __len__(self):
+        self.refresh()
+        return len(self.by_name)
+
+    def __getitem__(self, name):
+        """Return the configuration of account `name`, as in ndautool.toml."""
+        self.refresh()
+        return self.by_name[name]
+
+    def address(self, name):
+        return self[name]["address"]
+
+    def validation_keys(self, name):
+        """Return the private validation keys of account `name`."""
+        return [key["private"] for key in self[name].get("validation") or ()]
+
+    def ownership_key(self, name):
+        """Return the private ownership key of account `name`."""
+        return self[name]["ownership"]["private"]
+
+    def by_addr(self, address):
+        self.refresh()
+        return self.by_address[address]
@@ -0,0 +1,164 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""
+Snapshot and restore the data directories of a stopped localnet.
+
+A snapshot covers every directory under `~/.localnet/data`: the ndau,
+tendermint, noms and redis data of every node, including `ndau-0` and
+`tendermint-ndau-0`. Where the filesystem supports it (btrfs, XFS, APFS...)
+directories are cloned with `cp --reflink`, which shares blocks
+copy-on-write and takes about as long as listing the files. Elsewhere the
+snapshot is a fast gzip tarball.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import tarfile
+import time
+
+import requests
+
+from src.util.subp import subp
+
+LOCALNET_DATA = os.path.expanduser("~/.localnet/data")
+MANIFEST = "snapshot.json"
+TARBALL = "snapshot.tar.gz"
+
+
+def reflink_copy(src, dst):
+    """
+    Clone the tree `src` to `dst` copy-on-write.
+
+    Raises `subprocess.CalledProcessError` if the filesystem can't do it.
+    """
+    subp(["cp", "-a", "--reflink=always", src, dst], env=None)
+
+
+def remove(path):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.remove(path)
+
+
+class LocalnetSnapshot:
+    """
+    Capture the localnet's on-disk state in `path`, and put it back later.
+
+    `bin_dir` holds the commands repo scripts used to stop (`kill.sh`) and
+    start (`run.sh`) the localnet; `rpc_url` and `api_url` are polled after a
+    start until the node is serving again.
+
+    Callbacks registered with `on_restore` run after every restore, so that
+    fixtures can drop state which refers to the discarded chain. `dirty` is
+    for callers to mark that the chain may have moved on since the last
+    snapshot or restore.
+    """
+
+    def __init__(self, path, bin_dir, rpc_url, api_url, *, data_dir=LOCALNET_DATA):
+        self.path = path
+        self.bin_dir = bin_dir
+        self.rpc_url = rpc_url
+        self.api_url = api_url
+        self.data_dir = data_dir
+        self.restores = 0
+        self.restore_seconds = 0.0
+        self.dirty = False
+        self._callbacks = []
+
+    def on_restore(self, callback):
+        self._callbacks.append(callback)
+
+    def exists(self):
+        return os.path.exists(os.path.join(self.path, MANIFEST))
+
+    def manifest(self):
+        with open(os.path.join(self.path, MANIFEST)) as fp:
+            return json.load(fp)
+
+    def stop(self):
+        subp([os.path.join(self.bin_dir, "kill.sh")], env=None)
+
+    def start(self, timeout=120):
+        subp([os.path.join(self.bin_dir, "run.sh")], env=None)
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                status = requests.get(f"{self.rpc_url}/status", timeout=5)
+                health = requests.get(f"{self.api_url}/node/health", timeout=5)
+                if status.ok and health.ok:
+                    sync = status.json()["result"]["sync_info"]
+                    if int(sync["latest_block_height"]) > 0:
+                        return
+            except requests.RequestException:
+                pass
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"localnet did not come back within {timeout}s")
+            time.sleep(0.5)
+
+    def take(self):
+        """Stop the localnet, snapshot its data, and start it again."""
+        dirs = sorted(os.listdir(self.data_dir))
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.makedirs(self.path)
+        self.stop()
+        try:
+            mode = "reflink"
+            try:
+                for name in dirs:
+                    reflink_copy(
+                        os.path.join(self.data_dir, name), os.path.join(self.path, name)
+                    )
+            except subprocess.CalledProcessError:
+                mode = "tar"
+                for name in dirs:
+                    remove(os.path.join(self.path, name))
+                tarball = os.path.join(self.path, TARBALL)
+                with tarfile.open(tarball, "w:gz", compresslevel=1) as tar:
+                    for name in dirs:
+                        tar.add(os.path.join(self.data_dir, name), arcname=name)
+            with open(os.path.join(self.path, MANIFEST), "w") as fp:
+                json.dump({"mode": mode, "dirs": dirs, "taken": time.time()}, fp)
+        finally:
+            self.start()
+        self.dirty = False
+
+    def restore(self):
+        """Stop the localnet, put the snapshot back, and start it again."""
+        manifest = self.manifest()
+        start = time.perf_counter()
+        self.stop()
+        try:
+            for name in os.listdir(self.data_dir):
+                remove(os.path.join(self.data_dir, name))
+            if manifest["mode"] == "reflink":
+                for name in manifest["dirs"]:
+                    reflink_copy(
+                        os.path.join(self.path, name), os.path.join(self.data_dir, name)
+                    )
+            else:
+                with tarfile.open(os.path.join(self.path, TARBALL)) as tar:
+                    tar.extractall(self.data_dir)
+        finally:
+            self.start()
+        self.restores += 1
+        self.restore_seconds += time.perf_counter() - start
+        self.dirty = False
+        for callback in self._callbacks:
+            callback()
+
+    def report(self):
+        mode = self.manifest()["mode"] if self.exists() else "none"
+        return [
+            f"snapshot: {self.path} ({mode})",
+            f"restores: {self.restores} in {self.restore_seconds:.1f}s",
+        ]
@@ -0,0 +1,551 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""
+An in-process stand-in for ndauapi, backed by a seeded in-memory ledger.
+
+It implements the routes which the API tests use, with ndauapi's status
+codes, error messages and response shapes, so that tests which only check
+routing and validation can run without a chain. Nothing here validates
+signatures or applies transaction semantics beyond recording them.
+"""
+
+import base64
+import http.server
+import json
+import random
+import re
+import socketserver
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qs, urlparse
+
+import msgpack
+
+from src.util import constants, txencode
+from src.util.eai import eai_rate_of
+
+ADDRESS_ALPHABET = "abcdefghijkmnpqrstuvwxyz23456789"
+ADDRESS_RE = re.compile(f"^nd[{ADDRESS_ALPHABET}]{{46}}$")
+GENESIS_TIME = datetime(2019, 1, 1, tzinfo=timezone.utc)
+MAX_RANGE = 100
+DEFAULT_HISTORY_LIMIT = 100
+DEFAULT_TX_LIMIT = 10
+
+TX_TYPES = (
+    "Transfer",
+    "ChangeValidation",
+    "ReleaseFromEndowment",
+    "ChangeRecoursePeriod",
+    "Delegate",
+    "CreditEAI",
+    "Lock",
+    "Notify",
+    "SetRewardsDestination",
+    "SetValidation",
+    "Stake",
+    "RegisterNode",
+    "NominateNodeReward",
+    "ClaimNodeReward",
+    "TransferAndLock",
+    "CommandValidatorChange",
+    "UnregisterNode",
+    "Unstake",
+    "Issue",
+    "CreateChildAccount",
+    "RecordPrice",
+    "SetSysvar",
+    "SetStakeRules",
+    "RecordEndowmentNAV",
+    "ResolveStake",
+    "BurnAndMint",
+)
+
+
+class ApiError(Exception):
+    """An error response: `status` code with body `{"msg": msg}`."""
+
+    def __init__(self, status, msg):
+        super().__init__(msg)
+        self.status = status
+        self.msg = msg
+
+
+def bad(msg):
+    return ApiError(400, msg)
+
+
+def parse_int(text, what):
+    try:
+        return int(text)
+    except ValueError:
+        raise bad(f"{what} must be a number: strconv.Atoi: parsing {text!r}")
+
+
+def tx_hash(txtype, tx):
+    """
+    Return the hash of a transaction.
+
+    Supported tx types are hashed exactly like ndau does. Anything else, or
+    txs missing fields, get a stand-in hash which is only unique per tx.
+    """
+    try:
+        return txencode.tx_hash(txtype, tx)
+    except (KeyError, TypeError, ValueError):
+        pass
+    unsigned = {k: v for k, v in tx.items() if k not in ("signature", "signatures")}
+    data = (txtype + json.dumps(unsigned, sort_keys=True)).encode("utf8")
+    return txencode.hash_bytes(data)
+
+
+ZERO_FEE_SCRIPT = constants.ZERO_FEE_SCRIPT.strip('"')
+
+
+def block_time(block):
+    return datetime.strptime(block["header"]["time"], "%Y-%m-%dT%H:%M:%SZ")
+
+
+def msgpack_b64(value):
+    return base64.b64encode(msgpack.dumps(value)).decode("utf8")
+
+
+def new_account():
+    return {
+        "balance": 0,
+        "validationKeys": None,
+        "validationScript": None,
+        "rewardsTarget": None,
+        "incomingRewardsFrom": None,
+        "delegationNode": None,
+        "lock": None,
+        "stake_rules": None,
+        "costakers": None,
+        "holds": None,
+        "recourseSettings": {"period": "t1h", "changes_at": None, "next": None},
+        "currencySeatDate": None,
+        "parent": None,
+        "progenitor": None,
+        "weightedAverageAge": "t0s",
+        "sequence": 0,
+    }
+
+
+class Ledger:
+    """
+    Seeded in-memory chain state.
+
+    The same `seed` always produces the same accounts, blocks, transactions
+    and sysvars.
+    """
+
+    def __init__(self, seed=0, accounts=8, transfers=40):
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.blocks = []
+        self.txs = []
+        self.tx_index = {}
+        self.accounts = {}
+        self.history = {}
+        self.node_id = self.hex(20).lower()
+        self.sysvars = {
+            constants.TRANSACTION_FEE_SCRIPT_KEY: [(1, ZERO_FEE_SCRIPT)],
+            "SIBScript": [(1, ZERO_FEE_SCRIPT)],
+            constants.ACCOUNT_ATTRIBUTES_KEY: [(1, msgpack_b64({}))],
+        }
+
+        self.add_block([])
+        addrs = [self.address() for _ in range(accounts)]
+        for addr in addrs:
+            self.accounts[addr] = new_account()
+            self.history[addr] = []
+            self.commit(
+                "ReleaseFromEndowment",
+                {"destination": addr, "qty": 10**9, "sequence": len(self.txs) + 1},
+            )
+            self.commit("SetValidation", {"target": addr, "sequence": 1})
+        for i in range(transfers):
+            source, dest = self.rng.sample(addrs, 2)
+            self.commit(
+                "Transfer",
+                {"source": source, "destination": dest, "qty": 1, "sequence": i + 2},
+            )
+
+    def hex(self, nbytes):
+        return "".join(self.rng.choice("0123456789ABCDEF") for _ in range(2 * nbytes))
+
+    def address(self):
+        body = "".join(self.rng.choice(ADDRESS_ALPHABET) for _ in range(45))
+        return "nda" + body
+
+    @property
+    def height(self):
+        return len(self.blocks)
+
+    def add_block(self, txs):
+        height = len(self.blocks) + 1
+        last_id = self.blocks[-1]["block_id"] if self.blocks else {"hash": ""}
+        self.blocks.append(
+            {
+                "block_id": {"hash": self.hex(32)},
+                "header": {
+                    "chain_id": "localnet",
+                    "height": height,
+                    "time": (GENESIS_TIME + timedelta(seconds=height)).strftime(
+                        "%Y-%m-%dT%H:%M:%SZ"
+                    ),
+                    "num_txs": len(txs),
+                    "total_txs": len(self.txs),
+                    "last_block_id": last_id,
+                },
+            }
+        )
+        return height
+
+    def commit(self, txtype, tx):
+        """Record `tx` in a new block and return its hash."""
+        txhash = tx_hash(txtype, tx)
+        height = len(self.blocks) + 1
+        record = {
+            "BlockHeight": height,
+            "TxOffset": 0,
+            "Fee": 0,
+            "SIB": 0,
+            "TxHash": txhash,
+            "TxType": txtype,
+            "TxData": tx,
+        }
+        self.txs.append(record)
+        self.tx_index[txhash] = record
+        self.add_block([txhash])
+        self.apply(txtype, tx, txhash, height)
+        return txhash
+
+    def apply(self, txtype, tx, txhash, height):
+        qty = tx.get("qty", 0)
+        touched = []
+        if "source" in tx and tx["source"] in self.accounts:
+            self.accounts[tx["source"]]["balance"] -= qty
+            touched.append(tx["source"])
+        if "destination" in tx and tx["destination"] in self.accounts:
+            self.accounts[tx["destination"]]["balance"] += qty
+            touched.append(tx["destination"])
+        if "target" in tx and tx["target"] in self.accounts:
+            touched.append(tx["target"])
+        timestamp = self.blocks[-1]["header"]["time"]
+        for addr in touched:
+            acct = self.accounts[addr]
+            acct["sequence"] = max(acct["sequence"], tx.get("sequence", 0))
+            self.history[addr].append(
+                {
+                    "Balance": acct["balance"],
+                    "Timestamp": timestamp,
+                    "TxHash": txhash,
+                    "Height": height,
+                }
+            )
+        if txtype == "SetSysvar":
+            self.sysvars.setdefault(tx["name"], []).append((height, tx["value"]))
+
+
+ROUTES = []
+
+
+def route(method, pattern):
+    """Register the decorated `Handler` method for `method` requests to `pattern`."""
+
+    def decorate(fn):
+        ROUTES.append((method, re.compile(f"^{pattern}$"), fn))
+        return fn
+
+    return decorate
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    """Serve ndauapi routes from `self.server.ledger`."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def dispatch(self, method):
+        url = urlparse(self.path)
+        self.query = parse_qs(url.query)
+        length = int(self.headers.get("Content-Length") or 0)
+        self.body = self.rfile.read(length) if length else b""
+        status, payload = 404, {"msg": f"no route for {url.path}"}
+        for route_method, pattern, fn in ROUTES:
+            match = pattern.match(url.path)
+            if match is None or route_method != method:
+                continue
+            try:
+                with self.server.ledger.lock:
+                    result = fn(self, self.server.ledger, **match.groupdict())
+                status, payload = result if isinstance(result, tuple) else (200, result)
+            except ApiError as e:
+                status, payload = e.status, {"msg": e.msg}
+            break
+        data = json.dumps(payload, separators=(",", ":")).encode("utf8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def json_body(self):
+        try:
+            return json.loads(self.body)
+        except ValueError:
+            raise bad("could not parse request body as json")
+
+    def param(self, name, default):
+        values = self.query.get(name)
+        if not values:
+            return default
+        try:
+            return int(values[0])
+        except ValueError:
+            raise bad(
+                "error parsing paging parms: strconv.Atoi: "
+                f"parsing {json.dumps(values[0])}: invalid syntax"
+            )
+
+    # accounts
+
+    @route("POST", "/account/accounts")
+    def accounts(self, ledger):
+        addrs = self.json_body()
+        if not isinstance(addrs, list):
+            raise bad("could not parse request body as list of addresses")
+        for addr in addrs:
+            if not isinstance(addr, str) or not ADDRESS_RE.match(addr):
+                raise bad(f"could not validate address: {addr}")
+        return {addr: ledger.accounts.get(addr) for addr in addrs}
+
+    @route("GET", "/account/history/(?P<addr>[^/]*)")
+    def account_history(self, ledger, addr):
+        if addr == "":
+            raise bad("address parameter required")
+        if not ADDRESS_RE.match(addr):
+            raise bad(f"could not validate address: {addr}")
+        after = self.param("after", 0)
+        limit = self.param("limit", DEFAULT_HISTORY_LIMIT)
+        items = [i for i in ledger.history.get(addr, []) if i["Height"] > after]
+        page, rest = items[:limit], items[limit:]
+        nxt = ""
+        if rest:
+            nxt = f"account/history/{addr}?after={page[-1]['Height']}&limit={limit}"
+        return {"Items": page, "Next": nxt}
+
+    # blocks
+
+    def block_meta(self, ledger, height):
+        return ledger.blocks[height - 1]
+
+    def height_param(self, ledger, text, what):
+        height = parse_int(text, what)
+        if height < 1 or height > ledger.height:
+            raise bad(f"{what} must be between 1 and {ledger.height}")
+        return height
+
+    @route("GET", "/block/current")
+    def block_current(self, ledger):
+        return {"block_meta": self.block_meta(ledger, ledger.height), "block": {}}
+
+    @route("GET", "/block/height/(?P<height>[^/]*)")
+    def block_height(self, ledger, height):
+        height = self.height_param(ledger, height, "height")
+        return {"block_meta": self.block_meta(ledger, height), "block": {}}
+
+    @route("GET", "/block/range/(?P<first>[^/]*)/(?P<last>[^/]*)")
+    def block_range(self, ledger, first, last):
+        first = parse_int(first, "first")
+        last = parse_int(last, "last")
+        if first < 1:
+            raise bad("first must be at least 1")
+        if last < 1:
+            raise bad("last must be at least 1")
+        if first > last:
+            raise bad("first must not be greater than last")
+        if last - first + 1 > MAX_RANGE:
+            raise bad(f"range must not exceed {MAX_RANGE} blocks")
+        last = min(last, ledger.height)
+        return {
+            "last_height": ledger.height,
+            "block_metas": [
+                self.block_meta(ledger, h) for h in range(last, first - 1, -1)
+            ],
+        }
+
+    @route("GET", "/block/daterange/(?P<first>[^/]*)/(?P<last>[^/]*)")
+    def block_daterange(self, ledger, first, last):
+        try:
+            start = datetime.strptime(first, "%Y-%m-%dT%H:%M:%SZ")
+            end = datetime.strptime(last, "%Y-%m-%dT%H:%M:%SZ")
+        except ValueError:
+            raise bad("timestamps must be in RFC3339 format")
+        metas = [b for b in reversed(ledger.blocks) if start <= block_time(b) <= end]
+        return {"last_height": ledger.height, "block_metas": metas[:MAX_RANGE]}
+
+    @route("GET", "/block/hash/(?P<blockhash>[^/]*)")
+    def block_hash(self, ledger, blockhash):
+        if blockhash == "":
+            raise bad("blockhash parameter required")
+        for b in ledger.blocks:
+            if b["block_id"]["hash"] == blockhash:
+                return {"block_meta": b, "block": {}}
+        return None
+
+    @route("GET", "/block/transactions/(?P<height>[^/]*)")
+    def block_transactions(self, ledger, height):
+        height = self.height_param(ledger, height, "height")
+        return [t["TxHash"] for t in ledger.txs if t["BlockHeight"] == height]
+
+    # nodes
+
+    @route("GET", "/node/(?P<path>abci|consensus|genesis|health|net|nodes|status)")
+    def node_query(self, ledger, path):
+        if path == "health":
+            return {"Ndau": {"Status": "OK"}}
+        if path == "nodes":
+            return {"nodes": [{"node_info": self.node_info(ledger)}]}
+        if path == "status":
+            return {"node_info": self.node_info(ledger)}
+        return {"response": {"last_block_height": ledger.height}}
+
+    def node_info(self, ledger):
+        return {"id": ledger.node_id, "moniker": constants.LOCALNET0_MONIKER}
+
+    @route("GET", "/node/(?P<node_id>[^/]+)")
+    def node(self, ledger, node_id):
+        if node_id != ledger.node_id:
+            raise ApiError(404, f"could not find node: {node_id}")
+        return self.node_info(ledger)
+
+    # system
+
+    def current_sysvars(self, ledger, names):
+        return {n: ledger.sysvars[n][-1][1] for n in names if n in ledger.sysvars}
+
+    @route("GET", "/system/all")
+    def system_all(self, ledger):
+        return self.current_sysvars(ledger, ledger.sysvars)
+
+    @route("GET", "/system/get/(?P<names>[^/]*)")
+    def system_get(self, ledger, names):
+        return self.current_sysvars(ledger, names.split(","))
+
+    @route("GET", "/system/history/(?P<name>[^/]*)")
+    def system_history(self, ledger, name):
+        if name == "":
+            raise bad("name parameter required")
+        after = self.param("after", 0)
+        limit = self.param("limit", DEFAULT_HISTORY_LIMIT)
+        entries = [e for e in ledger.sysvars.get(name, []) if e[0] > after]
+        page, rest = entries[:limit], entries[limit:]
+        nxt = ""
+        if rest:
+            nxt = f"system/history/{name}?after={page[-1][0]}&limit={limit}"
+        return {"history": [{"height": h, "value": v} for h, v in page], "next": nxt}
+
+    @route("POST", "/system/set/(?P<name>[^/]*)")
+    def system_set(self, ledger, name):
+        return {
+            "name": name,
+            "value": msgpack_b64(self.json_body()),
+            "sequence": 0,
+            "signatures": None,
+        }
+
+    @route("POST", "/system/eai/rate")
+    def eai_rate(self, ledger):
+        descriptors = self.json_body() if self.body else None
+        if not isinstance(descriptors, list):
+            raise bad("could not parse request body as list of accounts")
+        try:
+            return [
+                {"address": d["address"], "eairate": eai_rate_of(d)}
+                for d in descriptors
+            ]
+        except (KeyError, TypeError, ValueError) as e:
+            raise bad(f"could not parse account: {e}")
+
+    # transactions
+
+    @route("GET", "/transaction/before/(?P<txhash>[^/]*)")
+    def transaction_before(self, ledger, txhash):
+        if txhash == "":
+            raise bad("txhash parameter required")
+        types = set(self.query.get("type", []))
+        limit = self.param("limit", DEFAULT_TX_LIMIT)
+        txs = [t for t in reversed(ledger.txs) if not types or t["TxType"] in types]
+        if txhash != "start":
+            positions = [i for i, t in enumerate(txs) if t["TxHash"] == txhash]
+            if not positions:
+                return {"Txs": None, "NextTxHash": ""}
+            txs = txs[positions[0] :]
+        page, rest = txs[:limit], txs[limit:]
+        return {"Txs": page or None, "NextTxHash": rest[0]["TxHash"] if rest else ""}
+
+    @route("GET", "/transaction/(?P<txhash>[^/]*)")
+    def transaction(self, ledger, txhash):
+        if txhash == "":
+            raise bad("txhash parameter required")
+        return ledger.tx_index.get(txhash)
+
+    @route("POST", "/tx/(?P<action>prevalidate|submit)/(?P<txtype>[^/]*)")
+    def tx(self, ledger, action, txtype):
+        if txtype not in TX_TYPES:
+            raise bad(f"unknown tx type: {txtype}")
+        tx = self.json_body()
+        if not isinstance(tx, dict):
+            raise bad("could not parse tx")
+        txhash = tx_hash(txtype, tx)
+        if txhash in ledger.tx_index:
+            return 202, {"hash": txhash, "msg": "tx already committed"}
+        if action == "submit":
+            ledger.commit(txtype, tx)
+            return {"hash": txhash}
+        return {"fee_napu": 0, "sib_napu": 0, "hash": txhash}
+
+
+class StandinServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """HTTP server answering ndauapi requests from `ledger`."""
+
+    daemon_threads = True
+    # like a Go server's listen backlog; the default of 5 drops connections
+    # from load tests' concurrent clients, which then wait on SYN retries
+    request_queue_size = 128
+
+    def __init__(self, ledger, address=("127.0.0.1", 0)):
+        super().__init__(address, Handler)
+        self.ledger = ledger
+
+    def handle_error(self, request, client_address):
+        # load tests hang up on the requests still in flight when they stop
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve requests from a background thread."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
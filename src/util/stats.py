@@ -0,0 +1,106 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""Summary statistics for latency measurements."""
+
+import math
+
+
+def percentile(values, pct):
+    """
+    Return the `pct`th percentile of `values` using the nearest-rank method.
+
+    `values` must already be sorted.
+    """
+    if len(values) == 0:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(values)))
+    return values[rank - 1]
+
+
+def summarize(values):
+    """Summarize a collection of latencies (in seconds) as a dict."""
+    values = sorted(values)
+    count = len(values)
+    return {
+        "count": count,
+        "mean": sum(values) / count if count else None,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": values[-1] if count else None,
+    }
+
+
+class Histogram:
+    """
+    HDR-style latency histogram.
+
+    Values are recorded in whole microseconds into log-linear buckets: exact
+    below `2**sub_bits`, and above that to within a relative error of
+    `2**(1 - sub_bits)` (0.1% by default), so memory stays small however many
+    values are recorded and however widely they spread.
+    """
+
+    def __init__(self, sub_bits=11):
+        self.sub_bits = sub_bits
+        self.sub_count = 1 << sub_bits
+        self.half = self.sub_count >> 1
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _index(self, us):
+        if us < self.sub_count:
+            return us
+        shift = us.bit_length() - self.sub_bits
+        return self.sub_count + (shift - 1) * self.half + (us >> shift) - self.half
+
+    def _highest(self, index):
+        """Return the highest value, in microseconds, which maps to `index`."""
+        if index < self.sub_count:
+            return index
+        shift = (index - self.sub_count) // self.half + 1
+        mantissa = (index - self.sub_count) % self.half + self.half
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, seconds):
+        us = max(0, int(round(seconds * 1e6)))
+        index = self._index(us)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += us
+        self.min = us if self.min is None else min(self.min, us)
+        self.max = us if self.max is None else max(self.max, us)
+
+    def percentile(self, pct):
+        """Return the `pct`th percentile in seconds, or None if empty."""
+        if self.count == 0:
+            return None
+        rank = max(1, math.ceil(pct / 100 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._highest(index), self.max) / 1e6
+
+    def to_dict(self, percentiles=(50, 90, 99, 99.9, 99.99)):
+        """Summarize the histogram in seconds, including its non-empty buckets."""
+        return {
+            "count": self.count,
+            "mean": self.total / self.count / 1e6 if self.count else None,
+            "min": self.min / 1e6 if self.count else None,
+            "max": self.max / 1e6 if self.count else None,
+            "percentiles": {str(p): self.percentile(p) for p in percentiles},
+            "buckets": [
+                [self._highest(i) / 1e6, n] for i, n in sorted(self.counts.items())
+            ],
+        }
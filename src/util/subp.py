@@ -10,7 +10,16 @@
 """Define a subprocess shortcut."""
 
 import os
+import shlex
 import subprocess
+import time
+from collections import deque
+
+from src.util.jsonstream import decode_chunks, iter_array, iter_values
+
+# how much of a failed command's output is kept for its error and log
+TAIL_BYTES = 64 * 1024
+CHUNK_BYTES = 64 * 1024
 
 
 def ndenv(*extras):
@@ -35,6 +44,7 @@ def subp(
     stderr=subprocess.DEVNULL,
     timeout=None,
     env={},
+    record=None,
     **kwargs,
 ):
     """
@@ -43,12 +53,17 @@ def subp(
     `stderr` is passed through to the subprocess.run command.
     `timeout` is passed through to the subprocess.run command.
 
-    This uses `shell=True` to simplify inputs, but this means that this
-    _must not_ be used with user input; that's just not safe.
+    If `cmd` is a string, this uses `shell=True` to simplify inputs, but this
+    means that this _must not_ be used with user input; that's just not safe.
+    If `cmd` is a list, it is executed directly without an intermediate shell.
+
+    If `record` is given, it is called with the wall time in seconds, the
+    return code and the size of the captured output once the command exits.
     """
+    start = time.perf_counter()
     subr = subprocess.run(
         cmd,
-        shell=True,
+        shell=isinstance(cmd, str),
         stdout=stdout,
         stderr=stderr,
         timeout=timeout,
@@ -56,22 +71,133 @@ def subp(
         env=env,
         **kwargs,
     )
+    if record is not None:
+        record(
+            time.perf_counter() - start,
+            subr.returncode,
+            len(subr.stdout or "") if stdout == subprocess.PIPE else 0,
+        )
     subr.check_returncode()
     if stdout == subprocess.PIPE:
         return subr.stdout.strip()
 
 
+def clip(text, limit=TAIL_BYTES):
+    """Return the last `limit` characters of `text`, noting what was cut."""
+    if text is None or len(text) <= limit:
+        return text
+    return f"[... {len(text) - limit} characters omitted ...]\n{text[-limit:]}"
+
+
+class Tail:
+    """Ring buffer keeping the last `limit` bytes written to it."""
+
+    def __init__(self, limit=TAIL_BYTES):
+        self.limit = limit
+        self.chunks = deque()
+        self.size = 0
+        self.dropped = 0
+
+    def write(self, data):
+        self.chunks.append(data)
+        self.size += len(data)
+        while self.size - len(self.chunks[0]) >= self.limit:
+            self.size -= len(self.chunks[0])
+            self.dropped += len(self.chunks.popleft())
+
+    def text(self):
+        data = b"".join(self.chunks)
+        dropped = self.dropped + max(0, len(data) - self.limit)
+        text = data[-self.limit :].decode("utf8", errors="replace")
+        if dropped:
+            return f"[... {dropped} bytes omitted ...]\n{text}"
+        return text
+
+
+def stream_chunks(
+    cmd,
+    *,
+    stderr=subprocess.DEVNULL,
+    env={},
+    record=None,
+    tail=TAIL_BYTES,
+    chunk_size=CHUNK_BYTES,
+    **kwargs,
+):
+    """
+    Run a command, yielding its stdout as byte chunks while it runs.
+
+    Nothing is accumulated but the last `tail` bytes, which become the
+    `output` of the `subprocess.CalledProcessError` raised once the command
+    exits unsuccessfully. Closing the generator early kills the command.
+    `cmd`, `stderr`, `env` and `record` are as for `subp`.
+    """
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        cmd,
+        shell=isinstance(cmd, str),
+        stdout=subprocess.PIPE,
+        stderr=stderr,
+        env=env,
+        **kwargs,
+    )
+    last = Tail(tail)
+    size = 0
+    try:
+        while True:
+            data = proc.stdout.read1(chunk_size)
+            if not data:
+                break
+            last.write(data)
+            size += len(data)
+            yield data
+        returncode = proc.wait()
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+    if record is not None:
+        record(time.perf_counter() - start, returncode, size)
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd, output=last.text())
+
+
+def stream(cmd, **kwargs):
+    """Run a command, yielding each line of its stdout without the newline."""
+    partial = ""
+    for text in decode_chunks(stream_chunks(cmd, **kwargs)):
+        lines = (partial + text).split("\n")
+        partial = lines.pop()
+        yield from lines
+    if partial:
+        yield partial
+
+
+def stream_json(cmd, **kwargs):
+    """Run a command, yielding each JSON value it prints as soon as it ends."""
+    yield from iter_values(decode_chunks(stream_chunks(cmd, **kwargs)))
+
+
+def stream_array(cmd, key=None, **kwargs):
+    """
+    Run a command printing a JSON array, or with `key` an object holding one
+    as member `key`, and yield each element as soon as it is complete.
+    """
+    yield from iter_array(decode_chunks(stream_chunks(cmd, **kwargs)), key)
+
+
 def subpv(cmd, **kwargs):
     try:
         return subp(cmd, stderr=subprocess.STDOUT, **kwargs)
     except subprocess.CalledProcessError as e:
         print("--CMD--")
-        print(cmd)
+        print(cmd if isinstance(cmd, str) else " ".join(map(shlex.quote, cmd)))
         print("--RETURN CODE--")
         print(e.returncode)
         print("--STDOUT--")
-        print(e.stdout)
+        print(clip(e.stdout))
         print("--STDERR--")
-        print(e.stderr)
+        print(clip(e.stderr))
 
         raise
@@ -0,0 +1,52 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""Stream the output of commands."""
+
+import subprocess
+import sys
+import tracemalloc
+
+import pytest
+
+from src.util.subp import stream, stream_array
+
+
+def test_stream_memory_is_flat():
+    # about 40 MB of JSON, one element at a time
+    script = (
+        "import sys\n"
+        "sys.stdout.write('{\"history\": [')\n"
+        "for i in range(200000):\n"
+        "    sys.stdout.write((',' if i else '') + '{\"height\": %d, \"value\": \"%s\"}'"
+        " % (i, 'v' * 180))\n"
+        "sys.stdout.write(']}')\n"
+    )
+    tracemalloc.start()
+    try:
+        count = 0
+        for count, item in enumerate(
+            stream_array([sys.executable, "-c", script], "history", env=None), 1
+        ):
+            assert item["height"] == count - 1
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert count == 200000
+    assert peak < 4 * 1024 * 1024
+
+
+def test_stream_failure_keeps_tail():
+    script = "import sys\nsys.stdout.write('x' * 1000000 + 'the end')\nsys.exit(3)\n"
+    with pytest.raises(subprocess.CalledProcessError) as excinfo:
+        for _ in stream([sys.executable, "-c", script], env=None, tail=1024):
+            pass
+    assert excinfo.value.returncode == 3
+    assert excinfo.value.output.endswith("the end")
+    assert len(excinfo.value.output) < 2048
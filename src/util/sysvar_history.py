@@ -0,0 +1,92 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""
+Give a sysvar a long history, and read it back through `/system/history`.
+
+Only the SetSysvar account may set sysvars, so `fill` can't spread the work
+over several signers. Instead, as in `bootstrap`, it pre-signs a window of
+SetSysvar txs with consecutive sequence numbers and submits them together, so
+they can commit in the same block; any the chain saw out of order are
+re-signed with fresh sequence numbers and submitted with the next window.
+"""
+
+import base64
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from src.util import xproc
+from src.util.decode import decode_json
+from src.util.history import next_path
+from src.util.presign import Presigner, accepted, account_sequences, submit
+
+# requests codes aren't technically members of their containing objects
+# pylint: disable=no-member
+
+
+def fill(ndau, keytool, client, conf, name, values, *, window=50, retries=3):
+    """
+    Set sysvar `name` to each of `values` (strings).
+
+    Values are set in order, except that any which have to be submitted
+    again end up after the rest of their window. `conf` is the parsed
+    ndautool.toml, for the SetSysvar account's keys. A value rejected more
+    than `retries` times fails the fill.
+    """
+    signer = conf["set_sysvar"]["address"]
+    keys = conf["set_sysvar"]["keys"]
+    presigner = Presigner(ndau, keytool)
+    template = ndau.json(f"-j sysvar set {name} init")
+    pending = [(value, 0) for value in values]
+    with xproc.lock("signer-set-sysvar"), ThreadPoolExecutor(window) as executor:
+        while pending:
+            batch, pending = pending[:window], pending[window:]
+            first = account_sequences(client, [signer])[signer] + 1
+            txs = [
+                dict(
+                    template,
+                    value=base64.b64encode(value.encode("utf8")).decode("ascii"),
+                    sequence=first + i,
+                )
+                for i, (value, _) in enumerate(batch)
+            ]
+            signed = list(
+                executor.map(lambda tx: presigner.sign("SetSysvar", tx, keys), txs)
+            )
+            submissions = list(
+                executor.map(lambda tx: submit(client, "SetSysvar", tx), signed)
+            )
+            rejected = []
+            for (value, tries), submission in zip(batch, submissions):
+                if accepted(submission):
+                    continue
+                if tries >= retries:
+                    raise AssertionError(
+                        f"could not set {name}={value}: {submission.body}"
+                    )
+                rejected.append((value, tries + 1))
+            pending = rejected + pending
+
+
+def iter_history(client, name, *, limit=100):
+    """Yield every history entry of sysvar `name`, oldest first."""
+    path = f"/system/history/{name}?limit={limit}"
+    while path:
+        resp = client.get(path)
+        assert resp.status_code == requests.codes.ok, resp.text
+        data = decode_json(resp)
+        yield from data.get("history") or []
+        nxt = data.get("next", "")
+        path = next_path(nxt) if nxt else None
+
+
+def value_of(entry):
+    """Decode the value of a history entry, as set by `fill`."""
+    return base64.b64decode(entry["value"]).decode("utf8")
@@ -0,0 +1,150 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""Long-lived command sessions for the ndau and keytool binaries."""
+
+import os
+import re
+import shlex
+
+from src.util import decode, xproc
+from src.util.subp import ndenv, stream, stream_array, stream_json, subpv
+
+# Anything which needs a real shell to interpret it: variable and command
+# substitution, globbing, pipes and redirections.
+SHELL_SYNTAX = re.compile(r"[$`*?\[|&;<>()]")
+
+# ndau subcommands whose output depends only on the local tool configuration,
+# never on chain state. Their results can safely be reused for the whole session.
+NDAU_MEMOIZE = ("conf-path", "account addr ")
+
+# ndau subcommands which are signed by one of the well-known chain accounts.
+# Parallel workers must not submit these at the same time, or they would reuse
+# the same sequence number. Maps command prefixes to `xproc` lock names.
+NDAU_SIGNER_LOCKS = {
+    "rfe ": "signer-rfe",
+    "issue ": "signer-rfe",
+    "sysvar set ": "signer-set-sysvar",
+    "record-price ": "signer-record-price",
+    "nnr ": "signer-nnr",
+    "cvc ": "signer-cvc",
+}
+
+
+class ToolSession:
+    """
+    Run a tool binary repeatedly with as little per-call overhead as possible.
+
+    A session resolves the binary path and environment once, executes the tool
+    directly instead of through `/bin/sh`, and remembers the output of
+    subcommands listed in `memoize`: any command starting with one of those
+    prefixes is only ever run once per session.
+
+    Instances are called exactly like the `ndau` and `keytool` fixtures always
+    have been: `session(cmd, **kwargs)` returns the stripped stdout, and raises
+    `subprocess.CalledProcessError` on failure.
+
+    Commands starting with one of the prefixes in `locks` are run while
+    holding the corresponding cross-process lock; see `src.util.xproc`.
+
+    If `stats` is a `CommandStats`, every command actually run is timed and
+    recorded there under the name `tool`.
+    """
+
+    def __init__(
+        self, path, *, env=None, memoize=(), locks=None, stats=None, tool=None
+    ):
+        self.path = str(path)
+        self.env = ndenv() if env is None else env
+        self.memoize = tuple(memoize)
+        self.locks = {} if locks is None else locks
+        self.stats = stats
+        self.tool = os.path.basename(self.path) if tool is None else tool
+        self._cache = {}
+
+    def argv(self, cmd):
+        """
+        Return the argument vector for `cmd`, or `None` if it needs a shell.
+        """
+        if SHELL_SYNTAX.search(cmd):
+            return None
+        return [self.path] + shlex.split(cmd)
+
+    def _prepare(self, cmd, kwargs):
+        """Return the argv and lock name for `cmd`, adding a stats recorder."""
+        argv = self.argv(cmd)
+        if argv is None:
+            argv = f"{self.path} {cmd}"
+        lock_name = next(
+            (name for prefix, name in self.locks.items() if cmd.startswith(prefix)),
+            None,
+        )
+        if self.stats is not None:
+            kwargs["record"] = self.stats.recorder(self.tool, cmd)
+        return argv, lock_name
+
+    def run(self, cmd, **kwargs):
+        """Run `cmd` without consulting the memo cache."""
+        argv, lock_name = self._prepare(cmd, kwargs)
+        if lock_name is None:
+            return subpv(argv, env=self.env, **kwargs)
+        with xproc.lock(lock_name):
+            return subpv(argv, env=self.env, **kwargs)
+
+    def _stream(self, streamer, cmd, *args, **kwargs):
+        # checked here rather than in the generator, so that it fails at the call
+        if "input" in kwargs:
+            raise TypeError(
+                f"{self.tool} {cmd}: streamed commands can't be given input=; "
+                "use run() to pass stdin"
+            )
+        return self._streamed(streamer, cmd, *args, **kwargs)
+
+    def _streamed(self, streamer, cmd, *args, **kwargs):
+        argv, lock_name = self._prepare(cmd, kwargs)
+        if lock_name is None:
+            yield from streamer(argv, *args, env=self.env, **kwargs)
+            return
+        with xproc.lock(lock_name):
+            yield from streamer(argv, *args, env=self.env, **kwargs)
+
+    def stream(self, cmd, **kwargs):
+        """
+        Run `cmd`, yielding each line of its output as it arrives.
+
+        Like `stream_json` and `stream_array`, this never memoizes and keeps
+        only a bounded tail of the output for the error raised on failure, so
+        memory stays flat however much the command prints.
+        """
+        return self._stream(stream, cmd, **kwargs)
+
+    def stream_json(self, cmd, **kwargs):
+        """Run `cmd`, yielding each JSON value it prints."""
+        return self._stream(stream_json, cmd, **kwargs)
+
+    def stream_array(self, cmd, key=None, **kwargs):
+        """Run `cmd`, yielding each element of the JSON array it prints."""
+        return self._stream(stream_array, cmd, key, **kwargs)
+
+    def __call__(self, cmd, **kwargs):
+        if kwargs or not cmd.startswith(self.memoize):
+            return self.run(cmd, **kwargs)
+        try:
+            return self._cache[cmd]
+        except KeyError:
+            out = self._cache[cmd] = self.run(cmd)
+            return out
+
+    def json(self, cmd, **kwargs):
+        """Run `cmd` like `__call__` and decode its output as JSON."""
+        return decode.loads(self(cmd, **kwargs))
+
+    def forget(self):
+        """Drop all memoized output."""
+        self._cache.clear()
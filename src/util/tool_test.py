@@ -0,0 +1,24 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""Run tools through `ToolSession`."""
+
+import sys
+
+import pytest
+
+from src.util.tool import ToolSession
+
+
+def test_stream_rejects_input():
+    session = ToolSession(sys.executable, env=None, tool="python")
+    for streamer in (session.stream, session.stream_json, session.stream_array):
+        with pytest.raises(TypeError, match="input="):
+            streamer("-c 'print(input())'", input="1")
+    assert list(session.stream("-c 'print(1)'")) == ["1"]
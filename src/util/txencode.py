@@ -0,0 +1,173 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""
+Build the signable bytes and hashes of ndau transactions in-process.
+
+This mirrors the `SignableBytes` methods of ndau's transactions, which
+concatenate the tx fields in declaration order: addresses as their text form,
+integers as big-endian uint64s, keys as their raw key bytes and byte strings
+as-is. Signatures are never part of the signable bytes.
+
+Transactions are given as the JSON which `ndau -j` emits. `tx_hash` matches
+the hash ndauapi reports; see
+https://github.com/ndau/metanode/
+        blob/0f1c08ce1863f6950738932dc30ddaf8d8e66809/
+        pkg/meta/transaction/transactable.go#L163-L166
+"""
+
+import base64
+import hashlib
+import struct
+
+import msgpack
+
+from src.util.duration import parse_duration
+
+# ndau's base32 alphabet: no 0, 1, l or o
+B32_ALPHABET = "abcdefghijkmnpqrstuvwxyz23456789"
+B32_VALUES = {char: value for value, char in enumerate(B32_ALPHABET)}
+
+KEY_PREFIXES = ("npub", "npvt")
+
+
+def b32decode(text):
+    """Decode ndau base32, discarding any trailing partial byte."""
+    acc = bits = 0
+    out = bytearray()
+    for char in text:
+        acc = (acc << 5) | B32_VALUES[char]
+        bits += 5
+        if bits >= 8:
+            bits -= 8
+            out.append((acc >> bits) & 0xFF)
+    return bytes(out)
+
+
+def key_bytes(key):
+    """
+    Return the raw key bytes of a key in ndau text form (`npub...`).
+
+    The text form is the base32 encoding of a frame: one byte counting the
+    trailing checksum bytes, then the msgpack array `[algorithm, data]`, then
+    the checksum. `data` is the key's length in one byte, the key itself and
+    any algorithm-specific extra bytes.
+    """
+    if not key.startswith(KEY_PREFIXES):
+        raise ValueError(f"not an ndau key: {key!r}")
+    frame = b32decode(key[len(KEY_PREFIXES[0]) :])
+    try:
+        _, data = msgpack.unpackb(frame[1 : len(frame) - frame[0]], raw=False)
+        return data[1 : 1 + data[0]]
+    except (IndexError, TypeError, ValueError, msgpack.UnpackException):
+        raise ValueError(f"could not decode ndau key: {key!r}")
+
+
+def uint64(value):
+    return struct.pack(">Q", value)
+
+
+def text(value):
+    return value.encode("utf8")
+
+
+def blob(value):
+    """Decode a Go `[]byte` field, which JSON carries as standard base64."""
+    return base64.b64decode(value) if value else b""
+
+
+def duration(value):
+    return parse_duration(value) if isinstance(value, str) else value
+
+
+def transfer(tx):
+    return (
+        text(tx["source"])
+        + text(tx["destination"])
+        + uint64(tx["qty"])
+        + uint64(tx["sequence"])
+    )
+
+
+def release_from_endowment(tx):
+    return text(tx["destination"]) + uint64(tx["qty"]) + uint64(tx["sequence"])
+
+
+def issue(tx):
+    return uint64(tx["qty"]) + uint64(tx["sequence"])
+
+
+def lock(tx):
+    return text(tx["target"]) + uint64(duration(tx["period"])) + uint64(tx["sequence"])
+
+
+def notify(tx):
+    return text(tx["target"]) + uint64(tx["sequence"])
+
+
+def set_validation(tx):
+    return (
+        text(tx["target"])
+        + key_bytes(tx["ownership"])
+        + b"".join(key_bytes(key) for key in tx["validation_keys"] or ())
+        + blob(tx.get("validation_script"))
+        + uint64(tx["sequence"])
+    )
+
+
+def set_sysvar(tx):
+    return text(tx["name"]) + blob(tx["value"]) + uint64(tx["sequence"])
+
+
+ENCODERS = {
+    "transfer": transfer,
+    "releasefromendowment": release_from_endowment,
+    "rfe": release_from_endowment,
+    "issue": issue,
+    "lock": lock,
+    "notify": notify,
+    "setvalidation": set_validation,
+    "setsysvar": set_sysvar,
+}
+
+
+def encoder(txtype):
+    """
+    Return the signable bytes function for `txtype`.
+
+    Both ndauapi's names (`SetValidation`) and the tool's (`set-validation`)
+    are accepted. Raises `ValueError` for unsupported types.
+    """
+    try:
+        return ENCODERS[txtype.lower().replace("-", "").replace("_", "")]
+    except KeyError:
+        raise ValueError(f"unsupported tx type: {txtype}")
+
+
+def signable_bytes(txtype, tx):
+    """Return the signable bytes of the tx JSON object `tx`."""
+    return encoder(txtype)(tx)
+
+
+def hash_bytes(data):
+    """Return the URL-safe, unpadded base64 MD5 of `data`."""
+    return (
+        base64.urlsafe_b64encode(hashlib.md5(data).digest()).decode("utf8").rstrip("=")
+    )
+
+
+def tx_hash(txtype, tx):
+    """Return the ndau tx hash of the tx JSON object `tx`."""
+    return hash_bytes(signable_bytes(txtype, tx))
+
+
+def tx_hashes(txtype, txs):
+    """Return the ndau tx hashes of many txs of the same type."""
+    encode = encoder(txtype)
+    return [hash_bytes(encode(tx)) for tx in txs]
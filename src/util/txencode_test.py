@@ -0,0 +1,91 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""Encode txs offline exactly as the ndau tool does."""
+
+import base64
+import hashlib
+import json
+
+import pytest
+
+from src.util import txencode
+
+# the fixed validation keys of test_command_validator_change
+GOLDEN_NPUB = (
+    "npuba8jadtbbebbp5iixnbv2kp5suzt35am2zu4gjg2e9t4ghzci97nj7a5mnrvx823883tpfa3f"
+)
+GOLDEN_NPVT = (
+    "npvtayjadtcbiahcbm8k5ik5piz5n86itab9ffx7qf244ayhnaqwz5fw3c4aj3zmqsy7wekya36fg72jm"
+    "267sf6m3pdevncr27dd5ter8ye8spxyh349uxz8s684"
+)
+GOLDEN_KEY = bytes.fromhex(
+    "42dda115606785377095e39d8178bcb4649b04fc7463dc48ff589e836b63e75f"
+)
+GOLDEN_SOURCE = "ndaea8w9gz84ncxrytepzxgkg9ymi4k7c9p427i6b57xw3r4"
+GOLDEN_DEST = "ndmfgnz9qby6nyi35aadjt9nasjqxqyd4vrswucwfmceqs3y"
+
+# Fixed txs, their signable bytes and their tx hashes. None of these come from
+# txencode: the bytes are laid out by hand as ndau's SignableBytes writes each
+# field (addresses as text, keys as their raw bytes, numbers as big-endian
+# uint64), and each hash is the unpadded URL-safe base64 MD5 of those bytes,
+# as ndau's tx hash is defined. test_txencode_golden_match_tool checks the
+# bytes against `ndau signable-bytes --strip` wherever the tool is available.
+GOLDEN_TXS = {
+    "SetValidation": (
+        {
+            "target": GOLDEN_SOURCE,
+            "ownership": GOLDEN_NPUB,
+            "validation_keys": [GOLDEN_NPUB],
+            "validation_script": None,
+            "sequence": 7,
+            "signatures": None,
+        },
+        GOLDEN_SOURCE.encode() + GOLDEN_KEY + GOLDEN_KEY + (7).to_bytes(8, "big"),
+        "swZvpO--p0TratnD_vHeMg",
+    ),
+    "Transfer": (
+        {
+            "source": GOLDEN_SOURCE,
+            "destination": GOLDEN_DEST,
+            "qty": 123456789,
+            "sequence": 8,
+            "signatures": None,
+        },
+        GOLDEN_SOURCE.encode()
+        + GOLDEN_DEST.encode()
+        + (123456789).to_bytes(8, "big")
+        + (8).to_bytes(8, "big"),
+        "ceeYMSD6ZbgevQdq12aqrQ",
+    ),
+}
+
+
+def test_txencode_golden():
+    # an ed25519 private key is its 32-byte seed followed by the public key,
+    # so the two keys, encoded separately, must decode consistently
+    assert txencode.key_bytes(GOLDEN_NPUB) == GOLDEN_KEY
+    private = txencode.key_bytes(GOLDEN_NPVT)
+    assert len(private) == 64 and private[32:] == GOLDEN_KEY
+
+    for txtype, (tx, data, txhash) in GOLDEN_TXS.items():
+        digest = hashlib.md5(data).digest()
+        assert base64.urlsafe_b64encode(digest).decode().rstrip("=") == txhash
+        assert txencode.signable_bytes(txtype, tx) == data
+        assert txencode.tx_hash(txtype, tx) == txhash
+
+
+@pytest.mark.api
+@pytest.mark.parametrize("txtype", GOLDEN_TXS)
+def test_txencode_golden_match_tool(ndau, tmp_path, txtype):
+    tx, data, _ = GOLDEN_TXS[txtype]
+    path = tmp_path / "tx.json"
+    path.write_text(json.dumps(tx))
+    got = ndau(f"signable-bytes --strip {txtype} {path}")
+    assert base64.b64decode(got, validate=True) == data
@@ -0,0 +1,210 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""
+Prepare a weighted mix of signed transactions for load generation.
+
+A mix such as `transfer=8,lock=1,notify=1` names tx kinds and their relative
+weights. `prepare` signs every tx of the mix before any load starts and
+returns them as `loadgen.open_loop` requests, interleaved by weight:
+
+- `transfer`: 1 napu from each of a set of pool accounts to the next, many
+  times over, re-signed with consecutive sequence numbers.
+- `set-validation`: each of a set of pool accounts re-sets its own validation
+  keys, many times over; these are signed by the ownership key.
+- `sysvar-set`: the SetSysvar account sets fresh sysvars, all in one chain.
+- `lock`: a fresh pool account locks itself, once per tx.
+- `notify`: a fresh pool account, locked before the load starts, notifies.
+
+Every signer's txs form a chain, which `open_loop` submits in order: one at
+a time, so a chain of n txs takes at least n round trips however high the
+rate. To keep that from capping the rate, no signer of a repeatable kind
+signs more than `MAX_CHAIN` txs; more txs take more pool accounts.
+
+The kinds in `SINGLE_CHAIN` have just one signer, so their share of the load
+is capped at about one tx per round trip whatever the rate; a mix including
+them has no meaningful saturation point.
+"""
+
+from src.util.presign import Presigner, accepted, account_sequences, submit_chains
+from src.util.random_string import random_string
+
+KINDS = ("transfer", "set-validation", "sysvar-set", "lock", "notify")
+LOCK_PERIOD = "3m"
+# most txs one signer of a repeatable kind signs
+MAX_CHAIN = 16
+# kinds whose txs are all signed by the same account, in one chain
+SINGLE_CHAIN = ("sysvar-set",)
+
+
+def parse_mix(text):
+    """Parse `kind=weight,...` into {kind: weight}. A bare kind weighs 1."""
+    mix = {}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        kind, _, weight = part.partition("=")
+        if kind not in KINDS:
+            raise ValueError(f"unknown tx kind {kind!r}; choose from {KINDS}")
+        mix[kind] = float(weight) if weight else 1.0
+    if not mix or min(mix.values()) < 0 or sum(mix.values()) == 0:
+        raise ValueError(f"tx mix {text!r} has no positive weights")
+    return mix
+
+
+def apportion(mix, count):
+    """Split `count` txs between the kinds of `mix` in proportion to weight."""
+    total = sum(mix.values())
+    counts = {kind: int(count * weight / total) for kind, weight in mix.items()}
+    # hand out what rounding down left over, largest remainders first
+    by_remainder = sorted(
+        mix, key=lambda k: count * mix[k] / total - counts[k], reverse=True
+    )
+    for kind in by_remainder[: count - sum(counts.values())]:
+        counts[kind] += 1
+    return counts
+
+
+def signer_count(count, accounts, max_chain=MAX_CHAIN):
+    """
+    Return how many signers share `count` txs: at least `accounts`, and enough
+    that none signs more than `max_chain`, but never more than there are txs.
+    """
+    return min(count, max(accounts, -(-count // max_chain)))
+
+
+def interleave(streams, mix):
+    """
+    Merge the lists in `streams` (keyed by kind) in proportion to `mix`, by
+    smooth weighted round robin, keeping each list's order.
+    """
+    streams = {kind: list(reversed(items)) for kind, items in streams.items() if items}
+    credit = {kind: 0.0 for kind in streams}
+    merged = []
+    while streams:
+        total = sum(mix[kind] for kind in streams)
+        for kind in streams:
+            credit[kind] += mix[kind]
+        kind = max(streams, key=lambda k: credit[k])
+        credit[kind] -= total
+        merged.append(streams[kind].pop())
+        if not streams[kind]:
+            del streams[kind]
+    return merged
+
+
+def request(txtype, tx, chain):
+    return ("POST", f"/tx/submit/{txtype}", tx, chain)
+
+
+def repeated(presigner, client, registry, txtype, names, count, make, keys):
+    """
+    Spread `count` txs of `txtype` over chains signed by `names`.
+
+    `make(name)` returns the tool's `-j` output of one such tx, and
+    `keys(name)` the private keys which sign it.
+    """
+    addrs = {name: registry.address(name) for name in names}
+    sequences = account_sequences(client, list(addrs.values()))
+    chains = []
+    for i, name in enumerate(names):
+        n = count // len(names) + (1 if i < count % len(names) else 0)
+        first = sequences[addrs[name]] + 1
+        txs = presigner.resequence(
+            txtype, make(name), keys(name), range(first, first + n)
+        )
+        chains.append([request(txtype, tx, addrs[name]) for tx in txs])
+    # round robin between the chains, so each signer's txs are spread out
+    width = max((len(chain) for chain in chains), default=0)
+    return [chain[j] for j in range(width) for chain in chains if j < len(chain)]
+
+
+def prepare(
+    ndau, keytool, client, account_pool, registry, conf, mix, count, *, accounts=16
+):
+    """
+    Sign `count` txs mixed as `mix` (see `parse_mix`), and return them as
+    `open_loop` requests.
+
+    Repeatable kinds are signed by `accounts` pool accounts each, or more
+    when they have over `MAX_CHAIN` txs per account (see `signer_count`);
+    `conf` is the parsed ndautool.toml, for the SetSysvar account's keys.
+    """
+    counts = apportion(mix, count)
+    presigner = Presigner(ndau, keytool)
+    streams = {}
+
+    if counts.get("transfer"):
+        # even a single transfer needs a second account to send to
+        n = max(2, signer_count(counts["transfer"], accounts))
+        names = [account_pool.take() for _ in range(n)]
+        ring = dict(zip(names, names[1:] + names[:1]))
+        streams["transfer"] = repeated(
+            presigner,
+            client,
+            registry,
+            "Transfer",
+            names,
+            counts["transfer"],
+            lambda name: ndau.json(f"-j transfer --napu=1 {name} {ring[name]}"),
+            registry.validation_keys,
+        )
+
+    if counts.get("set-validation"):
+        n = signer_count(counts["set-validation"], accounts)
+        streams["set-validation"] = repeated(
+            presigner,
+            client,
+            registry,
+            "SetValidation",
+            [account_pool.take() for _ in range(n)],
+            counts["set-validation"],
+            lambda name: ndau.json(f"-j account set-validation {name}"),
+            registry.ownership_key,
+        )
+
+    if counts.get("sysvar-set"):
+        signer = conf["set_sysvar"]["address"]
+        first = account_sequences(client, [signer])[signer] + 1
+        template = ndau.json(f"-j sysvar set {random_string('load')} --json 1")
+        txs = [
+            presigner.sign(
+                "SetSysvar",
+                dict(template, name=random_string("load"), sequence=first + i),
+                conf["set_sysvar"]["keys"],
+            )
+            for i in range(counts["sysvar-set"])
+        ]
+        streams["sysvar-set"] = [request("SetSysvar", tx, signer) for tx in txs]
+
+    if counts.get("lock"):
+        names = [account_pool.take() for _ in range(counts["lock"])]
+        streams["lock"] = [
+            request(
+                "Lock",
+                ndau.json(f"-j account lock {name} {LOCK_PERIOD}"),
+                registry.address(name),
+            )
+            for name in names
+        ]
+
+    if counts.get("notify"):
+        names = [account_pool.take() for _ in range(counts["notify"])]
+        locks = [[ndau.json(f"-j account lock {name} {LOCK_PERIOD}")] for name in names]
+        submissions, _ = submit_chains(client, "Lock", locks)
+        rejected = [s.body for s in submissions if not accepted(s)]
+        assert not rejected, f"could not lock accounts to notify: {rejected[0]}"
+        streams["notify"] = [
+            request(
+                "Notify",
+                ndau.json(f"-j account notify {name}"),
+                registry.address(name),
+            )
+            for name in names
+        ]
+
+    return interleave(streams, mix)
@@ -0,0 +1,21 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""Spread a tx mix over signers."""
+
+from src.util.txmix import MAX_CHAIN, signer_count
+
+
+def test_txmix_signer_count():
+    assert signer_count(1, 16) == 1
+    assert signer_count(100, 16) == 16
+    assert signer_count(2000, 16) == -(-2000 // MAX_CHAIN)
+    # with many txs, no signer's chain is longer than MAX_CHAIN
+    for count in (17 * MAX_CHAIN, 1000 * MAX_CHAIN + 1):
+        assert -(-count // signer_count(count, 16)) <= MAX_CHAIN
@@ -0,0 +1,97 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""
+Walk the transaction index back to genesis through `/transaction/before`.
+
+Every page names the hash to request the next page with, so pages can't be
+fetched in parallel; instead the next page is fetched in the background while
+the current one is checked. Along the walk, block heights must never increase
+and no tx may appear twice.
+"""
+
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from src.util.decode import decode_json
+
+Problem = namedtuple("Problem", ["index", "txhash", "reason"])
+WalkReport = namedtuple(
+    "WalkReport", ["pages", "txs", "first", "last", "seconds", "problems"]
+)
+
+
+def pages_per_second(report):
+    return report.pages / report.seconds if report.seconds else 0.0
+
+
+def fetch_page(client, txhash, types=(), limit=100):
+    """Return the txs of the page starting at `txhash`, and the next hash."""
+    params = [("type", t) for t in types] + [("limit", limit)]
+    resp = client.get(f"/transaction/before/{txhash}", params=params)
+    resp.raise_for_status()
+    data = decode_json(resp)
+    return data["Txs"] or [], data["NextTxHash"]
+
+
+def iter_pages(client, start="start", *, types=(), limit=100):
+    """
+    Yield the list of txs of every page from `start` (a tx hash, or "start"
+    for the latest tx) back to genesis, fetching one page ahead.
+    """
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(fetch_page, client, start, types, limit)
+        while future is not None:
+            txs, nxt = future.result()
+            future = (
+                executor.submit(fetch_page, client, nxt, types, limit) if nxt else None
+            )
+            yield txs
+
+
+def walk(client, start="start", *, types=(), limit=100, max_pages=None):
+    """
+    Walk back from `start` to genesis, only through txs of `types` if given,
+    and return a `WalkReport`. The walk stops at the first problem found, or
+    after `max_pages` pages if given.
+    """
+    started = time.perf_counter()
+    pages = 0
+    seen = set()
+    first = last = None
+    problems = []
+    for txs in islice(iter_pages(client, start, types=types, limit=limit), max_pages):
+        pages += 1
+        for tx in txs:
+            index = len(seen)
+            if tx["TxHash"] in seen:
+                problems.append(Problem(index, tx["TxHash"], "appears twice"))
+            elif types and tx["TxType"] not in types:
+                problems.append(Problem(index, tx["TxHash"], f"is a {tx['TxType']}"))
+            elif last is not None and tx["BlockHeight"] > last["BlockHeight"]:
+                problems.append(
+                    Problem(
+                        index,
+                        tx["TxHash"],
+                        f"is at height {tx['BlockHeight']}, "
+                        f"after height {last['BlockHeight']}",
+                    )
+                )
+            if problems:
+                break
+            seen.add(tx["TxHash"])
+            first = first or tx
+            last = tx
+        if problems:
+            break
+    return WalkReport(
+        pages, len(seen), first, last, time.perf_counter() - started, problems
+    )
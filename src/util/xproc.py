@@ -0,0 +1,77 @@
+#  ----- ---- --- -- -
+#  Copyright 2020 The Axiom Foundation. All Rights Reserved.
+# 
+#  Licensed under the Apache License 2.0 (the "License").  You may not use
+#  this file except in compliance with the License.  You can obtain a copy
+#  in the file LICENSE in the source distribution or at
+#  https://www.apache.org/licenses/LICENSE-2.0.txt
+#  - -- --- ---- -----
+
+"""
+Coordinate pytest-xdist worker processes which share a single localnet.
+
+When the suite runs serially, locks are no-ops and `run_once` simply calls
+its function, so none of this costs anything outside of parallel mode.
+"""
+
+import fcntl
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+def worker_id():
+    """Return the xdist worker id (e.g. "gw0"), or `None` when running serially."""
+    return os.environ.get("PYTEST_XDIST_WORKER")
+
+
+def parallel():
+    """Return whether this process is one of several xdist workers."""
+    return worker_id() is not None
+
+
+def shared_dir():
+    """Return a directory shared by every worker of the current test run."""
+    run_id = os.environ.get("PYTEST_XDIST_TESTRUNUID", "serial")
+    path = os.path.join(tempfile.gettempdir(), f"ndau-integration-{run_id}")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+@contextmanager
+def lock(name):
+    """
+    Hold an exclusive lock named `name` across all workers.
+
+    Locks are not reentrant: never take a lock which the current process
+    already holds.
+    """
+    if not parallel():
+        yield
+        return
+    with open(os.path.join(shared_dir(), f"{name}.lock"), "w") as fp:
+        fcntl.flock(fp, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fp, fcntl.LOCK_UN)
+
+
+def run_once(name, fn):
+    """
+    Call `fn` once per test run, no matter how many workers ask.
+
+    Every caller receives the same result, so it must be JSON-serializable.
+    """
+    if not parallel():
+        return fn()
+    path = os.path.join(shared_dir(), f"once-{name}.json")
+    with lock(f"once-{name}"):
+        if os.path.exists(path):
+            with open(path, "rt") as fp:
+                return json.load(fp)
+        result = fn()
+        with open(path, "wt") as fp:
+            json.dump(result, fp)
+        return result